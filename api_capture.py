@@ -8,10 +8,14 @@
 """
 
 import asyncio
+import argparse
 import json
 import re
 import csv
 import os
+import queue
+import functools
+import multiprocessing
 from pathlib import Path
 from urllib.parse import urlparse, parse_qs
 from datetime import datetime
@@ -23,14 +27,22 @@ import aiofiles
 from utilities import (
     PathManager, 
     FileManager, 
+    ArchiveManager,
+    LogManager,
+    RequestFilter,
     ROOT_DIR,
     DATA_DIR,
     API_DIR
 )
+from schema_monitor import SchemaMonitor, summarize
+from capture_pipeline import process_version_dir, finalize_capture
+
+# 协调进程等待工作进程消息的超时(秒)，超时后检查工作进程是否异常退出
+RESULT_POLL_TIMEOUT = 5
 
 
 class APICapture:
-    def __init__(self):
+    def __init__(self, timestamp=None, worker_id=None, log_rate=None, block=None, archive=False):
         self.target_url = "https://jcc.qq.com"
         self.requests_data = []
         
@@ -44,8 +56,17 @@ class APICapture:
             "13": self.api_base_dir / "双城传说II",
         }
         
-        # 获取当前时间戳用于文件命名
-        self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # 获取当前时间戳用于文件命名（分片模式下由协调进程统一下发）
+        self.timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+        
+        # 分片工作进程编号，None 表示单进程/协调进程
+        self.worker_id = worker_id
+        
+        # 逐请求日志限流(每秒条数)，None 表示不限流
+        self.log_rate = log_rate
+        
+        # 总体数据以带偏移索引的 .jsonl 归档代替 JSON 文件保存
+        self.archive = archive
         
         # 日志设置
         self.log_dir = ROOT_DIR / "logs"
@@ -122,6 +143,15 @@ class APICapture:
             }
         }
 
+        # API请求过滤器: 关键词与各API类型的匹配规则编译为一次分组匹配
+        self.api_filter = RequestFilter(" or ".join(
+            ["url:api,json,data,.js"] + [f're:"{info["pattern"]}"' for info in self.api_config.values()]
+        ))
+        
+        # 请求拦截过滤器(如 type:image,font,media)，命中的请求直接中止，None 表示不拦截
+        self.block = block
+        self.block_filter = RequestFilter(block) if block else None
+
         # 添加版本配置
         self.version_config = {
             "4": {
@@ -160,6 +190,12 @@ class APICapture:
             "common": []  # 共通API
         }
         
+        # 响应体结构监控(按 api_type/版本 缓存结构并检测漂移)
+        self.schema_monitor = SchemaMonitor()
+        
+        # 尚未处理完的响应捕获任务，保存前需等待完成
+        self.pending_captures = set()
+        
         # 确保所有目录存在
         self._create_directories()
 
@@ -186,19 +222,16 @@ class APICapture:
     def _setup_logger(self):
         """配置日志"""
         logging_format = "%(asctime)s - %(levelname)s - %(message)s"
-        log_file = self.log_dir / f"api_capture_{self.timestamp}.log"
-        
-        import logging
-        logging.basicConfig(
-            level=logging.INFO,
-            format=logging_format,
-            handlers=[
-                logging.FileHandler(log_file, encoding="utf-8"),
-                logging.StreamHandler()
-            ]
-        )
+        if self.worker_id is None:
+            log_file = self.log_dir / f"api_capture_{self.timestamp}.log"
+        else:
+            log_file = self.log_dir / f"api_capture_{self.timestamp}_worker{self.worker_id}.log"
         
-        return logging.getLogger("APICapture")
+        # 队列日志: 事件循环中只做入队，文件/控制台写入由后台线程完成
+        logger_name = "APICapture" if self.worker_id is None else f"APICapture.worker{self.worker_id}"
+        return LogManager.setup_queue_logging(
+            log_file, fmt=logging_format, rate_limit=self.log_rate, logger_name=logger_name
+        )
 
     async def generate_curl(self, request):
         """
@@ -424,26 +457,74 @@ fetch("{url}", {options_str})
                 "body": body
             }
             
-            # 添加到请求数据列表
-            self.requests_data.append(request_info)
-            
-            # 添加到页面请求列表
-            page_url = request_info["page_url"]
-            if page_url:
-                if page_url not in self.page_requests:
-                    self.page_requests[page_url] = []
-                self.page_requests[page_url].append(request_info)
-            
-            # 按版本分类
+            self._record_request(request_info)
             version = request_info["version"]
-            self.version_requests[version].append(request_info)
+            
+            # 内联结构校验
+            if body is not None:
+                self._check_schema(request_info)
             
             # 实时打印API捕获信息
-            self.logger.info(f"捕获API: {url} [{request.method}] - 状态: {status} - 类型: {request_info.get('api_description', '未知')} - 版本: {version}")
+            self.logger.info(
+                f"捕获API: {url} [{request.method}] - 状态: {status} - 类型: {request_info.get('api_description', '未知')} - 版本: {version}",
+                extra={"rate_key": "capture"},
+            )
             
         except Exception as e:
             self.logger.error(f"处理响应时出错: {url} - {str(e)}")
 
+    def _on_response(self, response):
+        """
+        功能: 响应事件回调，把捕获任务登记到 pending_captures
+        
+        说明:
+        - 捕获任务需要异步读取响应体，保存前必须等待，否则会被丢失或计入下一个分片
+        """
+        task = asyncio.ensure_future(self.capture_response(response))
+        self.pending_captures.add(task)
+        task.add_done_callback(self.pending_captures.discard)
+
+    async def _drain_captures(self):
+        """等待所有已登记的响应捕获任务完成"""
+        while self.pending_captures:
+            await asyncio.gather(*list(self.pending_captures), return_exceptions=True)
+
+    def _record_request(self, request_info):
+        """
+        功能: 将一条请求记录加入内部的分类存储
+        
+        步骤:
+        1. 追加到总请求列表
+        2. 按页面URL分类
+        3. 按版本分类
+        """
+        self.requests_data.append(request_info)
+        
+        page_url = request_info.get("page_url")
+        if page_url:
+            if page_url not in self.page_requests:
+                self.page_requests[page_url] = []
+            self.page_requests[page_url].append(request_info)
+        
+        version = request_info.get("version", "common")
+        self.version_requests.setdefault(version, []).append(request_info)
+
+    def _check_schema(self, request_info):
+        """内联校验响应体结构，发现漂移时记录警告"""
+        body = request_info["response"]["body"]
+        api_type = request_info.get("api_type", "other")
+        version = request_info.get("version", "common")
+        try:
+            drift = self.schema_monitor.validate(api_type, version, body)
+        except Exception as e:
+            self.logger.error(f"结构校验出错: {request_info['url']} - {str(e)}")
+            return
+        if drift:
+            self.logger.warning(
+                f"检测到结构漂移: {api_type} [{version}] - 新增 {len(drift['added'])} / "
+                f"删除 {len(drift['removed'])} / 类型变化 {len(drift['retyped'])} - {request_info['url']}"
+            )
+
     def is_api_request(self, url):
         """
         功能: 判断URL是否为API请求
@@ -455,17 +536,15 @@ fetch("{url}", {options_str})
         返回值:
         - 如果是API请求返回True，否则返回False
         """
-        # 检查是否包含API相关关键词
-        api_keywords = ["api", "json", "data", ".js"]
-        if any(keyword in url.lower() for keyword in api_keywords):
-            return True
-        
-        # 检查是否匹配预定义的API模式
-        for api_info in self.api_config.values():
-            if re.search(api_info["pattern"], url):
-                return True
-        
-        return False
+        # 关键词与预定义API模式已在初始化时编译为 self.api_filter
+        return self.api_filter(url)
+
+    async def _route_request(self, route):
+        """拦截命中 block_filter 的请求(图片、字体等)，其余请求正常放行"""
+        if self.block_filter(route.request):
+            await route.abort()
+        else:
+            await route.continue_()
 
     async def save_results(self):
         """
@@ -481,9 +560,14 @@ fetch("{url}", {options_str})
         """
         self.logger.info("开始保存API数据...")
         
-        # 保存总体数据（所有API请求）
-        all_data_file = self.data_dir / f"all_api_requests_{self.timestamp}.json"
-        FileManager.save_json(self.requests_data, all_data_file)
+        # 保存总体数据（所有API请求），归档模式下只写出带偏移索引的归档，便于按记录随机读取
+        if self.archive:
+            all_data_file = ArchiveManager.write_archive(
+                self.requests_data, self.data_dir / f"all_api_requests_{self.timestamp}.jsonl"
+            )
+        else:
+            all_data_file = self.data_dir / f"all_api_requests_{self.timestamp}.json"
+            all_data_file = FileManager.save_json(self.requests_data, all_data_file)
         self.logger.info(f"所有API请求数据已保存到: {all_data_file}")
         
         # 按版本保存数据
@@ -518,9 +602,15 @@ fetch("{url}", {options_str})
                 
                 # 只保存JSON格式，使用api_前缀
                 json_file = save_path / f"api_{api_type}.json"
-                FileManager.save_json(type_requests, json_file)
+                json_file = FileManager.save_json(type_requests, json_file)
                 
                 self.logger.info(f"版本 {version_name} 的 {api_type} API数据已保存")
+            
+            # 规范化阶段: 生成列式数据表与装备合成索引，失败不影响原始数据的保存
+            process_version_dir(version_dir, api_type_requests, self.logger, version_name)
+        
+        # 增量更新全文索引，推断本次捕获的结构，更新结构缓存并保存漂移报告
+        finalize_capture(self.requests_data, self.timestamp, self.logger, self.schema_monitor, self.data_dir)
         
         # 保存按页面分类的数据
         for page_url, page_requests in self.page_requests.items():
@@ -541,6 +631,207 @@ fetch("{url}", {options_str})
         
         self.logger.info("所有结果保存完成!")
 
+    async def _visit_page(self, page, url, version_keys):
+        """
+        功能: 访问单个页面并依次切换到指定版本
+        
+        步骤:
+        1. 打开页面: 等待网络空闲，确保初始请求都被捕获
+        2. 切换版本: 依次点击每个版本的模式选择器(如果有)
+        
+        输入:
+        - page: Playwright 页面对象
+        - url: 页面URL
+        - version_keys: 需要切换的版本代码列表
+        """
+        self.logger.info(f"访问页面: {url}")
+        # 设置当前页面URL以便在捕获响应时使用
+        self.current_page_url = url
+        
+        await page.goto(url, wait_until="networkidle")
+        
+        # 等待页面加载
+        await page.wait_for_load_state("networkidle")
+        
+        # 等待一些额外的时间确保所有请求都被捕获
+        await asyncio.sleep(2)
+        
+        # 尝试点击模式选择器(如果有)
+        for version_key in version_keys:
+            version_info = self.version_config[version_key]
+            selector = version_info.get("selector")
+            if selector:
+                try:
+                    self.logger.info(f"尝试切换到版本: {version_info['name']} (选择器: {selector})")
+                    await page.click(selector)
+                    await page.wait_for_load_state("networkidle")
+                    await asyncio.sleep(2)
+                    
+                    # 设置当前版本
+                    self.current_version = version_key
+                    self.logger.info(f"成功切换到版本: {version_info['name']}")
+                except Exception as e:
+                    self.logger.error(f"点击选择器 {selector} 失败: {str(e)}")
+
+    def build_shards(self):
+        """
+        功能: 生成分片任务列表
+        
+        返回值:
+        - (页面URL, 版本代码) 元组列表，每个分片由一个工作进程独立完成
+        """
+        return [
+            (url, version_key)
+            for url in self.urls_to_visit
+            for version_key in self.version_config
+        ]
+
+    async def run_shard_worker(self, task_queue, result_queue):
+        """
+        功能: 分片工作进程主循环
+        
+        步骤:
+        1. 启动独立浏览器: 每个工作进程持有自己的浏览器实例
+        2. 领取分片: 从任务队列取出 (页面, 版本)，直到收到结束标记 None
+        3. 回传结果: 每完成一个分片，等待该分片的响应捕获任务完成后，把请求记录送回协调进程
+        
+        注意事项:
+        - 记录消息的数据为 {"shard": (页面, 版本), "records": 请求记录, "drift": 本分片内联校验的漂移报告}，
+          协调进程据此统计完成的分片，并把漂移报告合并到自己的结构监控器
+        - 结束消息 ("done", ...) 由 _shard_worker_main 统一发送
+        
+        输入:
+        - task_queue: 分片任务队列
+        - result_queue: 结果队列，消息格式为 (类型, 工作进程编号, 数据)
+        """
+        loop = asyncio.get_running_loop()
+        
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=False)
+            context = await browser.new_context()
+            if self.block_filter:
+                await context.route("**/*", self._route_request)
+            page = await context.new_page()
+            page.on("response", self._on_response)
+            
+            while True:
+                shard = await loop.run_in_executor(None, task_queue.get)
+                if shard is None:
+                    break
+                
+                url, version_key = shard
+                try:
+                    await self._visit_page(page, url, [version_key])
+                except Exception as e:
+                    self.logger.error(f"分片 {url} [{version_key}] 执行失败: {str(e)}")
+                
+                # 本分片触发的响应可能仍在读取响应体，全部完成后再回传
+                await self._drain_captures()
+                
+                # 取走本分片的记录与漂移报告，避免工作进程内存持续增长
+                records = self.requests_data
+                self.requests_data = []
+                self.page_requests = {}
+                self.version_requests = {key: [] for key in self.version_requests}
+                drift, self.schema_monitor.drift = self.schema_monitor.drift, {}
+                result_queue.put(("records", self.worker_id, {"shard": shard, "records": records, "drift": drift}))
+                self.logger.info(f"分片 {url} [{version_key}] 完成，回传 {len(records)} 条记录")
+            
+            await browser.close()
+
+    async def run_sharded(self, workers=None):
+        """
+        功能: 多进程分片捕获
+        
+        步骤:
+        1. 分发分片: 把所有 (页面, 版本) 分片放入任务队列
+        2. 启动工作进程: 每个进程使用独立的浏览器领取分片
+        3. 合并结果: 流式接收各进程回传的记录，按 (页面, 方法, URL) 去重后合并
+        4. 监控工作进程: 超时未收到消息时检查进程是否存活，异常退出(崩溃、被系统结束)的
+           工作进程视为已结束，避免无限等待；没有回传结果的分片记为失败
+        5. 统一保存: 所有进程结束后调用一次 save_results
+        
+        输入:
+        - workers: 工作进程数量，默认使用CPU核心数(不超过分片数)
+        """
+        shards = self.build_shards()
+        if not workers:
+            workers = os.cpu_count() or 1
+        workers = max(1, min(workers, len(shards)))
+        
+        self.logger.info(f"开始多进程分片捕获: {len(shards)} 个分片, {workers} 个工作进程")
+        
+        # 使用spawn启动方式，避免fork后继承事件循环和浏览器句柄
+        ctx = multiprocessing.get_context("spawn")
+        task_queue = ctx.Queue()
+        result_queue = ctx.Queue()
+        
+        for shard in shards:
+            task_queue.put(shard)
+        for _ in range(workers):
+            task_queue.put(None)
+        
+        processes = []
+        for worker_id in range(workers):
+            process = ctx.Process(
+                target=_shard_worker_main,
+                args=(worker_id, self.timestamp, task_queue, result_queue, self.log_rate, self.block),
+                daemon=True,
+            )
+            process.start()
+            processes.append(process)
+        
+        loop = asyncio.get_running_loop()
+        seen = set()
+        finished = set()
+        completed = set()
+        get_result = functools.partial(result_queue.get, timeout=RESULT_POLL_TIMEOUT)
+        while len(finished) < workers:
+            try:
+                kind, worker_id, payload = await loop.run_in_executor(None, get_result)
+            except queue.Empty:
+                for worker_id, process in enumerate(processes):
+                    if worker_id in finished or process.is_alive():
+                        continue
+                    finished.add(worker_id)
+                    self.logger.error(f"工作进程 {worker_id} 异常退出 (退出代码: {process.exitcode})")
+                continue
+            
+            if kind == "done":
+                finished.add(worker_id)
+                self.logger.info(f"工作进程 {worker_id} 已完成")
+                continue
+            
+            completed.add(tuple(payload["shard"]))
+            records = payload["records"]
+            # 工作进程已在捕获时内联校验，合并其漂移报告，save_results 中 commit() 时一并输出
+            if payload["drift"]:
+                self.schema_monitor.merge_drift(payload["drift"])
+                for line in summarize(payload["drift"]):
+                    self.logger.warning(f"工作进程 {worker_id} 检测到结构漂移 {line}")
+            merged = 0
+            for request_info in records:
+                key = (request_info.get("page_url"), request_info.get("method"), request_info.get("url"))
+                if key in seen:
+                    continue
+                seen.add(key)
+                self._record_request(request_info)
+                merged += 1
+            self.logger.info(f"合并工作进程 {worker_id} 的 {merged}/{len(records)} 条记录")
+        
+        for process in processes:
+            process.join()
+        
+        # 工作进程异常退出时正在执行的分片，以及所有工作进程都退出后队列中剩余的分片
+        failed_shards = [shard for shard in shards if shard not in completed]
+        for url, version_key in failed_shards:
+            self.logger.error(f"分片 {url} [{version_key}] 执行失败")
+        if failed_shards:
+            self.logger.error(f"{len(failed_shards)}/{len(shards)} 个分片执行失败")
+        
+        await self.save_results()
+        self.logger.info("多进程分片捕获完成!")
+
     async def run(self):
         """
         功能: 主运行函数
@@ -561,41 +852,22 @@ fetch("{url}", {options_str})
             browser = await p.chromium.launch(headless=False)
             context = await browser.new_context()
             
+            # 拦截不需要的资源
+            if self.block_filter:
+                await context.route("**/*", self._route_request)
+            
             # 创建页面
             page = await context.new_page()
             
             # 监听网络请求
-            page.on("response", self.capture_response)
+            page.on("response", self._on_response)
             
             # 访问每个URL
             for url in self.urls_to_visit:
-                self.logger.info(f"访问页面: {url}")
-                # 设置当前页面URL以便在捕获响应时使用
-                self.current_page_url = url
-                
-                await page.goto(url, wait_until="networkidle")
-                
-                # 等待页面加载
-                await page.wait_for_load_state("networkidle")
-                
-                # 等待一些额外的时间确保所有请求都被捕获
-                await asyncio.sleep(2)
-                
-                # 尝试点击模式选择器(如果有)
-                for version_key, version_info in self.version_config.items():
-                    selector = version_info.get("selector")
-                    if selector:
-                        try:
-                            self.logger.info(f"尝试切换到版本: {version_info['name']} (选择器: {selector})")
-                            await page.click(selector)
-                            await page.wait_for_load_state("networkidle")
-                            await asyncio.sleep(2)
-                            
-                            # 设置当前版本
-                            self.current_version = version_key
-                            self.logger.info(f"成功切换到版本: {version_info['name']}")
-                        except Exception as e:
-                            self.logger.error(f"点击选择器 {selector} 失败: {str(e)}")
+                await self._visit_page(page, url, list(self.version_config.keys()))
+            
+            # 等待仍在读取响应体的捕获任务
+            await self._drain_captures()
             
             # 保存结果
             await self.save_results()
@@ -606,20 +878,59 @@ fetch("{url}", {options_str})
             self.logger.info("API捕获完成!")
 
 
+def _shard_worker_main(worker_id, timestamp, task_queue, result_queue, log_rate=None, block=None):
+    """
+    功能: 分片工作进程入口(需为模块级函数以便spawn方式启动)
+    """
+    api_capture = APICapture(timestamp=timestamp, worker_id=worker_id, log_rate=log_rate, block=block)
+    try:
+        asyncio.run(api_capture.run_shard_worker(task_queue, result_queue))
+    except Exception as e:
+        api_capture.logger.error(f"工作进程 {worker_id} 异常退出: {str(e)}")
+    finally:
+        # 无论成功与否都通知协调进程，避免其无限等待
+        result_queue.put(("done", worker_id, None))
+        # 子进程退出时不执行atexit，需手动刷新队列日志
+        LogManager.stop_queue_logging()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="使用Playwright监听网络请求并提取API信息")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="多进程分片捕获的工作进程数量，0 表示单进程模式 (默认: 0)")
+    parser.add_argument("--compress", choices=["gzip", "zstd"], default=None,
+                        help="压缩保存捕获结果 (默认: 不压缩)")
+    parser.add_argument("--compress-level", type=int, default=None,
+                        help="压缩级别 (默认: gzip 9 / zstd 3)")
+    parser.add_argument("--log-rate", type=float, default=None,
+                        help="逐请求日志每秒最多条数，超出部分只计数 (默认: 不限流)")
+    parser.add_argument("--block", default=None,
+                        help='拦截的请求过滤表达式，如 "type:image,font,media" (默认: 不拦截)')
+    parser.add_argument("--archive", action="store_true",
+                        help="所有请求以带偏移索引的 .jsonl 归档代替 all_api_requests_*.json 保存 (默认: JSON)")
+    return parser.parse_args()
+
+
 async def main():
     """
     功能: 主函数
     
     步骤:
     1. 创建APICapture实例: 初始化API捕获器
-    2. 运行捕获过程: 启动监听和数据提取
+    2. 运行捕获过程: 启动监听和数据提取(可选多进程分片模式)
     
     注意事项:
     - 确保已安装所有依赖: playwright, aiofiles等
     - 首次运行需安装浏览器: playwright install chromium
     """
-    api_capture = APICapture()
-    await api_capture.run()
+    args = parse_args()
+    if args.compress:
+        FileManager.configure_compression(args.compress, args.compress_level)
+    api_capture = APICapture(log_rate=args.log_rate, block=args.block, archive=args.archive)
+    if args.workers:
+        await api_capture.run_sharded(args.workers)
+    else:
+        await api_capture.run()
 
 
 if __name__ == "__main__":
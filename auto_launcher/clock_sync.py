@@ -0,0 +1,535 @@
+"""
+服务器时钟偏移估计 (NTP风格的多次采样)
+
+功能说明：
+1. HTTP Date 头只有秒级精度，单次读取误差最大可达1秒
+2. 每次HEAD请求用 perf_counter 记录发送/接收时刻，以往返中点(RTT/2修正)作为服务器打时间戳的时刻
+3. 通过二分安排请求时刻，使请求正好落在服务器时间的整秒边界附近，
+   根据 Date 头是否已跳到下一秒不断缩小偏移区间，几次采样即可达到几十毫秒以内
+4. 多轮独立估计取中位数，并给出不确定度与可信度
+5. estimate_first 并发探测多个校时来源(如代理与直连)，最先成功的结果胜出
+6. ClockDriftModel 缓存历次校时结果并线性拟合时钟漂移，
+   只有预测误差的增长超过阈值时才需要重新校时
+
+使用方法：
+python clock_sync.py [--url URL] [--proxy 127.0.0.1:7890] [--rounds 3]
+python clock_sync.py --race [--url URL ...]    # 代理与直连并发探测，取最先成功的结果
+python clock_sync.py --verify --skew 2.345 --delay 0.04    # 用已知偏移的本地替身服务器验证精度
+"""
+
+import argparse
+import http.client
+import json
+import math
+import os
+import queue
+import statistics
+import sys
+import threading
+import time
+from email.utils import formatdate, mktime_tz, parsedate_tz
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+# 默认校时服务器
+DEFAULT_TIME_URL = "https://www.hongkongdisneyland.com"
+
+# 默认代理
+DEFAULT_PROXY = "127.0.0.1:7890"
+
+# 可信度阈值(秒): 偏移误差上限低于该值时分别为 高/中，否则为 低
+CONFIDENCE_LEVELS = ((0.05, "高"), (0.1, "中"))
+
+# 计划发送时刻前多久从sleep切换为忙等
+SPIN_THRESHOLD = 0.002
+
+# 并发探测时单次请求的超时时间(秒)
+RACE_TIMEOUT = 5
+
+# 尚未拟合出漂移率时假定的最大时钟漂移(秒/秒)，普通晶振约 ±50ppm
+DEFAULT_DRIFT_BOUND = 50e-6
+
+# 漂移率不确定度的下限(秒/秒)
+MIN_DRIFT_BOUND = 1e-6
+
+# 拟合漂移所需的最短时间跨度(秒)，跨度过短时测量误差会被放大成巨大的漂移率
+MIN_FIT_SPAN = 600
+
+# 漂移模型保留的最多校时记录数与最长时间(秒)
+MAX_DRIFT_SAMPLES = 20
+DRIFT_MAX_AGE = 24 * 3600
+
+
+class LocalClock:
+    """以 perf_counter 为基准的本地墙上时间，测量过程中不受系统时间调整影响"""
+
+    def __init__(self):
+        self.wall0 = time.time()
+        self.perf0 = time.perf_counter()
+
+    def at(self, perf: float) -> float:
+        """perf_counter 读数对应的本地 Unix 时间"""
+        return self.wall0 + (perf - self.perf0)
+
+    def perf_of(self, wall: float) -> float:
+        """本地 Unix 时间对应的 perf_counter 读数"""
+        return self.perf0 + (wall - self.wall0)
+
+    def now(self) -> float:
+        return self.at(time.perf_counter())
+
+
+class ClockSample(NamedTuple):
+    """一次HEAD采样"""
+    send: float   # 发送时刻 (perf_counter)
+    recv: float   # 收到响应头时刻 (perf_counter)
+    date: int     # 服务器 Date 头 (Unix秒，向下取整)
+
+    @property
+    def rtt(self) -> float:
+        return self.recv - self.send
+
+
+def parse_http_date(value: Optional[str]) -> Optional[int]:
+    """解析 HTTP Date 头为 Unix 秒"""
+    parsed = parsedate_tz(value) if value else None
+    return mktime_tz(parsed) if parsed else None
+
+
+def wait_until_perf(target: float) -> None:
+    """等待到指定的 perf_counter 时刻: 先sleep，最后几毫秒忙等"""
+    while True:
+        remaining = target - time.perf_counter()
+        if remaining <= 0:
+            return
+        if remaining > SPIN_THRESHOLD:
+            time.sleep(remaining - SPIN_THRESHOLD)
+
+
+class DateProbe:
+    """
+    基于长连接的 HEAD 探测器
+
+    说明:
+    - 使用 http.client 保持连接，TCP/TLS 握手不计入往返时间
+    - 支持 HTTP 代理 (HTTPS 目标通过 CONNECT 隧道)
+    """
+
+    def __init__(self, url: str = DEFAULT_TIME_URL, proxy: Optional[str] = None, timeout: float = 5):
+        parts = urlsplit(url)
+        self.https = parts.scheme == "https"
+        self.host = parts.hostname
+        self.port = parts.port or (443 if self.https else 80)
+        self.path = parts.path or "/"
+        self.url = url
+        self.proxy = proxy.split("://", 1)[-1] if proxy else None
+        self.timeout = timeout
+        self._connection: Optional[http.client.HTTPConnection] = None
+
+    def _connect(self) -> http.client.HTTPConnection:
+        connection_class = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        if self.proxy:
+            proxy_host, _, proxy_port = self.proxy.partition(":")
+            connection = connection_class(proxy_host, int(proxy_port or 80), timeout=self.timeout)
+            connection.set_tunnel(self.host, self.port)
+        else:
+            connection = connection_class(self.host, self.port, timeout=self.timeout)
+        connection.connect()
+        return connection
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def sample(self) -> ClockSample:
+        """
+        发送一次HEAD请求
+
+        Returns:
+            ClockSample: 发送/接收时刻与服务器 Date
+
+        Raises:
+            OSError / http.client.HTTPException / ValueError: 请求失败或没有 Date 头
+        """
+        if self._connection is None:
+            self._connection = self._connect()
+        connection = self._connection
+        try:
+            send = time.perf_counter()
+            connection.request("HEAD", self.path, headers={"Cache-Control": "no-cache"})
+            response = connection.getresponse()
+            recv = time.perf_counter()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            self.close()
+            raise
+
+        if response.getheader("Connection", "").lower() == "close":
+            self.close()
+        date = parse_http_date(response.getheader("Date"))
+        if date is None:
+            raise ValueError(f"{self.url} 的响应没有有效的 Date 头")
+        return ClockSample(send, recv, date)
+
+
+class ClockOffsetEstimator:
+    """
+    服务器时钟偏移估计器
+
+    偏移定义: 服务器时间 = 本地时间 + offset
+
+    原理:
+    - 一次采样的往返中点本地时间为 M，Date 为 D，则 offset ∈ [D - M, D + 1 - M)
+    - 已知区间 [lo, hi) 时，把下一次请求的中点安排在 M = k - (lo + hi) / 2 (k 为服务器整秒)，
+      根据返回的 Date 是 k-1 还是 k，区间减半
+    - 每轮从一次普通采样开始二分，区间宽度低于 resolution 或达到 max_probes 时结束
+    - 多轮结果取中位数作为最终偏移
+    """
+
+    def __init__(self, url: str = DEFAULT_TIME_URL, proxy: Optional[str] = None, timeout: float = 5,
+                 rounds: int = 3, max_probes: int = 7, resolution: float = 0.01):
+        self.probe = DateProbe(url, proxy, timeout)
+        self.rounds = rounds
+        self.max_probes = max_probes
+        self.resolution = resolution
+        self.clock = LocalClock()
+        self.samples: List[ClockSample] = []
+
+    def sample(self) -> ClockSample:
+        sample = self.probe.sample()
+        self.samples.append(sample)
+        return sample
+
+    def interval(self, sample: ClockSample) -> Tuple[float, float]:
+        """单次采样给出的偏移区间(以往返中点作为服务器打时间戳的时刻)"""
+        midpoint = self.clock.at((sample.send + sample.recv) / 2)
+        return sample.date - midpoint, sample.date + 1 - midpoint
+
+    def _round(self) -> Dict:
+        """一轮二分估计"""
+        first = self.sample()
+        lo, hi = self.interval(first)
+        rtts = [first.rtt]
+        probes = 1
+        while hi - lo > self.resolution and probes < self.max_probes:
+            center = (lo + hi) / 2
+            rtt = statistics.median(rtts)
+            # 下一个足够远的服务器整秒，保证来得及在计划时刻发出请求
+            boundary = math.floor(self.clock.now() + center + rtt / 2 + 0.05) + 1
+            wait_until_perf(self.clock.perf_of(boundary - center - rtt / 2))
+
+            sample = self.sample()
+            probes += 1
+            rtts.append(sample.rtt)
+            new_lo, new_hi = self.interval(sample)
+            if new_hi <= lo or new_lo >= hi:
+                # 与已有区间矛盾(网络抖动或服务器延迟打时间戳)，以新采样重新开始
+                lo, hi = new_lo, new_hi
+            else:
+                lo, hi = max(lo, new_lo), min(hi, new_hi)
+
+        return {"offset": (lo + hi) / 2, "width": hi - lo, "rtt": statistics.median(rtts), "probes": probes}
+
+    def estimate(self) -> Dict:
+        """
+        多轮估计时钟偏移
+
+        Returns:
+            Dict: {
+                "offset": 偏移(秒)，服务器时间 = 本地时间 + offset,
+                "uncertainty": 估计误差上限(秒)，含区间半宽、轮间离散度与 RTT/2 不对称误差,
+                "confidence": "高"/"中"/"低",
+                "rtt_min" / "rtt_median": 往返时间(秒),
+                "spread": 各轮结果的极差(秒),
+                "rounds": 每轮的结果,
+                "samples": 采样总数,
+                "url": 校时地址,
+            }
+
+        Raises:
+            OSError / http.client.HTTPException / ValueError: 所有轮次都失败时抛出最后一个错误
+        """
+        # 预热: 建立连接，第一次请求不计入
+        self.probe.sample()
+        self.samples = []
+
+        results = []
+        error: Optional[Exception] = None
+        for _ in range(self.rounds):
+            try:
+                results.append(self._round())
+            except (OSError, http.client.HTTPException, ValueError) as e:
+                error = e
+        self.probe.close()
+        if not results:
+            raise error
+
+        offsets = [result["offset"] for result in results]
+        offset = statistics.median(offsets)
+        rtts = [sample.rtt for sample in self.samples]
+        spread = max(offsets) - min(offsets)
+        deviation = statistics.median(abs(value - offset) for value in offsets)
+        width = statistics.median(result["width"] for result in results)
+        # 往返不对称时中点假设的误差最大为 RTT/2，取最快一次往返作为该误差的估计
+        uncertainty = max(width / 2, deviation) + min(rtts) / 2
+
+        confidence = "低"
+        for threshold, level in CONFIDENCE_LEVELS:
+            if uncertainty < threshold:
+                confidence = level
+                break
+
+        return {
+            "offset": offset,
+            "uncertainty": uncertainty,
+            "confidence": confidence,
+            "rtt_min": min(rtts),
+            "rtt_median": statistics.median(rtts),
+            "spread": spread,
+            "rounds": results,
+            "samples": len(self.samples),
+            "url": self.probe.url,
+        }
+
+
+def estimate_offset(url: str = DEFAULT_TIME_URL, proxy: Optional[str] = None, timeout: float = 5,
+                    rounds: int = 3) -> Dict:
+    """便捷函数，见 ClockOffsetEstimator.estimate"""
+    return ClockOffsetEstimator(url, proxy, timeout, rounds).estimate()
+
+
+def default_sources(urls: Iterable[str] = (DEFAULT_TIME_URL,),
+                    proxy: Optional[str] = DEFAULT_PROXY) -> List[Tuple[str, Optional[str]]]:
+    """每个校时地址分别经代理与直连探测"""
+    return [(url, route) for url in urls for route in ((proxy, None) if proxy else (None,))]
+
+
+def estimate_first(sources: Sequence[Tuple[str, Optional[str]]], timeout: float = RACE_TIMEOUT,
+                   rounds: int = 3) -> Dict:
+    """
+    并发估计多个校时来源，返回最先成功的结果
+
+    说明:
+    - 每个来源在独立的守护线程中估计，先完成的胜出，其余线程不再等待
+    - 失败的来源不影响其他来源，全部失败时抛出最后一个错误
+
+    Args:
+        sources: [(校时地址, 代理或None), ...]
+        timeout: 单次请求超时时间(秒)
+        rounds: 每个来源的估计轮数
+
+    Returns:
+        Dict: estimate() 的报告，附加 "proxy" 表示胜出来源使用的代理
+
+    Raises:
+        OSError / http.client.HTTPException / ValueError: 所有来源都失败
+    """
+    results: "queue.Queue[Tuple[Optional[Dict], Optional[Exception]]]" = queue.Queue()
+
+    def run(url: str, proxy: Optional[str]):
+        try:
+            report = ClockOffsetEstimator(url, proxy, timeout, rounds).estimate()
+            report["proxy"] = proxy
+            results.put((report, None))
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            results.put((None, e))
+
+    for url, proxy in sources:
+        threading.Thread(target=run, args=(url, proxy), daemon=True, name="clock-sync").start()
+
+    error: Optional[Exception] = None
+    for _ in sources:
+        report, error = results.get()
+        if report is not None:
+            return report
+    raise error or ValueError("没有可用的校时来源")
+
+
+class ClockDriftModel:
+    """
+    缓存的时钟偏移与线性漂移模型
+
+    说明:
+    - 记录每次校时的 (本地时间, 偏移, 误差上限)
+    - 记录的时间跨度足够长时，用最小二乘拟合 偏移 = a + b * 本地时间，b 为漂移率；
+      否则以最近一次的偏移为准，并假定漂移率不超过 DEFAULT_DRIFT_BOUND
+    - 预测误差 = 最近一次校时的误差上限 + 自那以后按漂移率不确定度累积的误差
+    """
+
+    def __init__(self, samples: Optional[List[Tuple[float, float, float]]] = None):
+        self.samples: List[Tuple[float, float, float]] = list(samples or [])
+
+    def add(self, report: Dict, at: Optional[float] = None) -> None:
+        """加入一次校时结果(estimate() 的报告)，at 为校时时的本地时间，默认为当前时间"""
+        self.samples.append((time.time() if at is None else at, report["offset"], report["uncertainty"]))
+        self.samples = self.samples[-MAX_DRIFT_SAMPLES:]
+
+    def _fit(self) -> Optional[Tuple[float, float, float, float]]:
+        """拟合漂移，返回 (时间均值, 偏移均值, 漂移率, 漂移率标准误差)；记录不足时返回None"""
+        if len(self.samples) < 3:
+            return None
+        times = [t for t, _, _ in self.samples]
+        if max(times) - min(times) < MIN_FIT_SPAN:
+            return None
+        offsets = [o for _, o, _ in self.samples]
+        t_mean = statistics.fmean(times)
+        o_mean = statistics.fmean(offsets)
+        sxx = sum((t - t_mean) ** 2 for t in times)
+        slope = sum((t - t_mean) * (o - o_mean) for t, o in zip(times, offsets)) / sxx
+        residual = sum((o - o_mean - slope * (t - t_mean)) ** 2 for t, o in zip(times, offsets))
+        return t_mean, o_mean, slope, math.sqrt(residual / (len(times) - 2) / sxx)
+
+    @property
+    def drift_rate(self) -> float:
+        """拟合出的漂移率(秒/秒)，未拟合时为0"""
+        fit = self._fit()
+        return fit[2] if fit else 0.0
+
+    def predict(self, at: Optional[float] = None) -> float:
+        """预测本地时间 at (默认当前) 的时钟偏移"""
+        if not self.samples:
+            raise ValueError("没有校时记录")
+        at = time.time() if at is None else at
+        fit = self._fit()
+        if fit is None:
+            return self.samples[-1][1]
+        t_mean, o_mean, slope, _ = fit
+        return o_mean + slope * (at - t_mean)
+
+    def drift_error(self, at: Optional[float] = None) -> float:
+        """自最近一次校时以来，因漂移估计不准累积的预测误差(秒)"""
+        if not self.samples:
+            return math.inf
+        at = time.time() if at is None else at
+        fit = self._fit()
+        bound = max(fit[3], MIN_DRIFT_BOUND) if fit else DEFAULT_DRIFT_BOUND
+        return abs(at - self.samples[-1][0]) * bound
+
+    def predicted_error(self, at: Optional[float] = None) -> float:
+        """预测偏移的误差上限(秒)"""
+        return self.samples[-1][2] + self.drift_error(at) if self.samples else math.inf
+
+    def needs_resync(self, threshold: float, at: Optional[float] = None) -> bool:
+        """
+        是否需要重新校时
+
+        Args:
+            threshold: 自上次校时以来允许累积的预测误差(秒)
+            at: 需要使用偏移的本地时间，默认为当前时间
+        """
+        return self.drift_error(at) > threshold
+
+    @classmethod
+    def load(cls, path: str, max_age: float = DRIFT_MAX_AGE) -> "ClockDriftModel":
+        """加载缓存，丢弃超过 max_age 的记录；文件不存在或损坏时返回空模型"""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                samples = [tuple(sample) for sample in json.load(f).get("samples", [])]
+        except (OSError, ValueError, TypeError):
+            return cls()
+        now = time.time()
+        return cls([sample for sample in samples if 0 <= now - sample[0] <= max_age])
+
+    def save(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"samples": self.samples}, f)
+
+
+def format_report(report: Dict) -> str:
+    """生成单行的偏移报告"""
+    return (f"时钟偏移 {report['offset'] * 1000:+.1f} ms (±{report['uncertainty'] * 1000:.1f} ms, "
+            f"可信度{report['confidence']}) - RTT 最小 {report['rtt_min'] * 1000:.1f} ms / "
+            f"中位数 {report['rtt_median'] * 1000:.1f} ms - {report['samples']} 次采样, "
+            f"轮间极差 {report['spread'] * 1000:.1f} ms")
+
+
+def start_standin_server(skew: float, delay: float = 0.0, port: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    启动时钟偏移已知的本地替身服务器
+
+    Args:
+        skew: 替身服务器时间比本地快多少秒
+        delay: 模拟的网络往返延迟(秒)，在打时间戳前后各等待一半
+        port: 端口，0 表示自动分配
+
+    Returns:
+        (服务器对象, 地址)
+    """
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_HEAD(self):
+            if delay:
+                time.sleep(delay / 2)
+            stamp = time.time() + skew
+            if delay:
+                time.sleep(delay / 2)
+            self.send_response_only(200)
+            self.send_header("Date", formatdate(stamp, usegmt=True))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+def verify(skew: float, delay: float = 0.0, rounds: int = 3) -> Dict:
+    """
+    用替身服务器验证估计精度
+
+    Returns:
+        Dict: estimate() 的报告，附加 "skew" 与 "error"(估计值 - 真实偏移)
+    """
+    server, url = start_standin_server(skew, delay)
+    try:
+        report = ClockOffsetEstimator(url, rounds=rounds).estimate()
+    finally:
+        server.shutdown()
+        server.server_close()
+    report["skew"] = skew
+    report["error"] = report["offset"] - skew
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="多次采样估计服务器时钟偏移")
+    parser.add_argument("--url", action="append", default=None, help=f"校时地址，--race 时可重复指定 (默认: {DEFAULT_TIME_URL})")
+    parser.add_argument("--proxy", default=None, help=f"HTTP代理，如 {DEFAULT_PROXY}")
+    parser.add_argument("--race", action="store_true", help="各地址分别经代理与直连并发探测，取最先成功的结果")
+    parser.add_argument("--rounds", type=int, default=3, help="估计轮数 (默认: 3)")
+    parser.add_argument("--verify", action="store_true", help="使用本地替身服务器验证精度")
+    parser.add_argument("--skew", type=float, default=2.345, help="替身服务器的时钟偏移(秒) (默认: 2.345)")
+    parser.add_argument("--delay", type=float, default=0.04, help="替身服务器模拟的往返延迟(秒) (默认: 0.04)")
+    args = parser.parse_args(argv)
+
+    if args.verify:
+        report = verify(args.skew, args.delay, args.rounds)
+        print(format_report(report))
+        print(f"真实偏移 {report['skew'] * 1000:+.1f} ms, 估计误差 {report['error'] * 1000:+.1f} ms")
+        return 0 if abs(report["error"]) <= report["uncertainty"] else 1
+
+    urls = args.url or [DEFAULT_TIME_URL]
+    try:
+        if args.race:
+            report = estimate_first(default_sources(urls, args.proxy or DEFAULT_PROXY), rounds=args.rounds)
+            print(f"胜出来源: {report['url']} ({'代理 ' + report['proxy'] if report['proxy'] else '直连'})")
+        else:
+            report = ClockOffsetEstimator(urls[0], args.proxy, rounds=args.rounds).estimate()
+    except (OSError, http.client.HTTPException, ValueError) as e:
+        print(f"估计时钟偏移失败: {e}")
+        return 1
+    print(format_report(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
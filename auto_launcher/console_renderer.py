@@ -0,0 +1,135 @@
+"""
+多实例输出的批量、限速控制台渲染器
+
+功能说明：
+1. 按帧合并输出: 输出行先进入缓冲，每帧(默认50ms)拼接成一次 write + flush，而不是每行一次 print
+2. 折叠重复行: 同一实例连续输出的相同内容只显示一次，并标注 "(×N)"
+3. 限速: 每秒显示的行数超过上限后不再逐行显示，改为每秒输出各实例的省略行数汇总
+4. 所有原始输出行(包括被折叠、被省略的)都交给 log 回调完整写入日志文件
+
+使用方法：
+renderer = ConsoleRenderer(log=lambda instance_id, line: ...)
+renderer.add(0, "hello")
+renderer.render()              # 在显示循环中反复调用，未到下一帧时不输出
+renderer.render(force=True)    # 结束前输出剩余内容与省略汇总
+"""
+
+import sys
+import time
+from typing import Callable, Dict, List, Optional, TextIO
+
+# 每帧间隔(秒)
+DEFAULT_FRAME_INTERVAL = 0.05
+
+# 每秒最多显示的行数(折叠后)
+DEFAULT_RATE_CAP = 200
+
+
+class ConsoleRenderer:
+    """批量、限速的控制台渲染器"""
+
+    def __init__(self, stream: Optional[TextIO] = None, frame_interval: float = DEFAULT_FRAME_INTERVAL,
+                 rate_cap: int = DEFAULT_RATE_CAP, colors: Optional[List[str]] = None, reset: str = "",
+                 log: Optional[Callable[[int, str], None]] = None):
+        """
+        Args:
+            stream: 输出流，默认 sys.stdout
+            frame_interval: 每帧间隔(秒)
+            rate_cap: 每秒最多显示的行数，0 表示不限速
+            colors: 各实例的颜色前缀，按实例编号循环使用
+            reset: 颜色重置后缀
+            log: 每个原始输出行都会调用 log(实例编号, 文本行)
+        """
+        self.stream = stream or sys.stdout
+        self.frame_interval = frame_interval
+        self.rate_cap = rate_cap
+        self.colors = colors or [""]
+        self.reset = reset
+        self.log = log
+        # 行数统计: 总行数 = 逐行显示 + 折叠 + 限速省略
+        self.total_lines = 0
+        self.shown_lines = 0
+        self.collapsed_lines = 0
+        self.suppressed_lines = 0
+        # 显示的省略汇总行数
+        self.summary_lines = 0
+        self._entries: List[list] = []
+        self._last_entry: Dict[int, list] = {}
+        self._suppressed: Dict[int, int] = {}
+        self._last_frame = time.monotonic()
+        self._window_start = self._last_frame
+        self._window_lines = 0
+
+    def add(self, instance_id: int, line: str):
+        """加入一行输出，与该实例上一行相同时只累加次数"""
+        self.total_lines += 1
+        if self.log:
+            self.log(instance_id, line)
+        entry = self._last_entry.get(instance_id)
+        if entry is not None and entry[1] == line:
+            entry[2] += 1
+            return
+        entry = [instance_id, line, 1]
+        self._entries.append(entry)
+        self._last_entry[instance_id] = entry
+
+    def next_frame_in(self) -> Optional[float]:
+        """距下一帧的秒数，没有待显示内容时返回None"""
+        if not self._entries and not self._suppressed:
+            return None
+        return max(0.0, self._last_frame + self.frame_interval - time.monotonic())
+
+    def render(self, force: bool = False) -> int:
+        """
+        输出一帧
+
+        Args:
+            force: 忽略帧间隔立即输出，并输出当前的省略汇总
+
+        Returns:
+            int: 本帧写入控制台的行数(含省略汇总)
+        """
+        now = time.monotonic()
+        if not force and now - self._last_frame < self.frame_interval:
+            return 0
+        self._last_frame = now
+
+        parts = []
+        if force or now - self._window_start >= 1.0:
+            parts.extend(self._summaries(now))
+            self._window_start = now
+            self._window_lines = 0
+
+        for instance_id, line, count in self._entries:
+            if self.rate_cap and self._window_lines >= self.rate_cap:
+                self._suppressed[instance_id] = self._suppressed.get(instance_id, 0) + count
+                self.suppressed_lines += count
+                continue
+            self._window_lines += 1
+            self.shown_lines += 1
+            self.collapsed_lines += count - 1
+            parts.append(self._format(instance_id, line if count == 1 else f"{line} (×{count})"))
+        self._entries.clear()
+        self._last_entry.clear()
+
+        if force:
+            parts.extend(self._summaries(now))
+        if parts:
+            self.stream.write("".join(parts))
+            self.stream.flush()
+        return len(parts)
+
+    def _summaries(self, now: float) -> List[str]:
+        """各实例在当前限速窗口内被省略的行数"""
+        window = max(now - self._window_start, 0.001)
+        lines = [
+            self._format(instance_id, f"输出过快，{window:.1f}秒内省略 {count} 行 (完整内容见日志)")
+            for instance_id, count in sorted(self._suppressed.items())
+        ]
+        self._suppressed.clear()
+        self.summary_lines += len(lines)
+        return lines
+
+    def _format(self, instance_id: int, text: str) -> str:
+        color = self.colors[instance_id % len(self.colors)]
+        return f"{color}[实例 #{instance_id + 1}] {text}{self.reset}\n"
@@ -0,0 +1,302 @@
+"""
+实例的CPU核心放置与启动窗口优先级
+
+功能说明：
+1. 按轮询方式把实例依次绑定到可用的CPU核心(psutil.Process.cpu_affinity，没有psutil时用 os.sched_setaffinity)
+2. 保留一个核心给启动器自身(倒计时、输出汇集与控制台渲染)，实例不会被分配到该核心；
+   只有一个可用核心时不保留
+3. 可选在启动窗口内提高实例(与启动器)的优先级，窗口结束后恢复原优先级；
+   启动窗口由调用方在目标时刻(实例启动或预创建实例放行时)调用 begin_boost() 开始，
+   之前创建的实例与启动器都以原优先级运行
+   - Windows: 高于正常(ABOVE_NORMAL_PRIORITY_CLASS)
+   - Linux/macOS: nice 值减 5，需要root或CAP_SYS_NICE权限，没有权限时给出一次警告
+4. 定期采样各实例的CPU占用、实际运行的核心与被动上下文切换次数，结束时汇总，用于观察放置效果
+5. 不支持设置亲和性的平台(如macOS)只做优先级与统计
+
+使用方法：
+placement = PlacementPolicy(boost=True)
+placement.apply_launcher()
+placement.begin_boost()    # 目标时刻
+placement.place(0, process.pid)
+while running:
+    placement.tick()    # 启动窗口结束后恢复优先级，并按间隔采样
+print(format_report(placement.report()))
+"""
+
+import os
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+# 默认提高优先级的时长(秒)，从 begin_boost() 开始计算
+DEFAULT_BOOST_WINDOW = 10.0
+
+# 默认采样间隔(秒)
+DEFAULT_SAMPLE_INTERVAL = 1.0
+
+# Linux/macOS 提高优先级时 nice 值的减少量
+BOOST_NICE_DELTA = 5
+
+
+def available_cores() -> List[int]:
+    """当前进程允许使用的CPU核心编号"""
+    if PSUTIL_AVAILABLE:
+        try:
+            return sorted(psutil.Process().cpu_affinity())
+        except (AttributeError, psutil.Error):
+            pass
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def set_affinity(pid: int, cores: List[int]) -> bool:
+    """
+    把进程绑定到指定核心
+
+    Returns:
+        bool: 是否设置成功，平台不支持时返回False
+    """
+    if PSUTIL_AVAILABLE:
+        try:
+            psutil.Process(pid).cpu_affinity(cores)
+            return True
+        except (AttributeError, psutil.Error):
+            return False
+    if hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(pid, cores)
+            return True
+        except OSError:
+            return False
+    return False
+
+
+class _InstanceStats:
+    """单个实例的CPU统计(跨重启累计)"""
+
+    def __init__(self, instance_id: int, core: Optional[int]):
+        self.instance_id = instance_id
+        self.core = core
+        self.pid = 0
+        self.process = None
+        self.samples = 0
+        self.cpu_sum = 0.0
+        self.cpu_max = 0.0
+        self.ran_on: set = set()
+        self.cpu_time = 0.0
+        self.involuntary = 0
+        self._last_cpu_time = 0.0
+        self._last_involuntary = 0
+
+    def attach(self, pid: int):
+        """实例(重新)启动：新进程的计数从0开始"""
+        self.pid = pid
+        self.process = None
+        self._last_cpu_time = 0.0
+        self._last_involuntary = 0
+        if PSUTIL_AVAILABLE:
+            try:
+                self.process = psutil.Process(pid)
+                # 第一次调用只建立基准
+                self.process.cpu_percent(None)
+            except psutil.Error:
+                self.process = None
+
+    def sample(self):
+        if self.process is None:
+            return
+        try:
+            with self.process.oneshot():
+                percent = self.process.cpu_percent(None)
+                times = self.process.cpu_times()
+                switches = self.process.num_ctx_switches()
+                core = self.process.cpu_num() if hasattr(self.process, "cpu_num") else None
+        except psutil.Error:
+            # 进程已退出，保留最后一次采样的结果
+            self.process = None
+            return
+        self.samples += 1
+        self.cpu_sum += percent
+        self.cpu_max = max(self.cpu_max, percent)
+        if core is not None:
+            self.ran_on.add(core)
+        cpu_time = times.user + times.system
+        self.cpu_time += max(0.0, cpu_time - self._last_cpu_time)
+        self._last_cpu_time = cpu_time
+        self.involuntary += max(0, switches.involuntary - self._last_involuntary)
+        self._last_involuntary = switches.involuntary
+
+
+class PlacementPolicy:
+    """实例的核心放置、启动窗口优先级与CPU统计"""
+
+    def __init__(self, affinity: bool = True, reserve_launcher_core: bool = True, boost: bool = False,
+                 boost_window: float = DEFAULT_BOOST_WINDOW, sample_interval: float = DEFAULT_SAMPLE_INTERVAL,
+                 cores: Optional[List[int]] = None, on_warning: Optional[Callable[[str], None]] = None):
+        """
+        Args:
+            affinity: 是否把实例绑定到核心，False 时只做优先级与统计
+            reserve_launcher_core: 是否为启动器保留一个核心
+            boost: 是否在启动窗口内提高优先级
+            boost_window: 提高优先级的时长(秒)
+            sample_interval: CPU统计的采样间隔(秒)
+            cores: 可用核心，默认为当前进程允许使用的全部核心
+            on_warning: 无法设置亲和性或优先级时调用 on_warning(说明)，每类问题只调用一次
+        """
+        self.affinity = affinity
+        self.boost = boost
+        self.boost_window = boost_window
+        self.sample_interval = sample_interval
+        self.on_warning = on_warning
+        cores = cores or available_cores()
+        self.launcher_core: Optional[int] = cores[0] if reserve_launcher_core and len(cores) > 1 else None
+        self.pool = [core for core in cores if core != self.launcher_core]
+        self.stats: Dict[int, _InstanceStats] = {}
+        self._boosted: Dict[int, int] = {}
+        # 启动器提高优先级之前的优先级，实例会继承启动器的优先级，统一以它为基准
+        self._base_nice = psutil.Process().nice() if PSUTIL_AVAILABLE else None
+        self._boost_until: Optional[float] = None
+        self._last_sample = 0.0
+        self._warned: set = set()
+
+    def core_for(self, instance_id: int) -> int:
+        """实例分配到的核心(轮询)"""
+        return self.pool[instance_id % len(self.pool)]
+
+    def _warn(self, kind: str, message: str):
+        if kind in self._warned:
+            return
+        self._warned.add(kind)
+        if self.on_warning:
+            self.on_warning(message)
+
+    def apply_launcher(self):
+        """把启动器自身绑定到保留核心；启动器的优先级只在启动窗口内提高"""
+        if self.affinity and self.launcher_core is not None:
+            if not set_affinity(os.getpid(), [self.launcher_core]):
+                self._warn("affinity", "当前平台或权限不支持设置CPU亲和性，实例不会绑定核心")
+
+    def boosting(self) -> bool:
+        """当前是否处于启动窗口内"""
+        return self._boost_until is not None and time.monotonic() < self._boost_until
+
+    def begin_boost(self):
+        """在目标时刻开始启动窗口: 提高启动器与已放置实例的优先级，之后放置的实例在窗口内同样提高"""
+        if not self.boost:
+            return
+        self._boost_until = time.monotonic() + self.boost_window
+        self._raise_priority(os.getpid())
+        for stats in self.stats.values():
+            if stats.pid:
+                self._raise_priority(stats.pid)
+
+    def place(self, instance_id: int, pid: int) -> Optional[int]:
+        """
+        放置一个刚创建的实例: 绑定核心、在启动窗口内提高优先级，并开始统计
+
+        Returns:
+            Optional[int]: 分配到的核心，未绑定时为None
+        """
+        core = self.core_for(instance_id) if self.affinity else None
+        if core is not None and not set_affinity(pid, [core]):
+            self._warn("affinity", "当前平台或权限不支持设置CPU亲和性，实例不会绑定核心")
+            core = None
+
+        if self.boost and self.boosting():
+            self._raise_priority(pid)
+
+        stats = self.stats.get(instance_id)
+        if stats is None:
+            stats = self.stats[instance_id] = _InstanceStats(instance_id, core)
+        stats.core = core
+        stats.attach(pid)
+        return core
+
+    def _raise_priority(self, pid: int):
+        if not PSUTIL_AVAILABLE:
+            self._warn("priority", "未安装psutil，无法提高优先级")
+            return
+        try:
+            process = psutil.Process(pid)
+            if sys.platform == "win32":
+                process.nice(psutil.ABOVE_NORMAL_PRIORITY_CLASS)
+            else:
+                process.nice(self._base_nice - BOOST_NICE_DELTA)
+            self._boosted[pid] = self._base_nice
+        except psutil.AccessDenied:
+            self._warn("priority", "没有提高进程优先级的权限，将以默认优先级运行")
+        except psutil.Error:
+            pass
+
+    def end_boost(self):
+        """恢复所有被提高优先级的进程"""
+        for pid, original in self._boosted.items():
+            try:
+                psutil.Process(pid).nice(original)
+            except psutil.Error:
+                pass
+        self._boosted.clear()
+
+    def tick(self):
+        """启动窗口结束后恢复优先级，到采样间隔时采样CPU统计；由调用方的主循环反复调用"""
+        now = time.monotonic()
+        if self._boosted and self._boost_until is not None and now >= self._boost_until:
+            self.end_boost()
+        if now - self._last_sample >= self.sample_interval:
+            self._last_sample = now
+            self.sample()
+
+    def sample(self):
+        """立即采样所有实例"""
+        for stats in self.stats.values():
+            stats.sample()
+
+    def report(self) -> List[Dict]:
+        """
+        各实例的CPU统计
+
+        Returns:
+            List[Dict]: {"instance_id", "pid", "core": 分配的核心, "ran_on": 实际运行过的核心,
+                         "cpu_avg", "cpu_max": CPU占用(%), "cpu_time": CPU时间(秒),
+                         "involuntary_switches": 被动上下文切换次数}
+        """
+        return [{
+            "instance_id": stats.instance_id,
+            "pid": stats.pid,
+            "core": stats.core,
+            "ran_on": sorted(stats.ran_on),
+            "cpu_avg": stats.cpu_sum / stats.samples if stats.samples else 0.0,
+            "cpu_max": stats.cpu_max,
+            "cpu_time": stats.cpu_time,
+            "involuntary_switches": stats.involuntary,
+        } for stats in sorted(self.stats.values(), key=lambda s: s.instance_id)]
+
+    def describe(self) -> str:
+        """放置策略的一行说明"""
+        parts = []
+        if self.affinity:
+            parts.append(f"实例轮询分配到核心 {self.pool}")
+            if self.launcher_core is not None:
+                parts.append(f"核心 {self.launcher_core} 保留给启动器")
+        if self.boost:
+            parts.append(f"目标时刻起 {self.boost_window:.0f} 秒内提高优先级")
+        return "，".join(parts) or "不调整核心与优先级"
+
+
+def format_report_line(item: Dict) -> str:
+    core = "未绑定" if item["core"] is None else f"核心 {item['core']}"
+    ran_on = f" (运行于 {','.join(map(str, item['ran_on']))})" if item["ran_on"] else ""
+    return (f"实例 #{item['instance_id'] + 1} {core}{ran_on}: CPU 平均 {item['cpu_avg']:.1f}% / "
+            f"最高 {item['cpu_max']:.1f}%, CPU时间 {item['cpu_time']:.2f} 秒, "
+            f"被动切换 {item['involuntary_switches']} 次")
+
+
+def format_report(report: List[Dict]) -> str:
+    return "\n".join(format_report_line(item) for item in report)
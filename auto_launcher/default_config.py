@@ -33,6 +33,24 @@ DEFAULT_CONFIG = {
     # 时间显示格式（Qt格式）
     "time_format": "yyyy-MM-dd HH:mm:ss",
     
+    # 启动计划：all 同时启动 / stagger 每隔 launch_interval 秒启动一个 /
+    # waves 每波 wave_size 个、每隔 launch_interval 秒一波 / jitter 在 jitter_window 秒内随机启动
+    "launch_strategy": "stagger",
+    "launch_interval": 0.5,
+    "wave_size": 5,
+    "jitter_window": 1.0,
+    
+    # CPU放置：把实例轮询绑定到各核心，并为启动器保留一个核心
+    "cpu_affinity": False,
+    "reserve_launcher_core": True,
+    
+    # 启动后一段时间(秒)内提高实例优先级
+    "boost_priority": False,
+    "boost_window": 10,
+    
+    # 资源采样间隔(秒)，0 表示不采样
+    "telemetry_interval": 1.0,
+    
     # 日志配置
     "log_level": "INFO",
     "log_to_file": False,
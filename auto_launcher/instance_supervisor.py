@@ -0,0 +1,271 @@
+"""
+实例监管: 状态跟踪、健康检查、退避重启与并行关闭
+
+功能说明：
+1. 每个实例有明确的状态: 运行中 / 无响应 / 等待重启 / 正在停止 / 已停止 / 已放弃
+2. 健康检查:
+   - 进程存活: 进程退出后按重启策略决定是否重启
+   - 输出心跳(可选): 超过 heartbeat_timeout 秒没有任何输出视为无响应，结束后按重启策略重启
+3. 重启策略: never / on-failure(退出码非0时) / always，指数退避，超过最大重启次数后放弃；
+   稳定运行超过 stable_after 秒后重启计数清零
+4. 并行关闭: 先同时向所有实例发送终止信号，在同一个截止时间内统一等待，超时后一起强制结束，
+   关闭50个实例最多等待一个超时时间，而不是逐个等待
+
+使用方法：
+supervisor = InstanceSupervisor(spawn=lambda instance_id: subprocess.Popen(cmd), policy=RestartPolicy("on-failure"))
+supervisor.adopt(0, process)
+supervisor.mark_started()    # 预创建的实例在放行时调用
+while not supervisor.finished():
+    supervisor.check()
+    ...
+supervisor.shutdown(timeout=5)
+"""
+
+import subprocess
+import time
+from typing import Callable, Dict, List, Optional
+
+
+class InstanceState:
+    """实例状态"""
+    RUNNING = "运行中"
+    UNHEALTHY = "无响应"
+    BACKOFF = "等待重启"
+    STOPPING = "正在停止"
+    STOPPED = "已停止"
+    FAILED = "已放弃"
+
+
+# 重启策略
+RESTART_MODES = ("never", "on-failure", "always")
+
+
+class RestartPolicy:
+    """重启策略与指数退避"""
+
+    def __init__(self, mode: str = "on-failure", max_restarts: int = 5, backoff_initial: float = 1.0,
+                 backoff_factor: float = 2.0, backoff_max: float = 60.0, stable_after: float = 60.0):
+        """
+        Args:
+            mode: never / on-failure / always
+            max_restarts: 连续重启的最大次数
+            backoff_initial: 第一次重启前的等待时间(秒)
+            backoff_factor: 每次重启后等待时间的倍数
+            backoff_max: 等待时间上限(秒)
+            stable_after: 实例持续运行超过该时间(秒)后重启计数清零
+        """
+        if mode not in RESTART_MODES:
+            raise ValueError(f"未知的重启策略: {mode}")
+        self.mode = mode
+        self.max_restarts = max_restarts
+        self.backoff_initial = backoff_initial
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.stable_after = stable_after
+
+    def should_restart(self, exit_code: Optional[int], restarts: int) -> bool:
+        if self.mode == "never" or restarts >= self.max_restarts:
+            return False
+        return self.mode == "always" or exit_code != 0
+
+    def delay(self, restarts: int) -> float:
+        """第 restarts+1 次重启前的等待时间(秒)"""
+        return min(self.backoff_max, self.backoff_initial * self.backoff_factor ** restarts)
+
+
+class ManagedInstance:
+    """被监管的实例"""
+
+    def __init__(self, instance_id: int, process: subprocess.Popen):
+        self.instance_id = instance_id
+        self.process = process
+        self.state = InstanceState.RUNNING
+        self.restarts = 0
+        self.total_restarts = 0
+        self.exit_code: Optional[int] = None
+        self.started_at = time.monotonic()
+        self.last_output = self.started_at
+        self.restart_at = 0.0
+        # 因心跳超时被结束时，按失败处理
+        self.killed_unhealthy = False
+
+
+def shutdown_processes(processes: List[subprocess.Popen], timeout: float = 5.0) -> Dict[str, int]:
+    """
+    并行关闭进程: 同时发送终止信号，共用一个截止时间，超时后一起强制结束
+
+    Args:
+        processes: 要关闭的进程
+        timeout: 等待进程自行退出的总时间(秒)
+
+    Returns:
+        Dict: {"terminated": 自行退出的数量, "killed": 被强制结束的数量}
+    """
+    alive = [p for p in processes if p.poll() is None]
+    for process in alive:
+        try:
+            process.terminate()
+        except OSError:
+            pass
+
+    deadline = time.monotonic() + timeout
+    remaining = []
+    for process in alive:
+        try:
+            process.wait(timeout=max(0.0, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            remaining.append(process)
+
+    for process in remaining:
+        try:
+            process.kill()
+        except OSError:
+            pass
+    for process in remaining:
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            pass
+    return {"terminated": len(alive) - len(remaining), "killed": len(remaining)}
+
+
+class InstanceSupervisor:
+    """实例监管器，由调用方的主循环定期调用 check()"""
+
+    def __init__(self, spawn: Callable[[int], subprocess.Popen], policy: Optional[RestartPolicy] = None,
+                 heartbeat_timeout: Optional[float] = None,
+                 on_event: Optional[Callable[[int, str, bool], None]] = None):
+        """
+        Args:
+            spawn: 重启实例时调用 spawn(实例编号)，返回新进程
+            policy: 重启策略，默认 on-failure
+            heartbeat_timeout: 输出心跳超时(秒)，None 表示不检查
+            on_event: 状态变化时调用 on_event(实例编号, 说明, 是否为异常)
+        """
+        self.spawn = spawn
+        self.policy = policy or RestartPolicy()
+        self.heartbeat_timeout = heartbeat_timeout
+        self.on_event = on_event
+        self.instances: Dict[int, ManagedInstance] = {}
+        self.stopping = False
+
+    def adopt(self, instance_id: int, process: subprocess.Popen) -> ManagedInstance:
+        """接管一个已启动的实例"""
+        instance = ManagedInstance(instance_id, process)
+        self.instances[instance_id] = instance
+        return instance
+
+    def mark_started(self) -> None:
+        """预创建的实例被放行: 以放行时刻重新开始计算输出心跳与稳定运行时间"""
+        now = time.monotonic()
+        for instance in self.instances.values():
+            instance.started_at = instance.last_output = now
+
+    @property
+    def processes(self) -> List[subprocess.Popen]:
+        return [instance.process for instance in self.instances.values()]
+
+    def heartbeat(self, instance_id: int) -> None:
+        """实例产生了输出"""
+        instance = self.instances.get(instance_id)
+        if instance is None:
+            return
+        instance.last_output = time.monotonic()
+        if instance.state == InstanceState.UNHEALTHY and instance.process.poll() is None:
+            instance.state = InstanceState.RUNNING
+            self._event(instance, "恢复输出", False)
+
+    def _event(self, instance: ManagedInstance, message: str, problem: bool) -> None:
+        if self.on_event:
+            self.on_event(instance.instance_id, message, problem)
+
+    def check(self) -> None:
+        """检查所有实例的存活与心跳，执行到期的重启"""
+        now = time.monotonic()
+        for instance in self.instances.values():
+            if instance.state in (InstanceState.RUNNING, InstanceState.UNHEALTHY):
+                exit_code = instance.process.poll()
+                if exit_code is not None:
+                    self._exited(instance, exit_code, now)
+                elif (self.heartbeat_timeout and instance.state == InstanceState.RUNNING
+                      and now - instance.last_output > self.heartbeat_timeout):
+                    instance.state = InstanceState.UNHEALTHY
+                    self._event(instance, f"{self.heartbeat_timeout:.0f} 秒没有输出，视为无响应", True)
+                    if self.policy.mode != "never":
+                        instance.killed_unhealthy = True
+                        instance.process.kill()
+            elif instance.state == InstanceState.BACKOFF and now >= instance.restart_at and not self.stopping:
+                self._restart(instance, now)
+
+    def _exited(self, instance: ManagedInstance, exit_code: int, now: float) -> None:
+        instance.exit_code = exit_code
+        if now - instance.started_at >= self.policy.stable_after:
+            instance.restarts = 0
+        failure_code = 1 if instance.killed_unhealthy else exit_code
+        instance.killed_unhealthy = False
+
+        if not self.stopping and self.policy.should_restart(failure_code, instance.restarts):
+            delay = self.policy.delay(instance.restarts)
+            instance.state = InstanceState.BACKOFF
+            instance.restart_at = now + delay
+            self._event(instance, f"已退出 (退出代码: {exit_code})，{delay:.1f} 秒后第 {instance.restarts + 1} 次重启",
+                        failure_code != 0)
+        elif failure_code != 0 and self.policy.mode != "never" and not self.stopping:
+            instance.state = InstanceState.FAILED
+            self._event(instance, f"已退出 (退出代码: {exit_code})，连续重启 {instance.restarts} 次后放弃", True)
+        else:
+            instance.state = InstanceState.STOPPED
+            self._event(instance, f"已退出 (退出代码: {exit_code})", failure_code != 0)
+
+    def _restart(self, instance: ManagedInstance, now: float) -> None:
+        instance.restarts += 1
+        instance.total_restarts += 1
+        try:
+            instance.process = self.spawn(instance.instance_id)
+        except Exception as e:
+            if self.policy.should_restart(1, instance.restarts):
+                instance.restart_at = now + self.policy.delay(instance.restarts)
+                self._event(instance, f"重启失败: {e}", True)
+            else:
+                instance.state = InstanceState.FAILED
+                self._event(instance, f"重启失败: {e}，放弃重启", True)
+            return
+        instance.state = InstanceState.RUNNING
+        instance.exit_code = None
+        instance.started_at = instance.last_output = now
+        self._event(instance, f"已重启 (PID: {instance.process.pid})", False)
+
+    def finished(self) -> bool:
+        """所有实例都已停止或放弃"""
+        return all(instance.state in (InstanceState.STOPPED, InstanceState.FAILED)
+                   for instance in self.instances.values())
+
+    def next_check_in(self, default: float = 0.5) -> float:
+        """距下一次需要 check() 的秒数(最近的重启时刻)，不超过 default"""
+        now = time.monotonic()
+        pending = [instance.restart_at - now for instance in self.instances.values()
+                   if instance.state == InstanceState.BACKOFF]
+        return max(0.0, min(pending + [default]))
+
+    def shutdown(self, timeout: float = 5.0) -> Dict[str, int]:
+        """停止重启并并行关闭所有实例，见 shutdown_processes"""
+        self.stopping = True
+        for instance in self.instances.values():
+            if instance.state not in (InstanceState.STOPPED, InstanceState.FAILED):
+                instance.state = InstanceState.STOPPING
+        result = shutdown_processes(self.processes, timeout)
+        for instance in self.instances.values():
+            if instance.state == InstanceState.STOPPING:
+                instance.state = InstanceState.STOPPED
+                instance.exit_code = instance.process.poll()
+        return result
+
+    def summary(self) -> List[Dict]:
+        """各实例的状态摘要"""
+        return [{
+            "instance_id": instance.instance_id,
+            "pid": instance.process.pid,
+            "state": instance.state,
+            "exit_code": instance.exit_code,
+            "restarts": instance.total_restarts,
+        } for instance in sorted(self.instances.values(), key=lambda i: i.instance_id)]
@@ -0,0 +1,254 @@
+"""
+定时启动精度基准
+
+功能说明：
+1. 使用一个极小的替身程序代替真实的目标程序，替身启动后立即输出自己的 perf_counter 时刻
+   (Linux 的 CLOCK_MONOTONIC、Windows 的 QPC 均为系统级时钟，可跨进程比较)
+   - Linux 上有C编译器时编译一个原生替身，避免Python解释器的启动耗时掩盖启动方式之间的差异
+   - 否则使用 python -S 运行的替身脚本
+2. 每种启动方式都由 PrecisionScheduler 在同一个目标时刻触发，启动N个实例:
+   - sequential: 到点后逐个 subprocess.Popen (timed_multi_launcher 的默认方式)
+   - prewarm:    提前预创建、到点由 LaunchGate 同时放行 (timed_multi_launcher --prewarm)
+   - qprocess:   到点后逐个 QProcess.start (timer_launcher_ui 的方式，不含其实例间的0.5秒等待)
+3. 统计各实例开始时刻相对目标时刻的偏差，以及每次启动中实例之间的离散程度(最小/中位数/p99)
+4. 无需图形界面，可在 Linux 上无头运行；--json 将结果追加到 JSON Lines 文件，便于长期跟踪
+
+使用方法：
+python launch_benchmark.py [--instances 10] [--runs 5] [--mode sequential --mode prewarm] [--json results.jsonl]
+"""
+
+import argparse
+import atexit
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Callable, Dict, List, Optional
+
+from launch_gate import LaunchGate
+from precision_scheduler import PrecisionScheduler
+
+# 替身程序: 启动后立即输出自己的开始时刻
+STANDIN_SCRIPT = "import time;print('__started__',time.perf_counter(),flush=True)"
+
+# 原生替身(Linux): 输出 CLOCK_MONOTONIC，与 time.perf_counter 为同一时钟
+NATIVE_STANDIN_SOURCE = r"""
+#include <stdio.h>
+#include <time.h>
+int main(void) {
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    printf("__started__ %ld.%09ld\n", (long)ts.tv_sec, ts.tv_nsec);
+    return 0;
+}
+"""
+
+# 触发前的准备时间(秒)，需要覆盖预创建实例的耗时
+DEFAULT_LEAD = 1.0
+
+# 等待替身程序结束的最长时间(秒)
+STANDIN_TIMEOUT = 30
+
+
+def build_native_standin() -> Optional[str]:
+    """在临时目录中编译原生替身，非Linux或没有C编译器时返回None"""
+    compiler = shutil.which("cc") or shutil.which("gcc") or shutil.which("clang")
+    if not sys.platform.startswith("linux") or not compiler:
+        return None
+    build_dir = tempfile.mkdtemp(prefix="launch_standin_")
+    atexit.register(shutil.rmtree, build_dir, True)
+    source = os.path.join(build_dir, "standin.c")
+    binary = os.path.join(build_dir, "standin")
+    with open(source, "w", encoding="utf-8") as f:
+        f.write(NATIVE_STANDIN_SOURCE)
+    result = subprocess.run([compiler, "-O2", "-o", binary, source], capture_output=True)
+    return binary if result.returncode == 0 else None
+
+
+def standin_command(standin: Optional[str] = None) -> List[str]:
+    """
+    替身程序的命令行
+
+    Args:
+        standin: 自定义替身(需输出一行 "__started__ <perf_counter>")，
+                 "auto" 优先使用原生替身，"python" 或None 使用替身脚本
+    """
+    if standin == "auto":
+        standin = build_native_standin()
+    if standin and standin != "python":
+        return [standin]
+    return [sys.executable, "-S", "-E", "-c", STANDIN_SCRIPT]
+
+
+def parse_started(output: str) -> Optional[float]:
+    for line in output.splitlines():
+        if line.startswith("__started__"):
+            return float(line.split()[1])
+    return None
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _collect_popen(processes: List[subprocess.Popen]) -> List[float]:
+    started = []
+    for process in processes:
+        output, _ = process.communicate(timeout=STANDIN_TIMEOUT)
+        value = parse_started(output.decode("utf-8", errors="replace"))
+        if value is not None:
+            started.append(value)
+    return started
+
+
+def run_sequential(command: List[str], instances: int, lead: float) -> Dict:
+    """到点后逐个 Popen"""
+    scheduler = PrecisionScheduler()
+    target = scheduler.now() + lead
+    fired = scheduler.wait_until(target)
+    processes = [subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+                 for _ in range(instances)]
+    return {"target": scheduler.perf_of(target), "fire_error": fired["error"],
+            "started": _collect_popen(processes)}
+
+
+def run_prewarm(command: List[str], instances: int, lead: float) -> Dict:
+    """提前预创建，到点同时放行"""
+    scheduler = PrecisionScheduler()
+    target = scheduler.now() + lead
+    gate = LaunchGate()
+    try:
+        processes = [gate.spawn(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+                     for _ in range(instances)]
+        fired = scheduler.wait_until(target)
+        gate.release()
+    finally:
+        gate.close()
+    return {"target": scheduler.perf_of(target), "fire_error": fired["error"],
+            "started": _collect_popen(processes)}
+
+
+def run_qprocess(command: List[str], instances: int, lead: float) -> Dict:
+    """到点后逐个 QProcess.start (无头 QCoreApplication)"""
+    from PyQt6.QtCore import QCoreApplication, QProcess
+
+    QCoreApplication.instance() or QCoreApplication([])
+    scheduler = PrecisionScheduler()
+    target = scheduler.now() + lead
+    fired = scheduler.wait_until(target)
+    processes = []
+    for _ in range(instances):
+        process = QProcess()
+        process.start(command[0], command[1:])
+        processes.append(process)
+
+    started = []
+    for process in processes:
+        process.waitForFinished(STANDIN_TIMEOUT * 1000)
+        value = parse_started(bytes(process.readAllStandardOutput()).decode("utf-8", errors="replace"))
+        if value is not None:
+            started.append(value)
+    return {"target": scheduler.perf_of(target), "fire_error": fired["error"], "started": started}
+
+
+MODES: Dict[str, Callable[[List[str], int, float], Dict]] = {
+    "sequential": run_sequential,
+    "prewarm": run_prewarm,
+    "qprocess": run_qprocess,
+}
+
+
+def summarize(runs: List[Dict], instances: int) -> Dict:
+    """
+    汇总多次启动的结果
+
+    Returns:
+        Dict: {"offset_ms": {...}, "spread_ms": {...}, "fire_error_ms": 中位数, "missing": 未回报的实例数}
+              offset 为各实例开始时刻 - 目标时刻，spread 为每次启动中 最晚 - 最早
+    """
+    offsets = sorted((started - run["target"]) * 1000 for run in runs for started in run["started"])
+    spreads = sorted((max(run["started"]) - min(run["started"])) * 1000 for run in runs if run["started"])
+
+    def stats(values: List[float]) -> Dict:
+        return {"min": values[0] if values else 0.0, "median": percentile(values, 50),
+                "p99": percentile(values, 99), "max": values[-1] if values else 0.0}
+
+    return {
+        "offset_ms": stats(offsets),
+        "spread_ms": stats(spreads),
+        "fire_error_ms": statistics.median(run["fire_error"] for run in runs) * 1000,
+        "missing": instances * len(runs) - len(offsets),
+    }
+
+
+def benchmark(modes: List[str], instances: int = 10, runs: int = 5, lead: float = DEFAULT_LEAD,
+              standin: Optional[str] = "auto") -> Dict[str, Dict]:
+    """
+    依次运行各启动方式
+
+    Returns:
+        Dict: 启动方式 -> summarize() 的结果，无法运行的方式为 {"error": 错误信息}
+    """
+    command = standin_command(standin)
+    print(f"替身程序: {' '.join(command[:3]) if len(command) > 1 else command[0]}")
+    results: Dict[str, Dict] = {}
+    for mode in modes:
+        try:
+            results[mode] = summarize([MODES[mode](command, instances, lead) for _ in range(runs)], instances)
+        except ImportError as e:
+            results[mode] = {"error": f"缺少依赖: {e.name}"}
+        except (OSError, subprocess.SubprocessError) as e:
+            results[mode] = {"error": str(e)}
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="定时启动精度基准")
+    parser.add_argument("--instances", type=int, default=10, help="每次启动的实例数 (默认: 10)")
+    parser.add_argument("--runs", type=int, default=5, help="每种方式的启动次数 (默认: 5)")
+    parser.add_argument("--mode", action="append", choices=list(MODES), help="只测量指定的启动方式，可重复指定")
+    parser.add_argument("--lead", type=float, default=DEFAULT_LEAD, help=f"触发前的准备时间(秒) (默认: {DEFAULT_LEAD})")
+    parser.add_argument("--standin", default="auto",
+                        help="替身程序: auto(有C编译器时用原生替身)、python，或自定义程序路径(需输出 \"__started__ <perf_counter>\")")
+    parser.add_argument("--json", help="将结果追加到 JSON Lines 文件")
+    args = parser.parse_args(argv)
+
+    # 无头运行 QProcess 时不需要显示服务器
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    modes = args.mode or list(MODES)
+    results = benchmark(modes, args.instances, args.runs, args.lead, args.standin)
+
+    print(f"{args.instances} 个实例 × {args.runs} 次，单位 ms")
+    print(f"{'方式':<12}{'触发误差':>10}{'偏差 最小':>12}{'中位数':>10}{'p99':>10}{'离散 最小':>12}{'中位数':>10}{'p99':>10}")
+    for mode, result in results.items():
+        if "error" in result:
+            print(f"{mode:<12}无法运行: {result['error']}")
+            continue
+        offset, spread = result["offset_ms"], result["spread_ms"]
+        missing = f"  ({result['missing']} 个实例未回报)" if result["missing"] else ""
+        print(f"{mode:<12}{result['fire_error_ms']:>10.3f}{offset['min']:>12.2f}{offset['median']:>10.2f}"
+              f"{offset['p99']:>10.2f}{spread['min']:>12.2f}{spread['median']:>10.2f}{spread['p99']:>10.2f}{missing}")
+
+    if args.json:
+        with open(args.json, "a", encoding="utf-8") as f:
+            f.write(json.dumps({
+                "time": datetime.datetime.now().isoformat(timespec="seconds"),
+                "platform": platform.platform(),
+                "instances": args.instances,
+                "standin": args.standin,
+                "runs": args.runs,
+                "results": results,
+            }, ensure_ascii=False) + "\n")
+    return 0 if all("error" not in result for result in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""
+预创建实例的启动闸门
+
+功能说明：
+1. 提前创建所有实例进程，但让它们停在"闸门"前，不执行目标程序
+   - Windows: 以 CREATE_SUSPENDED 挂起方式创建，放行时 NtResumeProcess 恢复
+   - Linux/macOS: 先启动一个极小的Python闸门脚本，阻塞读取共享的闸门管道，
+     放行时一次写入N个字节，闸门脚本随即 exec 目标程序(PID不变)
+2. 目标时刻调用 release() 同时放行全部实例，进程创建的耗时不再落在目标时刻之后
+3. 返回每个实例实际开始运行的时刻(perf_counter)，用于统计启动时间的离散程度
+   - Linux/macOS: 由闸门脚本在 exec 前通过回报管道写回
+   - Windows: 取每个进程被恢复的时刻
+
+使用方法：
+gate = LaunchGate()
+processes = [gate.spawn(cmd, stdout=subprocess.PIPE) for _ in range(10)]
+start_times = gate.release()    # 在目标时刻调用
+print(spread_stats(start_times))
+"""
+
+import os
+import struct
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+# Windows 进程创建标志: 主线程挂起
+CREATE_SUSPENDED = 0x00000004
+
+# 子进程回报格式: (PID, 开始运行时的perf_counter)，16字节，小于PIPE_BUF可原子写入
+_REPORT = struct.Struct("=qd")
+
+# 等待子进程回报的最长时间(秒)
+REPORT_TIMEOUT = 5.0
+
+
+# 闸门脚本: argv = [闸门管道读端, 回报管道写端, 目标程序, 参数...]
+# 收到1个字节才放行；读到EOF说明启动器已取消或退出，直接结束
+GATE_SCRIPT = (
+    "import os,struct,sys,time\n"
+    "g,r=int(sys.argv[1]),int(sys.argv[2])\n"
+    "if not os.read(g,1):os._exit(1)\n"
+    "os.write(r,struct.pack(%r,os.getpid(),time.perf_counter()))\n"
+    "os.close(g);os.close(r)\n"
+    "os.execvp(sys.argv[3],sys.argv[3:])\n"
+) % _REPORT.format
+
+
+class LaunchGate:
+    """预创建实例并在同一时刻放行"""
+
+    def __init__(self):
+        self.processes: List[subprocess.Popen] = []
+        self.released = False
+        self._gate_read = self._gate_write = None
+        self._report_read = self._report_write = None
+        if sys.platform != "win32":
+            self._gate_read, self._gate_write = os.pipe()
+            self._report_read, self._report_write = os.pipe()
+
+    def spawn(self, args, **popen_kwargs) -> subprocess.Popen:
+        """
+        创建一个停在闸门前的实例
+
+        Args:
+            args: 命令行
+            **popen_kwargs: 传给 subprocess.Popen 的其他参数
+
+        Returns:
+            subprocess.Popen: 已创建、尚未运行目标程序的进程
+        """
+        if self.released:
+            raise RuntimeError("闸门已放行，不能再预创建实例")
+        if sys.platform == "win32":
+            popen_kwargs["creationflags"] = popen_kwargs.get("creationflags", 0) | CREATE_SUSPENDED
+        else:
+            args = [args] if isinstance(args, (str, bytes, os.PathLike)) else list(args)
+            args = [sys.executable, "-S", "-c", GATE_SCRIPT,
+                    str(self._gate_read), str(self._report_write)] + args
+            popen_kwargs["pass_fds"] = tuple(popen_kwargs.get("pass_fds", ())) + (self._gate_read, self._report_write)
+        process = subprocess.Popen(args, **popen_kwargs)
+        self.processes.append(process)
+        return process
+
+    def release(self, timeout: float = REPORT_TIMEOUT) -> List[float]:
+        """
+        同时放行全部实例
+
+        Args:
+            timeout: 等待子进程回报开始时刻的最长时间(秒)
+
+        Returns:
+            List[float]: 各实例开始运行的 perf_counter 时刻(按预创建顺序，未回报的实例不计入)
+        """
+        if self.released:
+            return []
+        self.released = True
+        if sys.platform == "win32":
+            return self._resume_all()
+
+        os.write(self._gate_write, b"\x01" * len(self.processes))
+        self.close()
+        return self._read_reports(timeout)
+
+    def _resume_all(self) -> List[float]:
+        import ctypes
+        ntdll = ctypes.WinDLL("ntdll")
+        start_times = []
+        for process in self.processes:
+            ntdll.NtResumeProcess(int(process._handle))
+            start_times.append(time.perf_counter())
+        return start_times
+
+    def _read_reports(self, timeout: float) -> List[float]:
+        import select
+        reports: Dict[int, float] = {}
+        pending = b""
+        deadline = time.perf_counter() + timeout
+        alive = [p for p in self.processes if p.poll() is None or p.returncode == 0]
+        try:
+            while len(reports) < len(alive):
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0 or not select.select([self._report_read], [], [], remaining)[0]:
+                    break
+                chunk = os.read(self._report_read, _REPORT.size * len(self.processes))
+                if not chunk:
+                    break
+                pending += chunk
+                while len(pending) >= _REPORT.size:
+                    pid, started = _REPORT.unpack_from(pending)
+                    reports[pid] = started
+                    pending = pending[_REPORT.size:]
+        finally:
+            os.close(self._report_read)
+            self._report_read = None
+        return [reports[p.pid] for p in self.processes if p.pid in reports]
+
+    def close(self):
+        """
+        关闭闸门管道(回报管道除外)
+
+        未放行时关闭会让仍在等待的子进程读到EOF并直接退出，不会运行目标程序
+        """
+        for name in ("_gate_read", "_gate_write", "_report_write"):
+            fd = getattr(self, name)
+            if fd is not None:
+                os.close(fd)
+                setattr(self, name, None)
+        if not self.released and self._report_read is not None:
+            os.close(self._report_read)
+            self._report_read = None
+
+
+def spread_stats(start_times: List[float], target_perf: Optional[float] = None) -> Dict:
+    """
+    统计各实例开始时刻的离散程度
+
+    Args:
+        start_times: 各实例开始运行的 perf_counter 时刻
+        target_perf: 目标时刻对应的 perf_counter，提供时额外计算相对目标的误差
+
+    Returns:
+        Dict: {"count", "spread", "first", "last"} (秒)，first/last 为相对目标时刻的误差
+    """
+    if not start_times:
+        return {"count": 0, "spread": 0.0, "first": 0.0, "last": 0.0}
+    base = target_perf if target_perf is not None else min(start_times)
+    return {
+        "count": len(start_times),
+        "spread": max(start_times) - min(start_times),
+        "first": min(start_times) - base,
+        "last": max(start_times) - base,
+    }
+
+
+def format_spread(stats: Dict) -> str:
+    return (f"{stats['count']} 个实例, 最早 {stats['first'] * 1000:+.3f} ms, "
+            f"最晚 {stats['last'] * 1000:+.3f} ms, 离散 {stats['spread'] * 1000:.3f} ms")
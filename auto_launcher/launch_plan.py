@@ -0,0 +1,168 @@
+"""
+实例的启动计划: 同时启动 / 固定间隔 / 分波 / 随机抖动
+
+功能说明：
+1. 启动计划把每个实例安排在相对目标时刻(已校准的服务器时间)的某个偏移上:
+   - all:     所有实例在目标时刻同时启动
+   - stagger: 第i个实例在 i×间隔 启动
+   - waves:   每波 wave_size 个实例，第w波在 w×间隔 启动
+   - jitter:  每个实例在 [0, 抖动窗口) 内随机取一个时刻启动
+2. 按计划执行时由 PrecisionScheduler 精确等待到每一波的计划时刻，
+   并记录每个实例的计划时刻与实际误差，便于对照远程服务的负载与成功率调整策略
+
+使用方法：
+plan = LaunchPlan("waves", interval=0.5, wave_size=5)
+records = run_plan(plan, 20, launch=lambda instance_id: start(instance_id), scheduler=scheduler)
+for item in wave_summary(records):
+    print(format_wave(item))
+"""
+
+import random
+from typing import Callable, Dict, List, Optional, Tuple
+
+from precision_scheduler import PrecisionScheduler
+
+# 启动策略
+LAUNCH_STRATEGIES = ("all", "stagger", "waves", "jitter")
+
+# 固定间隔与分波的默认间隔(秒)
+DEFAULT_LAUNCH_INTERVAL = 0.5
+
+# 每波默认实例数
+DEFAULT_WAVE_SIZE = 5
+
+# 随机抖动的默认窗口(秒)
+DEFAULT_JITTER_WINDOW = 1.0
+
+
+class LaunchPlan:
+    """启动计划"""
+
+    def __init__(self, strategy: str = "all", interval: float = DEFAULT_LAUNCH_INTERVAL,
+                 wave_size: int = DEFAULT_WAVE_SIZE, jitter_window: float = DEFAULT_JITTER_WINDOW,
+                 seed: Optional[int] = None):
+        """
+        Args:
+            strategy: all / stagger / waves / jitter
+            interval: stagger 的实例间隔、waves 的波间隔(秒)
+            wave_size: waves 每波的实例数
+            jitter_window: jitter 的随机窗口(秒)
+            seed: jitter 的随机种子，便于复现同一计划
+        """
+        if strategy not in LAUNCH_STRATEGIES:
+            raise ValueError(f"未知的启动策略: {strategy}")
+        self.strategy = strategy
+        self.interval = max(0.0, interval)
+        self.wave_size = max(1, wave_size)
+        self.jitter_window = max(0.0, jitter_window)
+        self.random = random.Random(seed)
+
+    def waves(self, instances: int) -> List[Tuple[float, List[int]]]:
+        """
+        按计划时刻排列的各波
+
+        Returns:
+            List[Tuple[float, List[int]]]: [(相对目标时刻的偏移(秒), 该时刻启动的实例编号), ...]
+        """
+        if self.strategy == "all":
+            return [(0.0, list(range(instances)))] if instances else []
+        if self.strategy == "stagger":
+            return [(i * self.interval, [i]) for i in range(instances)]
+        if self.strategy == "waves":
+            return [(w * self.interval, list(range(start, min(start + self.wave_size, instances))))
+                    for w, start in enumerate(range(0, instances, self.wave_size))]
+        offsets = sorted((self.random.uniform(0, self.jitter_window), i) for i in range(instances))
+        return [(offset, [i]) for offset, i in offsets]
+
+    def duration(self, instances: int) -> float:
+        """最后一波相对目标时刻的偏移(秒)"""
+        waves = self.waves(instances)
+        return waves[-1][0] if waves else 0.0
+
+    def describe(self) -> str:
+        """启动计划的一行说明"""
+        if self.strategy == "all":
+            return "目标时刻同时启动"
+        if self.strategy == "stagger":
+            return f"每隔 {self.interval:g} 秒启动一个实例"
+        if self.strategy == "waves":
+            return f"每波 {self.wave_size} 个实例，每隔 {self.interval:g} 秒一波"
+        return f"在目标时刻后 {self.jitter_window:g} 秒内随机启动"
+
+
+def run_plan(plan: LaunchPlan, instances: int, launch: Callable[[int], object],
+             scheduler: Optional[PrecisionScheduler] = None,
+             cancel: Optional[Callable[[], bool]] = None,
+             on_launch: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+    """
+    按计划启动实例
+
+    Args:
+        plan: 启动计划
+        instances: 实例数量
+        launch: 启动一个实例，launch(实例编号)；抛出异常时该实例记为失败，不影响其他实例
+        scheduler: 已在目标时刻触发的调度器；None 时以当前时刻为目标时刻
+        cancel: 返回True时停止启动剩余的实例
+        on_launch: 每个实例启动后调用 on_launch(记录)
+
+    Returns:
+        List[Dict]: 每个实例的 {"instance_id", "wave", "planned": 计划偏移(秒),
+                    "error": 实际启动时刻 - 计划时刻(秒), "ok": 是否启动成功, "message": 失败原因}
+    """
+    if scheduler is None or scheduler.target is None:
+        scheduler = PrecisionScheduler()
+        scheduler.target = scheduler.now()
+    base = scheduler.target
+
+    records = []
+    for wave, (offset, instance_ids) in enumerate(plan.waves(instances)):
+        if offset > 0 and scheduler.wait_until(base + offset, cancel=cancel) is None:
+            break
+        if cancel and cancel():
+            break
+        for instance_id in instance_ids:
+            ok, message = True, ""
+            try:
+                launch(instance_id)
+            except Exception as e:
+                ok, message = False, str(e) or type(e).__name__
+            entry = scheduler.record("实例")
+            record = {"instance_id": instance_id, "wave": wave, "planned": offset,
+                      "error": entry["error"], "ok": ok, "message": message}
+            records.append(record)
+            if on_launch:
+                on_launch(record)
+    # 恢复为目标时刻，后续记录仍以目标时刻为基准
+    scheduler.target = base
+    return records
+
+
+def wave_summary(records: List[Dict]) -> List[Dict]:
+    """
+    按波汇总启动误差
+
+    Returns:
+        List[Dict]: {"wave", "planned", "count", "failed", "first", "last"}，first/last 为该波最早/最晚的误差(秒)
+    """
+    waves: Dict[int, Dict] = {}
+    for record in records:
+        item = waves.setdefault(record["wave"], {"wave": record["wave"], "planned": record["planned"],
+                                                 "count": 0, "failed": 0, "first": None, "last": None})
+        item["count"] += 1
+        if not record["ok"]:
+            item["failed"] += 1
+        item["first"] = record["error"] if item["first"] is None else min(item["first"], record["error"])
+        item["last"] = record["error"] if item["last"] is None else max(item["last"], record["error"])
+    return [waves[w] for w in sorted(waves)]
+
+
+def format_launch(record: Dict) -> str:
+    status = "" if record["ok"] else f"，启动失败: {record['message']}"
+    return (f"实例 #{record['instance_id'] + 1} 计划 +{record['planned']:.3f} 秒，"
+            f"误差 {record['error'] * 1000:+.3f} ms{status}")
+
+
+def format_wave(item: Dict) -> str:
+    failed = f"，{item['failed']} 个失败" if item["failed"] else ""
+    return (f"第 {item['wave'] + 1} 波 (+{item['planned']:.3f} 秒): {item['count']} 个实例{failed}，"
+            f"误差 {item['first'] * 1000:+.3f} ~ {item['last'] * 1000:+.3f} ms")
@@ -0,0 +1,164 @@
+"""
+单线程的实例输出多路复用器
+
+功能说明：
+1. 为每个实例的 stdout/stderr 创建管道，所有管道的读端注册到同一个 asyncio 事件循环
+   - Linux/macOS: 普通管道 + SelectorEventLoop
+   - Windows: 重叠I/O管道(asyncio.windows_utils.pipe) + ProactorEventLoop，select 不支持管道
+2. 事件循环在调用方线程中按需运行: poll() 阻塞到有输出或超时，不需要额外线程与轮询
+3. 所有实例的输出按到达顺序汇入同一个事件流，每条带实例编号
+4. 替代原先每实例2个读取线程 + 1个队列的方式，可扩展到上百个实例
+
+使用方法：
+mux = OutputMultiplexer()
+process = mux.spawn(0, subprocess.Popen, ["app.exe"])
+while mux.open_streams:
+    for instance_id, stream, line in mux.poll(timeout=0.5):
+        print(instance_id, stream, line)
+mux.close()
+"""
+
+import asyncio
+import collections
+import os
+import subprocess
+import sys
+from typing import Callable, Deque, List, Optional, Tuple
+
+# 单行最大长度(字节)，超过时按该长度强制断行，避免无换行的输出占满内存
+MAX_LINE_BYTES = 64 * 1024
+
+# 输出事件: (实例编号, "stdout"/"stderr", 文本行)
+OutputEvent = Tuple[int, str, str]
+
+
+def _create_pipe():
+    """创建管道，返回 (可交给 connect_read_pipe 的读端, 交给子进程的写端fd)"""
+    if sys.platform == "win32":
+        import msvcrt
+        from asyncio import windows_utils
+        read_handle, write_handle = windows_utils.pipe(overlapped=(True, False))
+        return windows_utils.PipeHandle(read_handle), msvcrt.open_osfhandle(write_handle, 0)
+    read_fd, write_fd = os.pipe()
+    return os.fdopen(read_fd, "rb", buffering=0), write_fd
+
+
+class _LineProtocol(asyncio.Protocol):
+    """把管道数据切分为行并交给多路复用器"""
+
+    def __init__(self, mux: "OutputMultiplexer", instance_id: int, stream: str):
+        self.mux = mux
+        self.instance_id = instance_id
+        self.stream = stream
+        self.buffer = bytearray()
+
+    def data_received(self, data: bytes):
+        self.buffer += data
+        lines = self.buffer.split(b"\n")
+        self.buffer = bytearray(lines.pop())
+        while len(self.buffer) > MAX_LINE_BYTES:
+            lines.append(bytes(self.buffer[:MAX_LINE_BYTES]))
+            del self.buffer[:MAX_LINE_BYTES]
+        for line in lines:
+            self.mux._emit(self.instance_id, self.stream, line)
+
+    def eof_received(self):
+        return False
+
+    def connection_lost(self, exc):
+        if self.buffer:
+            self.mux._emit(self.instance_id, self.stream, bytes(self.buffer))
+            self.buffer.clear()
+        self.mux._stream_closed()
+
+
+class OutputMultiplexer:
+    """在单个线程中汇集所有实例输出的多路复用器"""
+
+    def __init__(self, encoding: str = "utf-8"):
+        self.encoding = encoding
+        self.loop = asyncio.new_event_loop()
+        self.open_streams = 0
+        self._events: Deque[OutputEvent] = collections.deque()
+        self._transports = []
+        self._wakeup: Optional[asyncio.Future] = None
+
+    def spawn(self, instance_id: int, popen: Callable[..., subprocess.Popen], args,
+              **popen_kwargs) -> subprocess.Popen:
+        """
+        创建实例进程，并把其 stdout/stderr 接入多路复用器
+
+        Args:
+            instance_id: 实例编号
+            popen: 创建进程的函数(subprocess.Popen 或 LaunchGate.spawn)
+            args: 命令行
+            **popen_kwargs: 传给 popen 的其他参数(stdout/stderr 由本类提供)
+
+        Returns:
+            subprocess.Popen: 创建的进程
+        """
+        stdout_read, stdout_write = _create_pipe()
+        stderr_read, stderr_write = _create_pipe()
+        try:
+            process = popen(args, stdout=stdout_write, stderr=stderr_write, **popen_kwargs)
+        except Exception:
+            stdout_read.close()
+            stderr_read.close()
+            raise
+        finally:
+            # 写端已由子进程继承，父进程必须关闭，否则读端永远等不到EOF
+            os.close(stdout_write)
+            os.close(stderr_write)
+
+        for stream, pipe in (("stdout", stdout_read), ("stderr", stderr_read)):
+            transport, _ = self.loop.run_until_complete(self.loop.connect_read_pipe(
+                lambda stream=stream: _LineProtocol(self, instance_id, stream), pipe))
+            self._transports.append(transport)
+            self.open_streams += 1
+        return process
+
+    def _emit(self, instance_id: int, stream: str, line: bytes):
+        text = line.decode(self.encoding, errors="replace").rstrip()
+        self._events.append((instance_id, stream, text))
+        self._wake()
+
+    def _stream_closed(self):
+        self.open_streams -= 1
+        self._wake()
+
+    def _wake(self):
+        if self._wakeup is not None and not self._wakeup.done():
+            self._wakeup.set_result(None)
+
+    def poll(self, timeout: Optional[float] = None) -> List[OutputEvent]:
+        """
+        取出已到达的输出，没有输出时阻塞到有输出、有管道关闭或超时
+
+        Args:
+            timeout: 最长等待时间(秒)，None 表示一直等待
+
+        Returns:
+            List[OutputEvent]: 按到达顺序排列的 (实例编号, 流名称, 文本行)
+        """
+        if not self._events and timeout != 0:
+            self._wakeup = self.loop.create_future()
+            try:
+                self.loop.run_until_complete(asyncio.wait([self._wakeup], timeout=timeout))
+            finally:
+                self._wakeup = None
+        elif timeout == 0:
+            # 不等待，只处理已就绪的I/O
+            self.loop.run_until_complete(asyncio.sleep(0))
+        events = list(self._events)
+        self._events.clear()
+        return events
+
+    def close(self):
+        """关闭所有管道与事件循环"""
+        if self.loop.is_closed():
+            return
+        for transport in self._transports:
+            transport.close()
+        self._transports.clear()
+        self.loop.run_until_complete(asyncio.sleep(0))
+        self.loop.close()
@@ -0,0 +1,187 @@
+"""
+精确定时调度器 (先睡眠、后忙等)
+
+功能说明：
+1. 距目标时刻较远时分段 sleep，期间可回调显示倒计时、检查取消标志，不占用CPU
+2. 进入最后的忙等窗口(默认20ms，覆盖Windows约15.6ms的sleep粒度)后，
+   以 perf_counter 单调时钟 + 时钟偏移 忙等到目标时刻
+3. 每次触发都记录实际误差(触发时刻的服务器时间 - 目标时间)，可统计抖动
+4. Windows 上等待期间通过 timeBeginPeriod(1) 提高系统定时器精度
+
+使用方法：
+python precision_scheduler.py --calibrate 50    # 测量本机的触发抖动
+"""
+
+import argparse
+import contextlib
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+from clock_sync import LocalClock
+
+# 最后改为忙等的时间窗口(秒)
+DEFAULT_SPIN_WINDOW = 0.02
+
+# sleep 阶段回调 on_tick 的间隔(秒)
+DEFAULT_TICK_INTERVAL = 0.1
+
+
+@contextlib.contextmanager
+def high_resolution_timer():
+    """Windows 上临时把系统定时器精度提高到1ms，其他平台不做处理"""
+    winmm = None
+    if sys.platform == "win32":
+        try:
+            import ctypes
+            winmm = ctypes.WinDLL("winmm")
+            winmm.timeBeginPeriod(1)
+        except (OSError, AttributeError):
+            winmm = None
+    try:
+        yield
+    finally:
+        if winmm is not None:
+            winmm.timeEndPeriod(1)
+
+
+class PrecisionScheduler:
+    """
+    精确定时调度器
+
+    时间均以服务器时间的 Unix 时间戳表示: 服务器时间 = 本地时间 + offset
+    """
+
+    def __init__(self, offset: float = 0.0, spin_window: float = DEFAULT_SPIN_WINDOW,
+                 clock: Optional[LocalClock] = None):
+        self.offset = offset
+        self.spin_window = spin_window
+        self.clock = clock or LocalClock()
+        self.target: Optional[float] = None
+        self.records: List[Dict] = []
+
+    def now(self) -> float:
+        """当前服务器时间"""
+        return self.clock.now() + self.offset
+
+    def perf_of(self, target: float) -> float:
+        """服务器时间戳对应的 perf_counter 读数"""
+        return self.clock.perf_of(target - self.offset)
+
+    def wait_until(self, target: float, cancel: Optional[Callable[[], bool]] = None,
+                   on_tick: Optional[Callable[[float], None]] = None,
+                   tick_interval: float = DEFAULT_TICK_INTERVAL) -> Optional[Dict]:
+        """
+        等待到目标时刻
+
+        Args:
+            target: 目标时刻(服务器时间戳)
+            cancel: 返回True时取消等待
+            on_tick: sleep 阶段定期回调，参数为剩余秒数
+            tick_interval: on_tick 回调与取消检查的间隔(秒)
+
+        Returns:
+            Dict: 触发记录 {"label", "target", "error"}，被取消时返回None
+        """
+        self.target = target
+        deadline = self.perf_of(target)
+        with high_resolution_timer():
+            while True:
+                remaining = deadline - time.perf_counter()
+                if remaining <= self.spin_window:
+                    break
+                if cancel and cancel():
+                    return None
+                if on_tick:
+                    on_tick(remaining)
+                time.sleep(min(tick_interval, remaining - self.spin_window))
+
+            while time.perf_counter() < deadline:
+                pass
+        return self.record("触发")
+
+    def record(self, label: str, perf: Optional[float] = None) -> Dict:
+        """
+        记录一次启动相对目标时刻的误差
+
+        Args:
+            label: 记录名称(如 "实例 #1")
+            perf: 事件发生的 perf_counter 读数，默认为当前时刻
+
+        Returns:
+            Dict: {"label", "target", "error"}，error 为正表示晚于目标时刻
+        """
+        perf = time.perf_counter() if perf is None else perf
+        error = self.clock.at(perf) + self.offset - self.target if self.target is not None else 0.0
+        entry = {"label": label, "target": self.target, "error": error}
+        self.records.append(entry)
+        return entry
+
+    def fire(self, target: float, callback: Callable, *args,
+             cancel: Optional[Callable[[], bool]] = None,
+             on_tick: Optional[Callable[[float], None]] = None, **kwargs):
+        """
+        在目标时刻调用回调
+
+        Returns:
+            回调的返回值，被取消时返回None
+        """
+        if self.wait_until(target, cancel, on_tick) is None:
+            return None
+        return callback(*args, **kwargs)
+
+    def jitter_stats(self, label: Optional[str] = None) -> Dict:
+        """
+        统计触发误差
+
+        Args:
+            label: 只统计指定名称的记录，None 表示全部
+
+        Returns:
+            Dict: {"count", "mean", "median", "max_abs", "p99_abs"} (秒)
+        """
+        errors = [r["error"] for r in self.records if label is None or r["label"] == label]
+        if not errors:
+            return {"count": 0, "mean": 0.0, "median": 0.0, "max_abs": 0.0, "p99_abs": 0.0}
+        absolute = sorted(abs(e) for e in errors)
+        return {
+            "count": len(errors),
+            "mean": statistics.fmean(errors),
+            "median": statistics.median(errors),
+            "max_abs": absolute[-1],
+            "p99_abs": absolute[min(len(absolute) - 1, int(len(absolute) * 0.99))],
+        }
+
+
+def format_stats(stats: Dict) -> str:
+    return (f"{stats['count']} 次, 平均 {stats['mean'] * 1e6:+.0f} us, 中位数 {stats['median'] * 1e6:+.0f} us, "
+            f"p99 {stats['p99_abs'] * 1e6:.0f} us, 最大 {stats['max_abs'] * 1e6:.0f} us")
+
+
+def calibrate(samples: int = 20, lead: float = 0.25, spin_window: float = DEFAULT_SPIN_WINDOW) -> Dict:
+    """
+    测量本机的触发抖动: 反复以 lead 秒后的时刻为目标触发
+
+    Returns:
+        Dict: jitter_stats() 的结果
+    """
+    scheduler = PrecisionScheduler(spin_window=spin_window)
+    for _ in range(samples):
+        scheduler.wait_until(scheduler.now() + lead)
+    return scheduler.jitter_stats()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="精确定时调度器")
+    parser.add_argument("--calibrate", type=int, default=20, help="测量触发抖动的次数 (默认: 20)")
+    parser.add_argument("--spin-window", type=float, default=DEFAULT_SPIN_WINDOW,
+                        help=f"忙等窗口(秒) (默认: {DEFAULT_SPIN_WINDOW})")
+    args = parser.parse_args(argv)
+
+    print(f"触发误差: {format_stats(calibrate(args.calibrate, spin_window=args.spin_window))}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
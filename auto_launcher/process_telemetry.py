@@ -0,0 +1,239 @@
+"""
+实例进程的资源遥测采样器
+
+功能说明：
+1. 一个后台线程按固定间隔用 psutil 采样所有被跟踪的实例进程:
+   CPU占用、常驻内存(RSS)、线程数、累计读写字节数
+2. 每个实例的历史保存在定长环形缓冲区中(默认保留最近300个采样点)，内存占用固定
+3. 采样本身保持轻量: 复用 psutil.Process 对象、oneshot 批量读取，并记录每轮采样的耗时
+4. 历史可导出为 CSV 或 JSON 时间序列，控制台与图形界面均可显示最新的汇总
+5. 实例重启后调用 track() 更新PID，历史按实例编号连续记录
+
+使用方法：
+telemetry = TelemetrySampler(interval=1.0)
+telemetry.start()
+telemetry.track(0, process.pid)
+print(format_totals(telemetry.totals()))
+telemetry.stop()
+telemetry.export("telemetry.csv")
+"""
+
+import collections
+import csv
+import json
+import threading
+import time
+from typing import Deque, Dict, List, Optional, Tuple
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+# 默认采样间隔(秒)
+DEFAULT_TELEMETRY_INTERVAL = 1.0
+
+# 每个实例默认保留的采样点数
+DEFAULT_HISTORY_SIZE = 300
+
+# 采样点字段: 时间戳, PID, CPU(%), RSS(字节), 线程数, 累计读取字节, 累计写入字节
+FIELDS = ("time", "pid", "cpu", "rss", "threads", "read_bytes", "write_bytes")
+
+Sample = Tuple[float, int, float, int, int, int, int]
+
+
+class TelemetrySampler:
+    """后台线程采样实例进程的资源占用"""
+
+    def __init__(self, interval: float = DEFAULT_TELEMETRY_INTERVAL, history_size: int = DEFAULT_HISTORY_SIZE):
+        """
+        Args:
+            interval: 采样间隔(秒)
+            history_size: 每个实例保留的采样点数
+        """
+        self.interval = interval
+        self.history_size = history_size
+        # 最近一轮采样的耗时(秒)
+        self.last_cost = 0.0
+        self._processes: Dict[int, "psutil.Process"] = {}
+        self._history: Dict[int, Deque[Sample]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def available(self) -> bool:
+        return PSUTIL_AVAILABLE
+
+    def track(self, instance_id: int, pid: int):
+        """开始(或在实例重启后继续)跟踪一个实例进程"""
+        if not PSUTIL_AVAILABLE:
+            return
+        try:
+            process = psutil.Process(pid)
+            # 第一次调用只建立CPU占用的基准
+            process.cpu_percent(None)
+        except psutil.Error:
+            return
+        with self._lock:
+            self._processes[instance_id] = process
+            self._history.setdefault(instance_id, collections.deque(maxlen=self.history_size))
+
+    def start(self):
+        """启动采样线程，psutil 不可用时不做任何事"""
+        if not PSUTIL_AVAILABLE or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止采样线程"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        """立即采样一轮"""
+        started = time.perf_counter()
+        with self._lock:
+            processes = list(self._processes.items())
+        now = time.time()
+        samples = []
+        exited = []
+        for instance_id, process in processes:
+            try:
+                with process.oneshot():
+                    cpu = process.cpu_percent(None)
+                    rss = process.memory_info().rss
+                    threads = process.num_threads()
+                    try:
+                        io = process.io_counters()
+                        read_bytes, write_bytes = io.read_bytes, io.write_bytes
+                    except (AttributeError, psutil.AccessDenied):
+                        # macOS 不提供进程I/O计数
+                        read_bytes = write_bytes = 0
+            except psutil.Error:
+                exited.append((instance_id, process))
+                continue
+            samples.append((instance_id, (now, process.pid, cpu, rss, threads, read_bytes, write_bytes)))
+
+        with self._lock:
+            for instance_id, sample in samples:
+                self._history[instance_id].append(sample)
+            for instance_id, process in exited:
+                # 已退出的进程不再采样，重启后由 track() 换成新进程
+                if self._processes.get(instance_id) is process:
+                    del self._processes[instance_id]
+        self.last_cost = time.perf_counter() - started
+
+    def history(self, instance_id: int) -> List[Dict]:
+        """某个实例的全部采样点"""
+        with self._lock:
+            samples = list(self._history.get(instance_id, ()))
+        return [dict(zip(FIELDS, sample)) for sample in samples]
+
+    def latest(self) -> Dict[int, Dict]:
+        """
+        各实例最新的采样点
+
+        Returns:
+            Dict[int, Dict]: 实例编号 -> {FIELDS..., "read_rate", "write_rate": 与上一个采样点之间的读写速率(字节/秒),
+                             "running": 是否仍在采样}
+        """
+        with self._lock:
+            items = [(instance_id, [samples[-2], samples[-1]] if len(samples) > 1 else [samples[-1]],
+                      instance_id in self._processes)
+                     for instance_id, samples in self._history.items() if samples]
+        result = {}
+        for instance_id, last, running in items:
+            item = dict(zip(FIELDS, last[-1]))
+            item["read_rate"] = item["write_rate"] = 0.0
+            if len(last) == 2 and last[1][1] == last[0][1] and last[1][0] > last[0][0]:
+                elapsed = last[1][0] - last[0][0]
+                item["read_rate"] = max(0, last[1][5] - last[0][5]) / elapsed
+                item["write_rate"] = max(0, last[1][6] - last[0][6]) / elapsed
+            item["running"] = running
+            result[instance_id] = item
+        return result
+
+    def totals(self) -> Dict:
+        """
+        仍在运行的实例最新采样点的合计
+
+        Returns:
+            Dict: {"count", "cpu", "rss", "threads", "read_rate", "write_rate",
+                   "top": CPU占用最高的实例编号或None, "top_cpu", "cost": 最近一轮采样耗时(秒)}
+        """
+        latest = [(instance_id, item) for instance_id, item in self.latest().items() if item["running"]]
+        top = max(latest, key=lambda pair: pair[1]["cpu"], default=(None, {"cpu": 0.0}))
+        return {
+            "count": len(latest),
+            "cpu": sum(item["cpu"] for _, item in latest),
+            "rss": sum(item["rss"] for _, item in latest),
+            "threads": sum(item["threads"] for _, item in latest),
+            "read_rate": sum(item["read_rate"] for _, item in latest),
+            "write_rate": sum(item["write_rate"] for _, item in latest),
+            "top": top[0],
+            "top_cpu": top[1]["cpu"],
+            "cost": self.last_cost,
+        }
+
+    def export(self, path: str) -> int:
+        """
+        导出全部历史，扩展名为 .json 时导出JSON，否则导出CSV
+
+        Returns:
+            int: 导出的采样点数
+        """
+        with self._lock:
+            history = {instance_id: list(samples) for instance_id, samples in sorted(self._history.items())}
+        count = sum(len(samples) for samples in history.values())
+
+        if path.lower().endswith(".json"):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "interval": self.interval,
+                    "fields": FIELDS,
+                    "instances": {str(instance_id): samples for instance_id, samples in history.items()},
+                }, f, ensure_ascii=False)
+            return count
+
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(("instance_id",) + FIELDS)
+            rows = sorted(((sample[0], instance_id, sample) for instance_id, samples in history.items()
+                           for sample in samples), key=lambda row: (row[0], row[1]))
+            for _, instance_id, sample in rows:
+                writer.writerow((instance_id,) + sample)
+        return count
+
+
+def format_bytes(value: float) -> str:
+    for unit in ("B", "KB", "MB"):
+        if abs(value) < 1024:
+            return f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.2f} GB"
+
+
+def format_totals(totals: Dict) -> str:
+    """合计的一行说明"""
+    top = f", 最高 实例 #{totals['top'] + 1} {totals['top_cpu']:.1f}%" if totals["top"] is not None else ""
+    return (f"{totals['count']} 个实例 CPU {totals['cpu']:.1f}%{top}, 内存 {format_bytes(totals['rss'])}, "
+            f"线程 {totals['threads']}, 读 {format_bytes(totals['read_rate'])}/s, "
+            f"写 {format_bytes(totals['write_rate'])}/s (采样耗时 {totals['cost'] * 1000:.1f} ms)")
+
+
+def format_instance(instance_id: int, item: Dict) -> str:
+    """单个实例最新采样点的一行说明"""
+    state = "" if item["running"] else " (已退出)"
+    return (f"实例 #{instance_id + 1} (PID: {item['pid']}){state}: CPU {item['cpu']:.1f}%, "
+            f"内存 {format_bytes(item['rss'])}, 线程 {item['threads']}, "
+            f"累计读 {format_bytes(item['read_bytes'])}, 累计写 {format_bytes(item['write_bytes'])}")
@@ -17,6 +17,10 @@ python timed_multi_launcher.py [--instances 10] [--time 11:45] [--exe wuyanzheng
 --params: 启动参数
 --now: 立即启动，不等待指定时间
 --no-sync: 不与服务器同步时间，使用本地系统时间
+--affinity: 把实例轮询绑定到各CPU核心，并为启动器保留一个核心
+--boost: 启动窗口内提高实例优先级
+--launch-strategy: 启动计划 all(同时) / stagger(固定间隔) / waves(分波) / jitter(随机抖动)
+--telemetry: 按该间隔(秒)采样各实例的CPU、内存、线程与I/O，--telemetry-export 导出为CSV/JSON
 """
 
 import os
@@ -27,11 +31,9 @@ import argparse
 import subprocess
 import threading
 import signal
-import queue
 import datetime
-import requests
 import re
-from typing import List, Dict, Optional, Tuple, Any
+from typing import List, Dict, Optional, Tuple, Any, Callable
 import colorama
 from colorama import Fore, Style
 
@@ -51,13 +53,65 @@ except ImportError:
     KEYBOARD_AVAILABLE = False
     print("警告: 未安装keyboard库，ESC键退出功能不可用")
 
+# 导入多次采样的时钟偏移估计器
+try:
+    from clock_sync import ClockDriftModel, DEFAULT_TIME_URL, default_sources, estimate_first, format_report
+    from precision_scheduler import PrecisionScheduler, format_stats
+    CLOCK_SYNC_AVAILABLE = True
+except ImportError:
+    CLOCK_SYNC_AVAILABLE = False
+
+# 单线程汇集所有实例输出，按帧批量渲染到控制台
+from output_mux import OutputMultiplexer
+from console_renderer import ConsoleRenderer
+
+# 实例监管: 健康检查、退避重启与并行关闭
+from instance_supervisor import InstanceSupervisor, RestartPolicy, RESTART_MODES, shutdown_processes
+
+# 实例的CPU核心放置、启动窗口优先级与CPU统计
+from cpu_placement import PlacementPolicy, DEFAULT_BOOST_WINDOW, format_report_line
+
+# 实例进程的资源遥测(后台线程采样，环形缓冲区保存历史)
+from process_telemetry import TelemetrySampler, format_totals, format_instance
+
+# 导入启动计划(同时 / 固定间隔 / 分波 / 随机抖动)
+try:
+    from launch_plan import LaunchPlan, run_plan, wave_summary, format_launch, format_wave
+    LAUNCH_PLAN_AVAILABLE = True
+except ImportError:
+    LAUNCH_PLAN_AVAILABLE = False
+
+# 导入预创建实例的启动闸门
+try:
+    from launch_gate import LaunchGate, spread_stats, format_spread
+    LAUNCH_GATE_AVAILABLE = True
+except ImportError:
+    LAUNCH_GATE_AVAILABLE = False
+
+# 尝试导入项目公共的非阻塞队列日志设置
+try:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from utilities import LogManager
+    QUEUE_LOGGING_AVAILABLE = True
+except ImportError:
+    QUEUE_LOGGING_AVAILABLE = False
+
 # 初始化colorama
 colorama.init()
 
 # 全局变量
 EXIT_FLAG = False
 PROCESSES = []
-OUTPUT_QUEUES = []
+OUTPUT_MUX = None
+SUPERVISOR = None
+PLACEMENT = None
+TELEMETRY = None
+
+# 校时结果缓存(偏移与漂移模型)
+CLOCK_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs', 'clock_cache.json')
+
+# 自上次校时以来预测误差增长超过该值(秒)时重新校时
+DEFAULT_SYNC_THRESHOLD = 0.01
 INSTANCE_COLORS = [
     Fore.GREEN, Fore.CYAN, Fore.MAGENTA, Fore.YELLOW, 
     Fore.BLUE, Fore.RED, Fore.WHITE, 
@@ -71,14 +125,20 @@ def setup_logging():
     os.makedirs(log_dir, exist_ok=True)
     log_file = os.path.join(log_dir, f'timed_multi_launcher_{datetime.datetime.now().strftime("%Y%m%d_%H%M%S")}.log')
     
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s [%(levelname)s] %(message)s',
-        handlers=[
-            logging.FileHandler(log_file, encoding='utf-8'),
-            logging.StreamHandler()
-        ]
-    )
+    if QUEUE_LOGGING_AVAILABLE:
+        # 文件/控制台写入交给后台线程，避免阻塞计时与输出线程
+        LogManager.setup_queue_logging(log_file, fmt='%(asctime)s [%(levelname)s] %(message)s')
+    else:
+        console_handler = logging.StreamHandler()
+        console_handler.addFilter(lambda record: getattr(record, "console", True))
+        logging.basicConfig(
+            level=logging.INFO,
+            format='%(asctime)s [%(levelname)s] %(message)s',
+            handlers=[
+                logging.FileHandler(log_file, encoding='utf-8'),
+                console_handler
+            ]
+        )
     
     logging.info(f"日志文件: {log_file}")
     return log_file
@@ -99,105 +159,67 @@ def listen_for_esc_key():
         print(f"{Fore.RED}键盘监听出错: {str(e)}{Style.RESET_ALL}")
 
 # 从迪士尼服务器获取时间
-def get_server_time(retries: int = 3, timeout: int = 20) -> Optional[datetime.datetime]:
+def get_clock_offset(retries: int = 3, timeout: int = 5,
+                     sources: Optional[List[Tuple[str, Optional[str]]]] = None) -> Optional[Dict[str, Any]]:
     """
-    从迪士尼服务器获取准确时间
+    多次采样估计服务器时钟偏移(服务器时间 = 本地时间 + offset)
+    
+    代理与直连(以及多个校时地址)并发探测，最先成功的结果胜出
     
     Args:
         retries: 重试次数
-        timeout: 超时时间(秒)
+        timeout: 单次请求超时时间(秒)
+        sources: [(校时地址, 代理或None), ...]，默认为迪士尼服务器的代理与直连
     
     Returns:
-        datetime.datetime: 服务器时间，获取失败则返回None
+        Dict: clock_sync.ClockOffsetEstimator.estimate() 的报告，获取失败则返回None
     """
-    url = "https://www.hongkongdisneyland.com"
-    proxies = {
-        "http": "http://127.0.0.1:7890",
-        "https": "http://127.0.0.1:7890"
-    }
-    
+    sources = sources or default_sources()
     for attempt in range(retries):
         try:
-            print(f"{Fore.CYAN}尝试使用代理获取服务器时间... (尝试 {attempt + 1}/{retries}){Style.RESET_ALL}")
-            response = requests.head(url, proxies=proxies, timeout=timeout)
-            server_time = response.headers.get('Date')
-            
-            if server_time:
-                # RFC标准时间格式: Wed, 05 Jan 2022 12:34:56 GMT
-                # 尝试解析Date头
-                if PYTZ_AVAILABLE:
-                    server_time = datetime.datetime.strptime(server_time, '%a, %d %b %Y %H:%M:%S %Z')
-                    server_time = server_time.replace(tzinfo=pytz.utc).astimezone(pytz.timezone('Asia/Hong_Kong'))
-                else:
-                    # 如果没有pytz，简单地转换为本地时间
-                    server_time = datetime.datetime.strptime(server_time, '%a, %d %b %Y %H:%M:%S %Z')
-                    # 假设GMT+8
-                    server_time = server_time + datetime.timedelta(hours=8)
-                return server_time
-            else:
-                print(f"{Fore.YELLOW}无法通过代理获取服务器时间，尝试使用系统默认网络...{Style.RESET_ALL}")
+            print(f"{Fore.CYAN}并发探测 {len(sources)} 个校时来源... (尝试 {attempt + 1}/{retries}){Style.RESET_ALL}")
+            report = estimate_first(sources, timeout)
+            route = f"代理 {report['proxy']}" if report['proxy'] else "直连"
+            print(f"{Fore.GREEN}{format_report(report)} [{route}]{Style.RESET_ALL}")
+            logging.info(f"{format_report(report)} [{report['url']} {route}]")
+            return report
         except Exception as e:
-            print(f"{Fore.YELLOW}使用代理获取服务器时间时发生错误: {str(e)}{Style.RESET_ALL}")
+            print(f"{Fore.YELLOW}所有校时来源均失败: {str(e)}{Style.RESET_ALL}")
         
-        # 尝试使用系统默认网络
-        try:
-            print(f"{Fore.CYAN}切换到系统默认网络... (尝试 {attempt + 1}/{retries}){Style.RESET_ALL}")
-            response = requests.head(url, timeout=timeout)
-            server_time = response.headers.get('Date')
-            
-            if server_time:
-                if PYTZ_AVAILABLE:
-                    server_time = datetime.datetime.strptime(server_time, '%a, %d %b %Y %H:%M:%S %Z')
-                    server_time = server_time.replace(tzinfo=pytz.utc).astimezone(pytz.timezone('Asia/Hong_Kong'))
-                else:
-                    # 如果没有pytz，简单地转换为本地时间
-                    server_time = datetime.datetime.strptime(server_time, '%a, %d %b %Y %H:%M:%S %Z')
-                    # 假设GMT+8
-                    server_time = server_time + datetime.timedelta(hours=8)
-                return server_time
-            else:
-                print(f"{Fore.YELLOW}无法获取服务器时间{Style.RESET_ALL}")
-        except Exception as e:
-            print(f"{Fore.YELLOW}使用系统默认网络获取服务器时间时发生错误: {str(e)}{Style.RESET_ALL}")
-        
-        time.sleep(5)  # 等待几秒钟后重试
+        time.sleep(1)  # 短暂等待后重试
     
     print(f"{Fore.RED}多次尝试后仍无法获取服务器时间{Style.RESET_ALL}")
     return None
 
-# 同步服务器时间
-def synchronize_with_server_time(server_time: datetime.datetime) -> datetime.datetime:
+def server_now(offset: float) -> datetime.datetime:
     """
-    将本地时间与服务器时间同步
+    按时钟偏移计算当前的服务器时间(香港时区)
     
     Args:
-        server_time: 服务器时间
+        offset: 时钟偏移(秒)
     
     Returns:
-        datetime.datetime: 同步后的本地时间
+        datetime.datetime: 服务器时间
     """
+    timestamp = time.time() + offset
     if PYTZ_AVAILABLE:
-        now = datetime.datetime.now(pytz.timezone('Asia/Hong_Kong'))
-    else:
-        now = datetime.datetime.now()
-    
-    time_difference = (server_time - now).total_seconds()
-
-    if abs(time_difference) > 0.001:
-        print(f"{Fore.CYAN}本地时间与服务器时间相差 {time_difference:.6f} 秒{Style.RESET_ALL}")
-        if time_difference > 0:
-            # 如果服务器时间比本地时间快，等待追赶
-            target_time = time.perf_counter() + time_difference
-            while time.perf_counter() < target_time:
-                pass
-        print(f"{Fore.GREEN}时间已校准{Style.RESET_ALL}")
-    else:
-        print(f"{Fore.GREEN}本地时间与服务器时间基本同步{Style.RESET_ALL}")
+        return datetime.datetime.fromtimestamp(timestamp, pytz.timezone('Asia/Hong_Kong'))
+    # 如果没有pytz，假设GMT+8
+    return datetime.datetime.utcfromtimestamp(timestamp) + datetime.timedelta(hours=8)
 
-    if PYTZ_AVAILABLE:
-        return datetime.datetime.now(pytz.timezone('Asia/Hong_Kong'))
-    else:
-        return datetime.datetime.now()
+def get_server_time(retries: int = 3, timeout: int = 5) -> Optional[datetime.datetime]:
+    """
+    从迪士尼服务器获取准确时间
+    
+    Args:
+        retries: 重试次数
+        timeout: 超时时间(秒)
+    
+    Returns:
+        datetime.datetime: 服务器时间，获取失败则返回None
+    """
+    report = get_clock_offset(retries, timeout)
+    return server_now(report["offset"]) if report else None
 
 # 解析命令行参数
 def parse_args():
@@ -208,141 +230,352 @@ def parse_args():
     parser.add_argument('--params', type=str, default='', help='启动参数')
     parser.add_argument('--now', action='store_true', help='立即启动，不等待指定时间')
     parser.add_argument('--no-sync', action='store_true', help='不与服务器同步时间，使用本地系统时间')
+    parser.add_argument('--time-url', action='append', default=None, help='校时地址，可重复指定，与默认地址一起经代理和直连并发探测')
+    parser.add_argument('--sync-threshold', type=float, default=DEFAULT_SYNC_THRESHOLD,
+                        help=f'自上次校时以来预测误差增长超过该值(秒)时才重新校时 (默认: {DEFAULT_SYNC_THRESHOLD})')
     parser.add_argument('--no-keyboard', action='store_true', help='禁用键盘监听（ESC键退出功能）')
+    parser.add_argument('--rate-cap', type=int, default=200, help='控制台每秒最多显示的输出行数，超过后只显示各实例汇总，0表示不限 (默认: 200)')
+    parser.add_argument('--restart', choices=RESTART_MODES, default='never',
+                        help='实例退出后的重启策略：never 不重启 / on-failure 退出码非0时重启 / always 总是重启 (默认: never)')
+    parser.add_argument('--max-restarts', type=int, default=5, help='每个实例连续重启的最大次数 (默认: 5)')
+    parser.add_argument('--heartbeat-timeout', type=float, default=0,
+                        help='实例超过该秒数没有任何输出视为无响应并重启，0表示不检查 (默认: 0)')
+    parser.add_argument('--stop-timeout', type=float, default=5, help='退出时等待所有实例结束的总时间(秒)，超时后强制结束 (默认: 5)')
+    parser.add_argument('--affinity', action='store_true', help='把实例轮询绑定到可用的CPU核心')
+    parser.add_argument('--no-reserve-core', action='store_true', help='绑定核心时不为启动器保留核心')
+    parser.add_argument('--boost', action='store_true', help='启动窗口内提高实例与启动器的优先级')
+    parser.add_argument('--boost-window', type=float, default=DEFAULT_BOOST_WINDOW,
+                        help=f'提高优先级的时长(秒)，从目标时刻(预创建模式下为放行时刻)开始计算 (默认: {DEFAULT_BOOST_WINDOW:.0f})')
+    parser.add_argument('--telemetry', type=float, default=0, help='按该间隔(秒)采样各实例的CPU、内存、线程与I/O，0表示不采样 (默认: 0)')
+    parser.add_argument('--telemetry-display', type=float, default=10, help='控制台每隔多少秒显示一次资源汇总，0表示只在结束时显示 (默认: 10)')
+    parser.add_argument('--telemetry-export', type=str, default='', help='结束时把资源采样历史导出到该文件，扩展名为.json时导出JSON，否则导出CSV')
+    parser.add_argument('--launch-strategy', choices=('all', 'stagger', 'waves', 'jitter'), default='all',
+                        help='启动计划: all 目标时刻同时启动 / stagger 每隔固定间隔启动一个 / waves 分波启动 / jitter 随机时刻启动 (默认: all)')
+    parser.add_argument('--launch-interval', type=float, default=0.5, help='stagger 的实例间隔、waves 的波间隔(秒) (默认: 0.5)')
+    parser.add_argument('--wave-size', type=int, default=5, help='waves 每波的实例数 (默认: 5)')
+    parser.add_argument('--jitter-window', type=float, default=1.0, help='jitter 在目标时刻后的随机窗口(秒) (默认: 1.0)')
+    parser.add_argument('--prewarm', action='store_true', help='预创建模式：进入精确倒计时时提前创建所有实例并挂起，到点同时放行')
     return parser.parse_args()
 
-# 读取进程输出并将其放入队列
-def reader_thread(pipe, queue, instance_id):
-    try:
-        while True:
-            line = pipe.readline()
-            if not line:
-                break
-            queue.put((instance_id, line.decode('utf-8', errors='replace').rstrip()))
-    except Exception as e:
-        queue.put((instance_id, f"[错误] 读取输出时出错: {str(e)}"))
-    finally:
-        pipe.close()
+# 实例的命令行
+def build_command(exe_path: str, launch_params: str) -> List[str]:
+    return [exe_path] + (launch_params.split() if launch_params else [])
 
 # 创建多个进程实例
-def create_instances(exe_path: str, instances: int, launch_params: str) -> List[subprocess.Popen]:
+def create_instances(exe_path: str, instances: int, launch_params: str,
+                     scheduler: Optional["PrecisionScheduler"] = None,
+                     gate: Optional["LaunchGate"] = None,
+                     supervisor: Optional[InstanceSupervisor] = None,
+                     placement: Optional[PlacementPolicy] = None,
+                     plan: Optional["LaunchPlan"] = None) -> Tuple[List[subprocess.Popen], OutputMultiplexer]:
     processes = []
-    output_queues = []
+    output_mux = OutputMultiplexer()
     
-    print(f"{Fore.CYAN}正在创建{instances}个进程实例...{Style.RESET_ALL}")
+    print(f"{Fore.CYAN}正在{'预' if gate else ''}创建{instances}个进程实例...{Style.RESET_ALL}")
     
-    cmd_base = [exe_path] + (launch_params.split() if launch_params else [])
+    cmd_base = build_command(exe_path, launch_params)
     
-    for i in range(instances):
+    def launch(i: int):
         try:
-            # 使用PIPE模式捕获输出
-            process = subprocess.Popen(
+            # stdout/stderr 由多路复用器创建管道并统一读取
+            # 预创建模式下实例停在启动闸门前，由 release_instances 统一放行
+            process = output_mux.spawn(
+                i,
+                gate.spawn if gate else subprocess.Popen,
                 cmd_base,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                bufsize=1,
-                universal_newlines=False,
                 creationflags=subprocess.CREATE_NO_WINDOW
             )
-            processes.append(process)
-            
-            # 为每个进程创建输出队列
-            output_queue = queue.Queue()
-            output_queues.append(output_queue)
-            
-            # 为stdout和stderr创建读取线程
-            stdout_thread = threading.Thread(
-                target=reader_thread, 
-                args=(process.stdout, output_queue, i)
-            )
-            stderr_thread = threading.Thread(
-                target=reader_thread, 
-                args=(process.stderr, output_queue, i)
-            )
-            
-            stdout_thread.daemon = True
-            stderr_thread.daemon = True
-            stdout_thread.start()
-            stderr_thread.start()
-            
-            print(f"{INSTANCE_COLORS[i % len(INSTANCE_COLORS)]}实例 #{i+1} 已启动 (PID: {process.pid}){Style.RESET_ALL}")
         except Exception as e:
             print(f"{Fore.RED}启动实例 #{i+1} 失败: {str(e)}{Style.RESET_ALL}")
+            raise
+        processes.append(process)
+        if supervisor:
+            supervisor.adopt(i, process)
+        if placement:
+            # 预创建的实例在放行前绑定核心，exec/恢复后保持不变
+            placement.place(i, process.pid)
+        if TELEMETRY:
+            TELEMETRY.track(i, process.pid)
+        
+        print(f"{INSTANCE_COLORS[i % len(INSTANCE_COLORS)]}实例 #{i+1} 已{'预创建' if gate else '启动'} (PID: {process.pid}){Style.RESET_ALL}")
+    
+    if plan and not gate:
+        # 按启动计划精确等待到每一波的计划时刻，逐个记录相对计划时刻的误差
+        def on_launch(record: Dict):
+            logging.info(format_launch(record), extra={"console": False})
+        
+        records = run_plan(plan, instances, launch, scheduler, cancel=lambda: EXIT_FLAG, on_launch=on_launch)
+        if plan.strategy != "all":
+            for item in wave_summary(records):
+                print(f"{Fore.CYAN}{format_wave(item)}{Style.RESET_ALL}")
+                logging.info(format_wave(item), extra={"console": False})
+    else:
+        for i in range(instances):
+            try:
+                launch(i)
+            except Exception:
+                continue
+            if scheduler and not gate:
+                # 记录本实例相对目标时刻的启动误差
+                scheduler.record("实例")
     
-    return processes, output_queues
+    if scheduler and processes and not gate:
+        summary = format_stats(scheduler.jitter_stats("实例"))
+        print(f"{Fore.CYAN}实例启动误差: {summary}{Style.RESET_ALL}")
+        logging.info(f"实例启动误差: {summary}")
+    
+    return processes, output_mux
+
+# 放行预创建的实例
+def release_instances(gate: "LaunchGate", scheduler: Optional["PrecisionScheduler"] = None,
+                      supervisor: Optional[InstanceSupervisor] = None,
+                      placement: Optional[PlacementPolicy] = None):
+    """
+    同时放行所有预创建的实例，并报告各实例实际开始时刻的离散程度
+    
+    Args:
+        gate: 预创建实例所用的启动闸门
+        scheduler: 已触发的调度器，提供时按目标时刻计算各实例的启动误差
+        supervisor: 实例监管器，放行后从放行时刻开始计算心跳超时与稳定运行时间
+        placement: 核心放置策略，放行后开始启动窗口并提高优先级
+    """
+    start_times = gate.release()
+    if supervisor:
+        supervisor.mark_started()
+    if placement:
+        placement.begin_boost()
+    target_perf = None
+    if scheduler:
+        target_perf = scheduler.perf_of(scheduler.target)
+        for started in start_times:
+            scheduler.record("实例", started)
+    
+    summary = format_spread(spread_stats(start_times, target_perf))
+    print(f"{Fore.GREEN}已同时放行预创建的实例: {summary}{Style.RESET_ALL}")
+    logging.info(f"预创建实例启动时刻: {summary}")
+
+# 将实例输出完整写入日志文件(不输出到控制台)
+def log_instance_line(instance_id: int, line: str):
+    logging.getLogger('instances').info(f"[实例 #{instance_id+1}] {line}", extra={"console": False})
+
+# 创建实例监管器
+def create_supervisor(exe_path: str, launch_params: str, args) -> InstanceSupervisor:
+    """
+    创建实例监管器，重启的实例同样接入 OUTPUT_MUX
+    
+    Args:
+        exe_path: 目标程序路径
+        launch_params: 启动参数
+        args: 命令行参数(重启策略、心跳超时)
+    """
+    cmd_base = build_command(exe_path, launch_params)
+    
+    def spawn(instance_id: int) -> subprocess.Popen:
+        process = OUTPUT_MUX.spawn(instance_id, subprocess.Popen, cmd_base, creationflags=subprocess.CREATE_NO_WINDOW)
+        if PLACEMENT:
+            PLACEMENT.place(instance_id, process.pid)
+        if TELEMETRY:
+            TELEMETRY.track(instance_id, process.pid)
+        return process
+    
+    def on_event(instance_id: int, message: str, problem: bool):
+        color = Fore.RED if problem else INSTANCE_COLORS[instance_id % len(INSTANCE_COLORS)]
+        print(f"{color}实例 #{instance_id+1} {message}{Style.RESET_ALL}")
+        logging.log(logging.WARNING if problem else logging.INFO, f"实例 #{instance_id+1} {message}", extra={"console": False})
+    
+    return InstanceSupervisor(
+        spawn,
+        RestartPolicy(args.restart, max_restarts=args.max_restarts),
+        heartbeat_timeout=args.heartbeat_timeout or None,
+        on_event=on_event
+    )
 
 # 显示进程输出
-def display_output(output_queues: List[queue.Queue], processes: List[subprocess.Popen]):
+def display_output(output_mux: OutputMultiplexer, supervisor: InstanceSupervisor, rate_cap: int = 200,
+                   placement: Optional[PlacementPolicy] = None,
+                   telemetry: Optional[TelemetrySampler] = None, telemetry_display: float = 10):
     print(f"\n{Fore.GREEN}======== 所有实例已启动，开始监控输出 ========{Style.RESET_ALL}")
     
-    while not EXIT_FLAG and any(p.poll() is None for p in processes):
-        for i, q in enumerate(output_queues):
-            try:
-                # 非阻塞方式获取输出
-                while not q.empty():
-                    instance_id, line = q.get_nowait()
-                    color = INSTANCE_COLORS[instance_id % len(INSTANCE_COLORS)]
-                    print(f"{color}[实例 #{instance_id+1}] {line}{Style.RESET_ALL}")
-            except queue.Empty:
-                pass
-            except Exception as e:
-                print(f"{Fore.RED}处理输出时出错: {str(e)}{Style.RESET_ALL}")
-        
-        time.sleep(0.1)  # 短暂休眠，避免CPU占用过高
+    # 每50ms合并输出一次，重复行折叠为 ×N，超过每秒行数上限时只显示汇总
+    renderer = ConsoleRenderer(colors=INSTANCE_COLORS, reset=Style.RESET_ALL,
+                               rate_cap=rate_cap, log=log_instance_line)
     
-    # 检查是哪些进程已经结束
-    for i, process in enumerate(processes):
-        if process.poll() is not None:
-            print(f"{Fore.YELLOW}实例 #{i+1} (PID: {process.pid}) 已结束，退出代码: {process.poll()}{Style.RESET_ALL}")
+    # 资源汇总由采样线程提供，这里只读取最新的采样点
+    next_telemetry = time.monotonic() + telemetry_display
+    
+    # 阻塞等待任一实例的输出、下一帧或下一次重启；超时也用于及时响应退出标志
+    while not EXIT_FLAG and (not supervisor.finished() or output_mux.open_streams):
+        try:
+            frame_in = renderer.next_frame_in()
+            timeout = supervisor.next_check_in() if frame_in is None else min(frame_in, supervisor.next_check_in())
+            for instance_id, _, line in output_mux.poll(timeout=timeout):
+                supervisor.heartbeat(instance_id)
+                renderer.add(instance_id, line)
+            renderer.render()
+            supervisor.check()
+            if placement:
+                placement.tick()
+            if telemetry and telemetry_display and time.monotonic() >= next_telemetry:
+                next_telemetry = time.monotonic() + telemetry_display
+                summary = format_totals(telemetry.totals())
+                print(f"{Fore.CYAN}资源: {summary}{Style.RESET_ALL}")
+                logging.info(f"资源: {summary}", extra={"console": False})
+        except Exception as e:
+            print(f"{Fore.RED}处理输出时出错: {str(e)}{Style.RESET_ALL}")
+    
+    # 显示进程结束前最后写出的内容
+    for instance_id, _, line in output_mux.poll(timeout=0):
+        renderer.add(instance_id, line)
+    renderer.render(force=True)
+    if renderer.shown_lines < renderer.total_lines:
+        details = []
+        if renderer.collapsed_lines:
+            details.append(f"重复折叠 {renderer.collapsed_lines} 行")
+        if renderer.suppressed_lines:
+            details.append(f"限速省略 {renderer.suppressed_lines} 行 (汇总 {renderer.summary_lines} 条)")
+        print(f"{Fore.CYAN}共输出 {renderer.total_lines} 行，控制台逐行显示 {renderer.shown_lines} 行，"
+              f"{'，'.join(details)}，完整内容见日志{Style.RESET_ALL}")
+    
+    # 各实例的最终状态
+    for item in supervisor.summary():
+        if item["exit_code"] is not None:
+            restarts = f"，重启 {item['restarts']} 次" if item["restarts"] else ""
+            print(f"{Fore.YELLOW}实例 #{item['instance_id']+1} (PID: {item['pid']}) {item['state']}，"
+                  f"退出代码: {item['exit_code']}{restarts}{Style.RESET_ALL}")
+    
+    # 各实例的CPU统计，用于观察核心放置与优先级的效果
+    if placement:
+        placement.sample()
+        for item in placement.report():
+            line = format_report_line(item)
+            print(f"{INSTANCE_COLORS[item['instance_id'] % len(INSTANCE_COLORS)]}{line}{Style.RESET_ALL}")
+            logging.info(line, extra={"console": False})
+    
+    # 各实例最后一次资源采样
+    if telemetry:
+        for instance_id, item in sorted(telemetry.latest().items()):
+            line = format_instance(instance_id, item)
+            print(f"{INSTANCE_COLORS[instance_id % len(INSTANCE_COLORS)]}{line}{Style.RESET_ALL}")
+            logging.info(line, extra={"console": False})
 
 # 清理所有进程
-def cleanup_all_processes():
+def cleanup_all_processes(timeout: float = 5):
+    """同时终止所有实例，共用一个截止时间，超时后一起强制结束"""
     print(f"{Fore.YELLOW}正在终止所有进程...{Style.RESET_ALL}")
     
-    for i, process in enumerate(PROCESSES):
-        try:
-            if process.poll() is None:  # 如果进程仍在运行
-                process.terminate()
-                try:
-                    # 等待进程终止，最多5秒
-                    process.wait(timeout=5)
-                except subprocess.TimeoutExpired:
-                    # 如果超时，强制终止
-                    process.kill()
-                print(f"{Fore.YELLOW}已终止实例 #{i+1} (PID: {process.pid}){Style.RESET_ALL}")
-        except Exception as e:
-            print(f"{Fore.RED}终止实例 #{i+1} 失败: {str(e)}{Style.RESET_ALL}")
-            try:
-                process.kill()
-            except:
-                pass
+    try:
+        result = SUPERVISOR.shutdown(timeout) if SUPERVISOR else shutdown_processes(PROCESSES, timeout)
+        if result["terminated"] or result["killed"]:
+            print(f"{Fore.YELLOW}已终止 {result['terminated']} 个实例，强制结束 {result['killed']} 个实例{Style.RESET_ALL}")
+    except Exception as e:
+        print(f"{Fore.RED}终止实例失败: {str(e)}{Style.RESET_ALL}")
     
     print(f"{Fore.GREEN}所有进程已清理完成{Style.RESET_ALL}")
 
+# 显示倒计时
+def print_countdown(remaining: float):
+    hours = int(remaining // 3600)
+    minutes = int((remaining % 3600) // 60)
+    seconds = int(remaining % 60)
+    
+    # 构建倒计时显示文本
+    countdown_text = f"{Fore.CYAN}倒计时: "
+    if hours > 0:
+        countdown_text += f"{hours}时 "
+    if minutes > 0:
+        countdown_text += f"{minutes}分 "
+    countdown_text += f"{seconds}秒{Style.RESET_ALL}"
+    
+    print(f"\r{countdown_text}", end='', flush=True)
+
+# 精确等待到目标时刻
+def precise_wait(target_timestamp: float, offset: float,
+                 on_precise: Optional[Callable[[], None]] = None) -> Optional["PrecisionScheduler"]:
+    """
+    先睡眠、最后几毫秒忙等，在目标时刻返回并记录触发误差
+    
+    Args:
+        target_timestamp: 目标时刻(服务器时间的Unix时间戳)
+        offset: 时钟偏移(秒)，服务器时间 = 本地时间 + offset
+        on_precise: 开始精确等待前调用(如预创建实例)
+    
+    Returns:
+        PrecisionScheduler: 已触发的调度器(用于继续记录各实例的启动误差)，取消时返回None
+    """
+    if on_precise:
+        on_precise()
+    scheduler = PrecisionScheduler(offset)
+    fired = scheduler.wait_until(target_timestamp, cancel=lambda: EXIT_FLAG, on_tick=print_countdown)
+    if fired is None:
+        print(f"\n{Fore.YELLOW}倒计时已取消{Style.RESET_ALL}")
+        return None
+    
+    print(f"\n{Fore.GREEN}时间到！开始启动实例... (触发误差 {fired['error'] * 1000:+.3f} ms){Style.RESET_ALL}")
+    logging.info(f"定时触发误差: {fired['error'] * 1000:+.3f} ms")
+    return scheduler
+
 # 等待直到指定时间
-def wait_until_time(target_time_str: str, sync_with_server: bool = True) -> None:
+def wait_until_time(target_time_str: str, sync_with_server: bool = True,
+                    on_precise: Optional[Callable[[], None]] = None,
+                    sources: Optional[List[Tuple[str, Optional[str]]]] = None,
+                    sync_threshold: float = DEFAULT_SYNC_THRESHOLD) -> Optional["PrecisionScheduler"]:
     """
     等待直到指定时间
     
+    校时结果缓存在 CLOCK_CACHE_FILE 中并拟合时钟漂移，只有预测误差自上次校时以来
+    增长超过 sync_threshold 时才重新校时
+    
     Args:
         target_time_str: 目标时间，格式为HH:MM
         sync_with_server: 是否与服务器同步时间
+        on_precise: 距目标时间不到5分钟、进入精确倒计时时调用
+        sources: 校时来源 [(校时地址, 代理或None), ...]
+        sync_threshold: 重新校时的预测误差增长阈值(秒)
+    
+    Returns:
+        PrecisionScheduler: 已触发的调度器，取消或调度器不可用时返回None
     """
     hour, minute = map(int, target_time_str.split(':'))
     
+    if not CLOCK_SYNC_AVAILABLE:
+        print(f"{Fore.YELLOW}无法导入时钟偏移估计与精确定时模块，使用本地系统时间{Style.RESET_ALL}")
+        now = datetime.datetime.now()
+        target_time = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if target_time < now:
+            target_time = target_time + datetime.timedelta(days=1)
+        if on_precise:
+            on_precise()
+        while not EXIT_FLAG and time.time() < target_time.timestamp():
+            print_countdown(target_time.timestamp() - time.time())
+            time.sleep(min(0.1, max(0.0, target_time.timestamp() - time.time())))
+        return None
+    
     if sync_with_server:
         print(f"{Fore.CYAN}开始与迪士尼服务器同步时间...{Style.RESET_ALL}")
         
+        model = ClockDriftModel.load(CLOCK_CACHE_FILE)
+        if model.samples:
+            print(f"{Fore.CYAN}已加载 {len(model.samples)} 条缓存的校时记录，"
+                  f"预测偏移 {model.predict() * 1000:+.1f} ms (±{model.predicted_error() * 1000:.1f} ms){Style.RESET_ALL}")
+        
+        # 需要使用偏移的本地时间，None 表示当前时间
+        use_at = None
         while True:
-            server_time = get_server_time()
-            if not server_time:
-                print(f"{Fore.YELLOW}无法获取服务器时间，30秒后重试...{Style.RESET_ALL}")
-                time.sleep(30)
-                continue
-                
-            print(f"{Fore.GREEN}服务器时间: {server_time}{Style.RESET_ALL}")
-            precise_time = synchronize_with_server_time(server_time)
-            print(f"{Fore.GREEN}校准后的本地时间: {precise_time}{Style.RESET_ALL}")
+            if model.needs_resync(sync_threshold, use_at):
+                report = get_clock_offset(sources=sources)
+                if report:
+                    model.add(report)
+                    model.save(CLOCK_CACHE_FILE)
+                elif not model.samples:
+                    print(f"{Fore.YELLOW}无法获取服务器时间，30秒后重试...{Style.RESET_ALL}")
+                    time.sleep(30)
+                    continue
+                else:
+                    print(f"{Fore.YELLOW}校时失败，继续使用缓存的漂移模型预测偏移{Style.RESET_ALL}")
+            
+            offset = model.predict(use_at)
+            precise_time = server_now(offset)
+            print(f"{Fore.GREEN}服务器时间: {precise_time}{Style.RESET_ALL}")
             
             # 构建今天的目标时间
             if PYTZ_AVAILABLE:
@@ -370,61 +603,32 @@ def wait_until_time(target_time_str: str, sync_with_server: bool = True) -> None
             # 计算时间差(秒)
             time_diff = (target_time - precise_time).total_seconds()
             
-            # 如果距离目标时间还有超过5分钟，每30秒同步一次服务器时间
+            # 如果距离目标时间还有超过5分钟，每30秒检查一次预测误差
             if time_diff > 300:
-                # 计算剩余时间的小时、分钟和秒
-                hours = int(time_diff // 3600)
-                minutes = int((time_diff % 3600) // 60)
-                seconds = int(time_diff % 60)
-                
-                # 构建倒计时显示文本
-                countdown_text = f"{Fore.CYAN}倒计时: "
-                if hours > 0:
-                    countdown_text += f"{hours}时 "
-                if minutes > 0:
-                    countdown_text += f"{minutes}分 "
-                countdown_text += f"{seconds}秒{Style.RESET_ALL}"
-                
-                print(f"\r{countdown_text}", end='', flush=True)
-                print(f"\n{Fore.CYAN}距离目标时间还有 {int(time_diff)} 秒 ({int(time_diff/60)} 分钟)，继续同步服务器时间...{Style.RESET_ALL}")
+                print_countdown(time_diff)
+                print(f"\n{Fore.CYAN}距离目标时间还有 {int(time_diff)} 秒 ({int(time_diff/60)} 分钟)，"
+                      f"当前预测误差 ±{model.predicted_error() * 1000:.1f} ms{Style.RESET_ALL}")
+                use_at = None
                 time.sleep(30)
                 continue
-                
-            # 如果距离目标时间不到5分钟，进入精确倒计时
-            print(f"\n{Fore.GREEN}进入精确倒计时阶段...{Style.RESET_ALL}")
             
-            # 倒计时直到目标时间前0.5秒
-            while True:
-                if EXIT_FLAG:
-                    print(f"\n{Fore.YELLOW}倒计时已取消{Style.RESET_ALL}")
-                    return
-                
-                if PYTZ_AVAILABLE:
-                    now = datetime.datetime.now(pytz.timezone('Asia/Hong_Kong'))
-                else:
-                    now = datetime.datetime.now()
-                
-                time_diff = (target_time - now).total_seconds()
-                
-                if time_diff <= 0.5:
-                    print(f"\n{Fore.GREEN}时间到！开始启动实例...{Style.RESET_ALL}")
-                    return
-                
-                # 计算剩余时间的小时、分钟和秒
-                hours = int(time_diff // 3600)
-                minutes = int((time_diff % 3600) // 60)
-                seconds = int(time_diff % 60)
-                
-                # 构建倒计时显示文本
-                countdown_text = f"{Fore.CYAN}倒计时: "
-                if hours > 0:
-                    countdown_text += f"{hours}时 "
-                if minutes > 0:
-                    countdown_text += f"{minutes}分 "
-                countdown_text += f"{seconds}秒{Style.RESET_ALL}"
-                
-                print(f"\r{countdown_text}", end='', flush=True)
-                time.sleep(0.1)
+            if PYTZ_AVAILABLE:
+                target_timestamp = target_time.timestamp()
+            else:
+                # 没有pytz时目标时间是GMT+8的本地表示
+                target_timestamp = (target_time - datetime.timedelta(hours=8)).replace(
+                    tzinfo=datetime.timezone.utc).timestamp()
+            
+            # 进入精确倒计时前，按目标时刻的预测误差决定是否最后校时一次
+            if use_at is None and model.needs_resync(sync_threshold, target_timestamp - offset):
+                use_at = target_timestamp - offset
+                continue
+            
+            # 如果距离目标时间不到5分钟，进入精确倒计时
+            offset = model.predict(target_timestamp - offset)
+            print(f"\n{Fore.GREEN}进入精确倒计时阶段... (偏移 {offset * 1000:+.1f} ms, "
+                  f"预测误差 ±{model.predicted_error(target_timestamp - offset) * 1000:.1f} ms){Style.RESET_ALL}")
+            return precise_wait(target_timestamp, offset, on_precise)
     else:
         # 不与服务器同步，使用本地时间
         now = datetime.datetime.now()
@@ -440,50 +644,11 @@ def wait_until_time(target_time_str: str, sync_with_server: bool = True) -> None
         print(f"{Fore.CYAN}使用本地时间，目标启动时间: {target_time.strftime('%Y-%m-%d %H:%M:%S')}{Style.RESET_ALL}")
         print(f"{Fore.CYAN}距离目标时间还有 {int(time_diff)} 秒 ({int(time_diff/60)} 分钟){Style.RESET_ALL}")
         
-        # 如果时间差大于5分钟，每分钟更新一次倒计时
-        if time_diff > 300:
-            update_interval = 60  # 每分钟更新一次
-        else:
-            update_interval = 1  # 每秒更新一次
-        
-        start_time = time.time()
-        last_update = 0
-        
-        while True:
-            if EXIT_FLAG:
-                print(f"\n{Fore.YELLOW}倒计时已取消{Style.RESET_ALL}")
-                return
-            
-            elapsed = time.time() - start_time
-            remaining = time_diff - elapsed
-            
-            if remaining <= 0.5:
-                print(f"\n{Fore.GREEN}时间到！开始启动实例...{Style.RESET_ALL}")
-                return
-            
-            # 定期更新倒计时
-            current_update = int(remaining / update_interval)
-            if current_update != last_update:
-                last_update = current_update
-                hours = int(remaining // 3600)
-                minutes = int((remaining % 3600) // 60)
-                seconds = int(remaining % 60)
-                
-                # 构建倒计时显示文本
-                countdown_text = f"{Fore.CYAN}倒计时: "
-                if hours > 0:
-                    countdown_text += f"{hours}时 "
-                if minutes > 0:
-                    countdown_text += f"{minutes}分 "
-                countdown_text += f"{seconds}秒{Style.RESET_ALL}"
-                
-                print(f"\r{countdown_text}", end='', flush=True)
-            
-            time.sleep(0.1)
+        return precise_wait(target_time.timestamp(), 0.0, on_precise)
 
 # 主函数
 def main():
-    global PROCESSES, OUTPUT_QUEUES, EXIT_FLAG
+    global PROCESSES, OUTPUT_MUX, SUPERVISOR, PLACEMENT, TELEMETRY, EXIT_FLAG
     
     # 解析命令行参数
     args = parse_args()
@@ -505,6 +670,7 @@ def main():
     
     signal.signal(signal.SIGINT, signal_handler)
     
+    gate = None
     try:
         # 验证exe文件是否存在
         exe_path = os.path.join(os.getcwd(), args.exe)
@@ -518,31 +684,104 @@ def main():
         print(f"{Fore.CYAN}启动参数: {args.params}{Style.RESET_ALL}")
         print(f"{Fore.CYAN}日志文件: {log_file}{Style.RESET_ALL}")
         
+        # 预创建模式：进入精确倒计时时提前创建实例，到点只需放行
+        if args.prewarm and not LAUNCH_GATE_AVAILABLE:
+            print(f"{Fore.YELLOW}无法导入启动闸门模块，预创建模式不可用{Style.RESET_ALL}")
+        if args.prewarm and LAUNCH_GATE_AVAILABLE:
+            gate = LaunchGate()
+        
+        SUPERVISOR = create_supervisor(exe_path, args.params, args)
+        
+        # 资源遥测：后台线程按间隔采样，实例创建时逐个跟踪
+        if args.telemetry > 0:
+            TELEMETRY = TelemetrySampler(args.telemetry)
+            if TELEMETRY.available:
+                TELEMETRY.start()
+                print(f"{Fore.CYAN}资源采样间隔: {args.telemetry:g} 秒{Style.RESET_ALL}")
+            else:
+                print(f"{Fore.YELLOW}未安装psutil，资源采样不可用{Style.RESET_ALL}")
+                TELEMETRY = None
+        
+        # 启动计划：各实例相对目标时刻的启动偏移
+        plan = None
+        if LAUNCH_PLAN_AVAILABLE:
+            plan = LaunchPlan(args.launch_strategy, args.launch_interval, args.wave_size, args.jitter_window)
+            if gate and args.launch_strategy != 'all':
+                print(f"{Fore.YELLOW}预创建模式下所有实例同时放行，忽略启动计划 {args.launch_strategy}{Style.RESET_ALL}")
+            else:
+                print(f"{Fore.CYAN}启动计划: {plan.describe()}{Style.RESET_ALL}")
+        elif args.launch_strategy != 'all':
+            print(f"{Fore.YELLOW}无法导入启动计划模块，所有实例将同时启动{Style.RESET_ALL}")
+        
+        # 核心放置与优先级：启动器先绑定到保留核心，实例创建时逐个放置，到目标时刻才提高优先级
+        if args.affinity or args.boost:
+            PLACEMENT = PlacementPolicy(
+                affinity=args.affinity,
+                reserve_launcher_core=not args.no_reserve_core,
+                boost=args.boost,
+                boost_window=args.boost_window,
+                on_warning=lambda message: print(f"{Fore.YELLOW}{message}{Style.RESET_ALL}")
+            )
+            print(f"{Fore.CYAN}CPU放置: {PLACEMENT.describe()}{Style.RESET_ALL}")
+            PLACEMENT.apply_launcher()
+        
+        def prewarm():
+            global PROCESSES, OUTPUT_MUX
+            print(f"\n{Fore.GREEN}预创建 {args.instances} 个 {args.exe} 实例...{Style.RESET_ALL}")
+            PROCESSES, OUTPUT_MUX = create_instances(exe_path, args.instances, args.params, gate=gate,
+                                                     supervisor=SUPERVISOR, placement=PLACEMENT)
+        
         # 是否立即启动
+        scheduler = None
         if args.now:
             print(f"{Fore.YELLOW}使用立即启动模式，跳过倒计时{Style.RESET_ALL}")
+            if gate:
+                prewarm()
         else:
             print(f"{Fore.CYAN}目标启动时间: {args.time}{Style.RESET_ALL}")
             # 等待直到指定时间
-            wait_until_time(args.time, not args.no_sync)
+            sources = default_sources([DEFAULT_TIME_URL] + (args.time_url or [])) if CLOCK_SYNC_AVAILABLE else None
+            scheduler = wait_until_time(args.time, not args.no_sync, prewarm if gate else None,
+                                        sources, args.sync_threshold)
             if EXIT_FLAG:
                 print(f"{Fore.YELLOW}启动已取消{Style.RESET_ALL}")
                 return 0
         
         # 创建并启动实例
-        print(f"{Fore.GREEN}准备启动 {args.instances} 个 {args.exe} 实例...{Style.RESET_ALL}")
-        PROCESSES, OUTPUT_QUEUES = create_instances(exe_path, args.instances, args.params)
+        if gate:
+            release_instances(gate, scheduler, SUPERVISOR, PLACEMENT)
+        else:
+            print(f"{Fore.GREEN}准备启动 {args.instances} 个 {args.exe} 实例...{Style.RESET_ALL}")
+            if PLACEMENT:
+                PLACEMENT.begin_boost()
+            PROCESSES, OUTPUT_MUX = create_instances(exe_path, args.instances, args.params, scheduler,
+                                                     supervisor=SUPERVISOR, placement=PLACEMENT, plan=plan)
         
         # 监控并显示输出
-        display_output(OUTPUT_QUEUES, PROCESSES)
+        display_output(OUTPUT_MUX, SUPERVISOR, args.rate_cap, PLACEMENT, TELEMETRY, args.telemetry_display)
         
     except KeyboardInterrupt:
         print(f"\n{Fore.YELLOW}收到键盘中断，正在退出...{Style.RESET_ALL}")
     except Exception as e:
         print(f"{Fore.RED}运行时错误: {str(e)}{Style.RESET_ALL}")
     finally:
+        # 未放行的预创建实例在闸门关闭后直接退出，不会运行目标程序
+        if gate:
+            gate.close()
+        if PLACEMENT:
+            PLACEMENT.end_boost()
+        if TELEMETRY:
+            TELEMETRY.stop()
+            if args.telemetry_export:
+                try:
+                    count = TELEMETRY.export(args.telemetry_export)
+                    print(f"{Fore.GREEN}已导出 {count} 个资源采样点到 {args.telemetry_export}{Style.RESET_ALL}")
+                except OSError as e:
+                    print(f"{Fore.RED}导出资源采样失败: {str(e)}{Style.RESET_ALL}")
         # 清理所有进程
-        cleanup_all_processes()
+        cleanup_all_processes(args.stop_timeout)
+        if OUTPUT_MUX:
+            OUTPUT_MUX.close()
     
     print(f"{Fore.GREEN}程序已安全退出{Style.RESET_ALL}")
     return 0
@@ -48,6 +48,34 @@ except ImportError:
     logging.warning("无法导入pytz或requests模块，时间同步功能可能受限")
     HAS_PYTZ = False
 
+# 导入并发校时
+try:
+    from clock_sync import default_sources, estimate_first, format_report
+    HAS_CLOCK_SYNC = True
+except ImportError:
+    HAS_CLOCK_SYNC = False
+
+# 导入CPU核心放置与启动窗口优先级
+try:
+    from cpu_placement import PlacementPolicy, format_report_line
+    HAS_CPU_PLACEMENT = True
+except ImportError:
+    HAS_CPU_PLACEMENT = False
+
+# 导入启动计划(同时 / 固定间隔 / 分波 / 随机抖动)
+try:
+    from launch_plan import LaunchPlan, run_plan, wave_summary, format_launch, format_wave
+    HAS_LAUNCH_PLAN = True
+except ImportError:
+    HAS_LAUNCH_PLAN = False
+
+# 导入实例进程的资源遥测
+try:
+    from process_telemetry import TelemetrySampler, PSUTIL_AVAILABLE, format_totals
+    HAS_TELEMETRY = PSUTIL_AVAILABLE
+except ImportError:
+    HAS_TELEMETRY = False
+
 # 导入默认配置
 try:
     from default_config import DEFAULT_CONFIG, PRESET_TIMES, AVAILABLE_THEMES, USER_CONFIG_PATH
@@ -87,12 +115,21 @@ from PyQt6.QtGui import QFont, QColor, QTextCursor, QIcon, QTextCharFormat, QFon
 from qt_material import apply_stylesheet, QtStyleTools
 
 # 设置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    handlers=[logging.StreamHandler(sys.stdout)],  # 确保日志输出到标准输出
-    encoding="utf-8"  # 显式指定编码
-)
+try:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from utilities import LogManager
+    # 非阻塞队列日志: UI线程只做入队，输出由后台线程完成
+    LogManager.setup_queue_logging(
+        fmt='%(asctime)s [%(levelname)s] %(message)s',
+        console_stream=sys.stdout,  # 确保日志输出到标准输出
+    )
+except ImportError:
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s [%(levelname)s] %(message)s',
+        handlers=[logging.StreamHandler(sys.stdout)],  # 确保日志输出到标准输出
+        encoding="utf-8"  # 显式指定编码
+    )
 
 # 确保Qt应用程序正确处理中文
 def setup_ui_environment():
@@ -192,46 +229,48 @@ class LogMonitor(QTextEdit):
 class ProcessManager:
     """进程管理器，用于启动和管理多个进程实例"""
     
-    def __init__(self):
+    def __init__(self, placement: Optional["PlacementPolicy"] = None, plan: Optional["LaunchPlan"] = None,
+                 telemetry: Optional["TelemetrySampler"] = None):
         self.processes = []
         self.output_queues = []
         self.exit_flag = False
+        # 实例的核心放置、优先级与CPU统计，None 表示不调整
+        self.placement = placement
+        # 启动计划，None 时每隔0.5秒启动一个实例
+        self.plan = plan
+        # 上一次按计划启动的各实例记录
+        self.launch_records = []
+        # 资源遥测采样器，None 表示不采样
+        self.telemetry = telemetry
         
     def start_instances(self, exe_path: str, instances: int, launch_params: str) -> List[QProcess]:
-        """启动多个进程实例并收集它们的输出"""
+        """按启动计划启动多个进程实例并收集它们的输出"""
         self.processes = []
         self.output_queues = []
+        self.launch_records = []
+        self.exit_flag = False
         
-        cmd_base = [exe_path] + (launch_params.split() if launch_params else [])
+        # 定时器触发即目标时刻，从此开始启动窗口
+        if self.placement:
+            self.placement.begin_boost()
         
-        for i in range(instances):
-            # 创建输出队列
-            output_queue = queue.Queue()
-            self.output_queues.append(output_queue)
-            
-            # 创建进程
-            process = QProcess()
+        if self.plan:
+            # 以调用时刻(定时器触发的目标时刻)为基准，精确等待到每一波的计划时刻
+            def on_launch(record: Dict):
+                logging.info(format_launch(record))
             
-            # 设置进程环境变量，确保使用UTF-8编码
-            env = process.processEnvironment()
-            env.insert("PYTHONIOENCODING", "utf-8")
-            env.insert("PYTHONUTF8", "1")
-            process.setProcessEnvironment(env)
-            
-            # 设置工作目录
-            process.setWorkingDirectory(os.path.dirname(os.path.abspath(exe_path)))
-            
-            # 连接输出信号
-            process.readyReadStandardOutput.connect(
-                lambda p=process, q=output_queue, id=i: self._handle_stdout(p, q, id))
-            process.readyReadStandardError.connect(
-                lambda p=process, q=output_queue, id=i: self._handle_stderr(p, q, id))
-            
-            # 启动进程
-            process.start(exe_path, launch_params.split() if launch_params else [])
-            self.processes.append(process)
-            
-            logging.info(f"实例 #{i+1} 已启动")
+            self.launch_records = run_plan(
+                self.plan, instances,
+                lambda i: self._start_instance(i, exe_path, launch_params),
+                cancel=lambda: self.exit_flag,
+                on_launch=on_launch
+            )
+            for item in wave_summary(self.launch_records):
+                logging.info(format_wave(item))
+            return self.processes
+        
+        for i in range(instances):
+            self._start_instance(i, exe_path, launch_params)
             
             # 短暂延迟，避免同时启动过多实例
             if i < instances - 1:
@@ -239,6 +278,47 @@ class ProcessManager:
         
         return self.processes
     
+    def _start_instance(self, i: int, exe_path: str, launch_params: str) -> QProcess:
+        """启动第i个实例"""
+        # 创建输出队列
+        output_queue = queue.Queue()
+        self.output_queues.append(output_queue)
+        
+        # 创建进程
+        process = QProcess()
+        
+        # 设置进程环境变量，确保使用UTF-8编码
+        env = process.processEnvironment()
+        env.insert("PYTHONIOENCODING", "utf-8")
+        env.insert("PYTHONUTF8", "1")
+        process.setProcessEnvironment(env)
+        
+        # 设置工作目录
+        process.setWorkingDirectory(os.path.dirname(os.path.abspath(exe_path)))
+        
+        # 连接输出信号
+        process.readyReadStandardOutput.connect(
+            lambda p=process, q=output_queue, id=i: self._handle_stdout(p, q, id))
+        process.readyReadStandardError.connect(
+            lambda p=process, q=output_queue, id=i: self._handle_stderr(p, q, id))
+        
+        # 启动进程
+        process.start(exe_path, launch_params.split() if launch_params else [])
+        self.processes.append(process)
+        
+        # 进程启动后才有PID，再绑定核心、提高优先级并开始资源采样
+        if (self.placement or self.telemetry) and process.waitForStarted(3000):
+            pid = process.processId()
+            if self.placement:
+                core = self.placement.place(i, pid)
+                if core is not None:
+                    logging.info(f"实例 #{i+1} 已绑定到核心 {core}")
+            if self.telemetry:
+                self.telemetry.track(i, pid)
+        
+        logging.info(f"实例 #{i+1} 已启动")
+        return process
+    
     def _handle_stdout(self, process: QProcess, output_queue: queue.Queue, instance_id: int):
         """处理标准输出"""
         try:
@@ -270,8 +350,24 @@ class ProcessManager:
                 pass
         return outputs
     
+    def tick(self):
+        """启动窗口结束后恢复优先级，并采样各实例的CPU统计"""
+        if self.placement:
+            self.placement.tick()
+    
+    def cpu_report(self) -> List[str]:
+        """各实例的CPU统计"""
+        if not self.placement:
+            return []
+        self.placement.sample()
+        return [format_report_line(item) for item in self.placement.report()]
+    
     def stop_all(self):
         """停止所有进程"""
+        self.exit_flag = True
+        if self.placement:
+            self.placement.end_boost()
+        
         for process in self.processes:
             if process.state() != QProcess.ProcessState.NotRunning:
                 process.terminate()
@@ -413,6 +509,20 @@ def get_server_time(retries=3, timeout=20):
     """从迪士尼服务器获取准确时间"""
     if not HAS_PYTZ:
         return None
+    
+    if HAS_CLOCK_SYNC:
+        # 代理与直连并发探测，最先成功的结果胜出
+        for attempt in range(retries):
+            try:
+                logging.info(f"并发探测代理与直连获取服务器时间... (尝试 {attempt + 1}/{retries})")
+                report = estimate_first(default_sources(), timeout=min(timeout, 5))
+                logging.info(format_report(report))
+                return datetime.datetime.fromtimestamp(time.time() + report["offset"], pytz.timezone('Asia/Hong_Kong'))
+            except Exception as e:
+                logging.warning(f"所有校时来源均失败: {e}")
+            time.sleep(1)
+        logging.error("多次尝试后仍无法获取服务器时间")
+        return None
         
     url = "https://www.hongkongdisneyland.com"
     proxies = {
@@ -664,7 +774,36 @@ class TimedLauncherUI(QMainWindow, QtStyleTools):
         """)
         
         # 初始化进程管理器
-        self.process_manager = ProcessManager()
+        placement = None
+        if HAS_CPU_PLACEMENT and (self.config.get("cpu_affinity") or self.config.get("boost_priority")):
+            placement = PlacementPolicy(
+                affinity=self.config.get("cpu_affinity", False),
+                reserve_launcher_core=self.config.get("reserve_launcher_core", True),
+                boost=self.config.get("boost_priority", False),
+                boost_window=self.config.get("boost_window", 10),
+                on_warning=logging.warning
+            )
+            placement.apply_launcher()
+            logging.info(f"CPU放置: {placement.describe()}")
+        plan = None
+        if HAS_LAUNCH_PLAN:
+            try:
+                plan = LaunchPlan(
+                    self.config.get("launch_strategy", "stagger"),
+                    interval=self.config.get("launch_interval", 0.5),
+                    wave_size=self.config.get("wave_size", 5),
+                    jitter_window=self.config.get("jitter_window", 1.0)
+                )
+                logging.info(f"启动计划: {plan.describe()}")
+            except ValueError as e:
+                logging.warning(f"{e}，每隔0.5秒启动一个实例")
+        # 资源遥测：后台线程按间隔采样，界面只读取最新的汇总
+        self.telemetry = None
+        if HAS_TELEMETRY and self.config.get("telemetry_interval", 1.0) > 0:
+            self.telemetry = TelemetrySampler(self.config.get("telemetry_interval", 1.0))
+            self.telemetry.start()
+        self.next_telemetry_update = 0.0
+        self.process_manager = ProcessManager(placement, plan, self.telemetry)
         
         # 初始化UI状态变量
         self.countdown_timer = None
@@ -896,6 +1035,11 @@ class TimedLauncherUI(QMainWindow, QtStyleTools):
         self.log_monitor = LogMonitor(font_name)
         log_layout.addWidget(self.log_monitor)
         
+        # 资源汇总(由资源采样器提供)
+        self.telemetry_label = QLabel("资源: 未启动实例" if self.telemetry else "资源: 未启用采样")
+        self.telemetry_label.setFont(QFont(self.default_font, 9))
+        log_layout.addWidget(self.telemetry_label)
+        
         # 添加日志控制按钮
         log_control_layout = QHBoxLayout()
         
@@ -907,8 +1051,14 @@ class TimedLauncherUI(QMainWindow, QtStyleTools):
         self.save_log_button.setFont(QFont(self.default_font, 9))
         self.save_log_button.clicked.connect(self.save_logs)
         
+        self.export_telemetry_button = QPushButton("导出资源数据")
+        self.export_telemetry_button.setFont(QFont(self.default_font, 9))
+        self.export_telemetry_button.clicked.connect(self.export_telemetry)
+        self.export_telemetry_button.setEnabled(self.telemetry is not None)
+        
         log_control_layout.addWidget(self.clear_log_button)
         log_control_layout.addWidget(self.save_log_button)
+        log_control_layout.addWidget(self.export_telemetry_button)
         log_control_layout.addStretch()
         
         log_layout.addLayout(log_control_layout)
@@ -1138,6 +1288,9 @@ class TimedLauncherUI(QMainWindow, QtStyleTools):
         # 启动实例
         try:
             self.process_manager.start_instances(exe_path, instances, "")
+            if HAS_LAUNCH_PLAN:
+                for item in wave_summary(self.process_manager.launch_records):
+                    self.log_monitor.append_log(-1, format_wave(item))
             self.log_monitor.append_log(-1, f"成功启动 {instances} 个实例")
             self.countdown_label.setText(f"已启动 {instances} 个实例")
         except Exception as e:
@@ -1157,7 +1310,9 @@ class TimedLauncherUI(QMainWindow, QtStyleTools):
         if self.launch_timer and self.launch_timer.is_alive():
             self.launch_timer.cancel()
         
-        # 停止所有进程
+        # 显示各实例的CPU统计，然后停止所有进程
+        for line in self.process_manager.cpu_report():
+            self.log_monitor.append_log(-1, line)
         self.process_manager.stop_all()
         
         # 更新UI状态
@@ -1250,6 +1405,14 @@ class TimedLauncherUI(QMainWindow, QtStyleTools):
         if not self.running:
             return
         
+        # 恢复到期的优先级并采样CPU统计
+        self.process_manager.tick()
+        
+        # 每秒刷新一次资源汇总
+        if self.telemetry and time.monotonic() >= self.next_telemetry_update:
+            self.next_telemetry_update = time.monotonic() + 1.0
+            self.telemetry_label.setText(f"资源: {format_totals(self.telemetry.totals())}")
+        
         # 获取所有进程输出
         outputs = self.process_manager.get_outputs()
         for instance_id, message in outputs:
@@ -1273,6 +1436,20 @@ class TimedLauncherUI(QMainWindow, QtStyleTools):
             except Exception as e:
                 self.log_monitor.append_log(-1, f"保存日志失败: {str(e)}")
     
+    def export_telemetry(self):
+        """导出资源采样历史"""
+        if not self.telemetry:
+            return
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "导出资源数据", "", "CSV 文件 (*.csv);;JSON 文件 (*.json)"
+        )
+        if file_path:
+            try:
+                count = self.telemetry.export(file_path)
+                self.log_monitor.append_log(-1, f"已导出 {count} 个资源采样点到 {file_path}")
+            except Exception as e:
+                self.log_monitor.append_log(-1, f"导出资源数据失败: {str(e)}")
+    
     def closeEvent(self, event):
         """关闭窗口时的处理"""
         if self.running:
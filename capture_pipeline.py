@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+功能: 捕获数据保存后的派生处理
+
+说明:
+- APICapture.save_results 与 version_watcher 的增量刷新共用这里的流程，保证两条路径生成相同的派生数据
+- 版本目录: 列式数据表(game_tables.npz)、装备合成索引
+- 全局: 全文索引增量更新、结构缓存更新与漂移报告
+- 每一步失败只记录日志，不影响已保存的原始数据
+"""
+
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from game_tables import build_tables
+from equip_index import build_version_index
+from schema_monitor import SchemaMonitor, summarize
+from text_index import update_index
+from utilities import FileManager, DATA_DIR
+
+
+def process_version_dir(version_dir: Path, api_types: Iterable[str], logger: logging.Logger,
+                        label: Optional[str] = None) -> None:
+    """
+    功能: 版本目录的 api_*.json 更新后重建列式数据表，有装备数据时重建装备合成索引
+
+    输入:
+    - version_dir: 版本目录
+    - api_types: 本次更新的API类型
+    - label: 日志中的版本名称，默认为目录名
+    """
+    label = label or version_dir.name
+    try:
+        tables_file = build_tables(version_dir)
+        logger.info(f"版本 {label} 的列式数据表已生成: {tables_file}")
+    except Exception as e:
+        logger.error(f"生成版本 {label} 的列式数据表失败: {str(e)}")
+
+    if "equip" in api_types:
+        try:
+            index_file = build_version_index(version_dir)
+            logger.info(f"版本 {label} 的装备合成索引已生成: {index_file}")
+        except Exception as e:
+            logger.error(f"生成版本 {label} 的装备合成索引失败: {str(e)}")
+
+
+def finalize_capture(records: List[Dict], timestamp: str, logger: logging.Logger,
+                     schema_monitor: Optional[SchemaMonitor] = None,
+                     data_dir: Path = DATA_DIR) -> Dict[str, Dict[str, List]]:
+    """
+    功能: 所有版本目录保存完成后更新全文索引与结构缓存
+
+    输入:
+    - records: 本次捕获(或刷新)的请求记录
+    - timestamp: 漂移报告文件名中的时间戳
+    - schema_monitor: 捕获过程中已做内联校验的监控器，None 时新建
+
+    返回值:
+    - 本次的结构漂移报告，有漂移时同时保存为 schema_drift_<时间戳>.json
+    """
+    try:
+        added = update_index()
+        logger.info(f"全文索引已更新，新增 {added} 条记录")
+    except Exception as e:
+        logger.error(f"更新全文索引失败: {str(e)}")
+
+    # 推断本次捕获的结构，更新结构缓存并保存漂移报告
+    schema_monitor = schema_monitor or SchemaMonitor()
+    for record in records:
+        body = (record.get("response") or {}).get("body")
+        if body is not None:
+            schema_monitor.learn(record.get("api_type", "other"), record.get("version", "common"), body)
+    drift = schema_monitor.commit()
+    if drift:
+        drift_file = FileManager.save_json(drift, data_dir / f"schema_drift_{timestamp}.json")
+        for line in summarize(drift):
+            logger.warning(f"结构漂移 {line}")
+        logger.warning(f"结构漂移报告已保存到: {drift_file}")
+    return drift
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+功能: 评估捕获结果压缩存储的压缩率与读写耗时
+
+说明:
+- 对每个输入文件分别以 原始(缩进JSON) / gzip / zstd(如已安装) 的不同级别写出并读回
+- 报告文件大小、压缩率以及相对原始格式额外增加的写入/读取耗时
+
+使用方法:
+python compression_report.py [文件 ...]
+默认使用 data/ 下最新的 all_api_requests_*.json
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from utilities import FileManager, DATA_DIR, HAS_ZSTD
+
+# 评估的 (格式, 级别) 组合
+GZIP_LEVELS = [1, 6, 9]
+ZSTD_LEVELS = [1, 3, 10, 19]
+
+
+def measure(data: Any, workdir: Path, fmt: Optional[str], level: Optional[int], repeat: int) -> Dict:
+    """写出并读回一次数据，返回大小与最佳耗时"""
+    target = workdir / "sample.json"
+    write_time = read_time = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        written = FileManager.save_json(data, target, compression=fmt, level=level)
+        write_time = min(write_time, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        FileManager.load_json(written)
+        read_time = min(read_time, time.perf_counter() - start)
+
+    size = written.stat().st_size
+    written.unlink()
+    return {"format": fmt or "raw", "level": level, "size": size,
+            "write": write_time, "read": read_time}
+
+
+def report(filepath: Path, repeat: int = 3) -> List[Dict]:
+    """对单个文件生成压缩报告"""
+    data = FileManager.load_json(filepath)
+    combos = [(None, None)] + [("gzip", level) for level in GZIP_LEVELS]
+    if HAS_ZSTD:
+        combos += [("zstd", level) for level in ZSTD_LEVELS]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = [measure(data, Path(tmp), fmt, level, repeat) for fmt, level in combos]
+
+    raw = results[0]
+    print(f"\n{filepath} (原始 {raw['size'] / 1024:.1f} KB)")
+    print(f"{'格式':<6}{'级别':>6}{'大小(KB)':>12}{'压缩率':>10}{'写入(ms)':>12}{'额外写入':>12}{'读取(ms)':>12}{'额外读取':>12}")
+    for r in results:
+        print(f"{r['format']:<6}{str(r['level'] or '-'):>6}{r['size'] / 1024:>12.1f}"
+              f"{raw['size'] / r['size']:>9.1f}x{r['write'] * 1000:>12.1f}{(r['write'] - raw['write']) * 1000:>+12.1f}"
+              f"{r['read'] * 1000:>12.1f}{(r['read'] - raw['read']) * 1000:>+12.1f}")
+    if not HAS_ZSTD:
+        print("未安装zstandard库，跳过zstd评估")
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="评估捕获结果压缩存储的压缩率与读写耗时")
+    parser.add_argument("files", nargs="*", help="要评估的JSON文件")
+    parser.add_argument("--repeat", type=int, default=3, help="每种组合重复次数，取最佳值 (默认: 3)")
+    args = parser.parse_args(argv)
+
+    files = [Path(f) for f in args.files]
+    if not files:
+        candidates = sorted(DATA_DIR.glob("all_api_requests_*.json*"), key=lambda p: p.stat().st_mtime)
+        candidates = [p for p in candidates if p.suffix != ".jsonl" and not p.name.endswith(".idx")]
+        if not candidates:
+            print("未找到 all_api_requests_*.json，请先运行 api_capture.py 或指定文件")
+            return 1
+        files = candidates[-1:]
+
+    for filepath in files:
+        report(filepath, args.repeat)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,275 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+功能: 基于已捕获游戏数据的本地只读数据服务
+
+说明:
+- 启动时把 data/crawler/api/<版本>/api_*.json 载入内存，按 版本 / api_type / 实体ID 建立索引
+- 响应体预先序列化并缓存(含gzip版本)，支持 ETag / If-None-Match 返回304
+- 后台定期检查数据目录，发现新的捕获且目录签名在下一次检查时不再变化(捕获已写完)后，
+  在后台线程构建新快照，再原子替换，请求无需加锁
+
+接口:
+- GET /health
+- GET /versions                                  版本及其 api_type 列表
+- GET /api/{版本}/{api_type}                      该类型的全部实体
+- GET /raw/{版本}/{api_type}                      原始响应体列表
+- GET /api/{版本}/{api_type}/{实体ID}             单个实体
+
+使用方法:
+python data_service.py [--host 127.0.0.1] [--port 8765] [--reload-interval 10]
+"""
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+from game_tables import TABLE_SCHEMAS, iter_entities
+from utilities import FileManager, API_DIR
+
+# api_type -> 实体ID候选字段
+ID_FIELDS: Dict[str, List[str]] = {
+    source: schema["id"] for schema in TABLE_SCHEMAS.values() for source in schema["sources"]
+}
+
+# 不建立实体索引的 api_type
+RAW_ONLY_TYPES = {"other", "version"}
+
+# 小于该字节数的响应不压缩
+GZIP_MIN_SIZE = 1024
+
+
+def _id_fields(api_type: str) -> List[str]:
+    return ID_FIELDS.get(api_type, ["id", f"{api_type}Id"])
+
+
+def entity_key(entity: Dict, api_type: str) -> Optional[Any]:
+    """实体在 /api/{版本}/{api_type}/{实体ID} 中使用的ID，按该类型的候选字段顺序选取"""
+    return next((entity[f] for f in _id_fields(api_type) if entity.get(f) not in (None, "")), None)
+
+
+class CachedResponse:
+    """预序列化的响应: 原始字节 / gzip字节 / ETag"""
+
+    __slots__ = ("body", "gzipped", "etag")
+
+    def __init__(self, payload: Any):
+        self.body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.gzipped = gzip.compress(self.body, 6) if len(self.body) >= GZIP_MIN_SIZE else None
+        self.etag = '"' + hashlib.blake2b(self.body, digest_size=12).hexdigest() + '"'
+
+
+class Snapshot:
+    """
+    一次捕获数据的只读内存快照
+
+    属性:
+    - raw: (版本, api_type) -> 响应体列表
+    - entities: (版本, api_type) -> {实体ID: 实体}
+    """
+
+    def __init__(self, api_dir: Path = API_DIR):
+        self.api_dir = Path(api_dir)
+        self.signature = directory_signature(self.api_dir)
+        self.loaded_at = time.time()
+        self.raw: Dict[Tuple[str, str], List[Any]] = {}
+        self.entities: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._responses: Dict[str, CachedResponse] = {}
+        self._load()
+
+    def _load(self) -> None:
+        if not self.api_dir.exists():
+            return
+        for version_dir in sorted(p for p in self.api_dir.iterdir() if p.is_dir()):
+            version = version_dir.name
+            for api_file in sorted(version_dir.glob("api_*.json*")):
+                api_type = api_file.name[len("api_"):].split(".")[0]
+                if (version, api_type) in self.raw:
+                    continue
+                records = FileManager.load_json(FileManager.resolve_path(version_dir / f"api_{api_type}.json"))
+                self.raw[(version, api_type)] = [
+                    (record.get("response") or {}).get("body") for record in records
+                ]
+                if api_type in RAW_ONLY_TYPES:
+                    continue
+
+                index: Dict[str, Any] = {}
+                for entity in iter_entities(records, api_type, _id_fields(api_type)):
+                    entity.pop("__source__", None)
+                    entity_id = entity_key(entity, api_type)
+                    if entity_id is not None:
+                        index.setdefault(str(entity_id), entity)
+                self.entities[(version, api_type)] = index
+
+    def versions(self) -> Dict[str, List[str]]:
+        result: Dict[str, List[str]] = {}
+        for version, api_type in self.raw:
+            result.setdefault(version, []).append(api_type)
+        return result
+
+    def response(self, key: str, builder) -> Optional[CachedResponse]:
+        """
+        功能: 获取预序列化响应，首次访问时构建并缓存
+
+        输入:
+        - key: 缓存键(通常为请求路径)
+        - builder: 返回响应数据的函数，返回None表示404
+        """
+        cached = self._responses.get(key)
+        if cached is None:
+            payload = builder()
+            if payload is None:
+                return None
+            cached = CachedResponse(payload)
+            self._responses[key] = cached
+        return cached
+
+
+def directory_signature(api_dir: Path) -> Tuple[int, float]:
+    """数据目录签名: (文件数, 最新修改时间)，用于发现新的捕获"""
+    if not api_dir.exists():
+        return (0, 0.0)
+    mtimes = [p.stat().st_mtime for p in api_dir.glob("*/api_*.json*")]
+    return (len(mtimes), max(mtimes, default=0.0))
+
+
+class DataService:
+    """只读数据服务"""
+
+    def __init__(self, api_dir: Path = API_DIR, reload_interval: float = 10,
+                 logger: Optional[logging.Logger] = None):
+        self.api_dir = Path(api_dir)
+        self.reload_interval = reload_interval
+        self.logger = logger or logging.getLogger("DataService")
+        self.snapshot = Snapshot(self.api_dir)
+        self.generation = 1
+        # 已发现但尚未稳定的目录签名，捕获可能仍在逐个写入 api_*.json
+        self._pending_signature: Optional[Tuple[int, float]] = None
+        self._reload_task: Optional[asyncio.Task] = None
+
+    def _send(self, request: web.Request, cached: Optional[CachedResponse]) -> web.Response:
+        if cached is None:
+            raise web.HTTPNotFound(text='{"error":"not found"}', content_type="application/json")
+
+        headers = {"ETag": cached.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        if cached.etag in request.headers.get("If-None-Match", ""):
+            return web.Response(status=304, headers=headers)
+
+        body = cached.body
+        if cached.gzipped is not None and "gzip" in request.headers.get("Accept-Encoding", ""):
+            body = cached.gzipped
+            headers["Content-Encoding"] = "gzip"
+        return web.Response(body=body, headers=headers, content_type="application/json", charset="utf-8")
+
+    async def health(self, request: web.Request) -> web.Response:
+        return web.json_response({"status": "ok", "generation": self.generation})
+
+    async def versions(self, request: web.Request) -> web.Response:
+        snapshot = self.snapshot
+        return self._send(request, snapshot.response("/versions", lambda: {
+            "generation": self.generation,
+            "loaded_at": snapshot.loaded_at,
+            "versions": snapshot.versions(),
+        }))
+
+    async def api_list(self, request: web.Request) -> web.Response:
+        snapshot = self.snapshot
+        key = (request.match_info["version"], request.match_info["api_type"])
+
+        def build():
+            if key in snapshot.entities:
+                return list(snapshot.entities[key].values())
+            return snapshot.raw.get(key)
+
+        return self._send(request, snapshot.response(request.path, build))
+
+    async def api_raw(self, request: web.Request) -> web.Response:
+        snapshot = self.snapshot
+        key = (request.match_info["version"], request.match_info["api_type"])
+        return self._send(request, snapshot.response(request.path, lambda: snapshot.raw.get(key)))
+
+    async def api_entity(self, request: web.Request) -> web.Response:
+        snapshot = self.snapshot
+        key = (request.match_info["version"], request.match_info["api_type"])
+        entity_id = request.match_info["entity_id"]
+        return self._send(request, snapshot.response(
+            request.path, lambda: snapshot.entities.get(key, {}).get(entity_id)
+        ))
+
+    async def reload_if_changed(self) -> bool:
+        """数据目录变化且签名保持一个检查间隔不变后，在线程池中构建新快照并原子替换"""
+        signature = directory_signature(self.api_dir)
+        if signature == self.snapshot.signature:
+            self._pending_signature = None
+            return False
+        if signature != self._pending_signature:
+            self._pending_signature = signature
+            return False
+        self._pending_signature = None
+        start = time.perf_counter()
+        snapshot = await asyncio.get_running_loop().run_in_executor(None, Snapshot, self.api_dir)
+        self.snapshot = snapshot
+        self.generation += 1
+        self.logger.info(f"已加载新的捕获数据 (第 {self.generation} 代)，耗时 {time.perf_counter() - start:.2f} 秒")
+        return True
+
+    async def _reload_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                await self.reload_if_changed()
+            except Exception as e:
+                self.logger.error(f"重新加载捕获数据失败，继续使用旧数据: {str(e)}")
+
+    async def _on_startup(self, app: web.Application) -> None:
+        if self.reload_interval > 0:
+            self._reload_task = asyncio.create_task(self._reload_loop())
+
+    async def _on_cleanup(self, app: web.Application) -> None:
+        if self._reload_task:
+            self._reload_task.cancel()
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/health", self.health)
+        app.router.add_get("/versions", self.versions)
+        app.router.add_get("/api/{version}/{api_type}", self.api_list)
+        app.router.add_get("/raw/{version}/{api_type}", self.api_raw)
+        app.router.add_get("/api/{version}/{api_type}/{entity_id}", self.api_entity)
+        app.on_startup.append(self._on_startup)
+        app.on_cleanup.append(self._on_cleanup)
+        return app
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="基于已捕获游戏数据的本地只读数据服务")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址 (默认: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="监听端口 (默认: 8765)")
+    parser.add_argument("--api-dir", default=str(API_DIR), help="捕获数据目录")
+    parser.add_argument("--reload-interval", type=float, default=10,
+                        help="检查新捕获的间隔(秒)，0 表示不自动加载 (默认: 10)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    service = DataService(Path(args.api_dir), args.reload_interval)
+    counts = {version: len(types) for version, types in service.snapshot.versions().items()}
+    service.logger.info(f"已加载捕获数据: {counts}")
+    web.run_app(service.create_app(), host=args.host, port=args.port, access_log=None)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
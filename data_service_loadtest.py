@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+功能: data_service.py 的压测脚本
+
+说明:
+- 从 /versions 自动发现可请求的路径(列表接口 + 部分实体接口)，也可通过 --path 指定
+- 固定并发数的协程循环发请求，统计 每秒请求数 与 延迟分位数(p50/p90/p99/最大值)
+- --etag 模式下携带上次的ETag，测试304路径；--gzip 模式下请求压缩响应
+- --spawn 时在子进程中启动数据服务，压测结束后自动关闭
+
+使用方法:
+python data_service_loadtest.py [--url http://127.0.0.1:8765] [--spawn] [--concurrency 50] [--duration 10]
+"""
+
+import argparse
+import asyncio
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import quote
+
+import aiohttp
+
+from data_service import entity_key
+
+# 每个 版本/api_type 最多加入的实体路径数
+ENTITY_PATHS_PER_TYPE = 5
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def discover_paths(session: aiohttp.ClientSession, base_url: str) -> List[str]:
+    """根据 /versions 生成压测路径"""
+    async with session.get(f"{base_url}/versions") as response:
+        data = await response.json()
+
+    paths: List[str] = []
+    for version, api_types in data["versions"].items():
+        for api_type in api_types:
+            list_path = f"/api/{quote(version)}/{quote(api_type)}"
+            paths.append(list_path)
+            async with session.get(f"{base_url}{list_path}") as response:
+                entities = await response.json() if response.status == 200 else []
+            for entity in entities[:ENTITY_PATHS_PER_TYPE] if isinstance(entities, list) else []:
+                entity_id = entity_key(entity, api_type) if isinstance(entity, dict) else None
+                if entity_id is not None:
+                    paths.append(f"{list_path}/{quote(str(entity_id))}")
+    return paths
+
+
+async def run_load(base_url: str, paths: List[str], concurrency: int, duration: float,
+                   use_gzip: bool, use_etag: bool) -> Dict:
+    """
+    功能: 执行压测
+
+    返回值:
+    - {"requests", "errors", "seconds", "rps", "latency_ms": {...}, "status": {...}}
+    """
+    latencies: List[float] = []
+    status: Dict[int, int] = {}
+    errors = 0
+    etags: Dict[str, str] = {}
+    headers = {"Accept-Encoding": "gzip" if use_gzip else "identity"}
+    deadline = time.perf_counter() + duration
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector, auto_decompress=False) as session:
+
+        async def worker(offset: int):
+            nonlocal errors
+            i = offset
+            while time.perf_counter() < deadline:
+                path = paths[i % len(paths)]
+                i += concurrency
+                request_headers = dict(headers)
+                if use_etag and path in etags:
+                    request_headers["If-None-Match"] = etags[path]
+                start = time.perf_counter()
+                try:
+                    async with session.get(base_url + path, headers=request_headers) as response:
+                        await response.read()
+                        if response.headers.get("ETag"):
+                            etags[path] = response.headers["ETag"]
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+                status[response.status] = status.get(response.status, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": elapsed,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            name: percentile(latencies, q) * 1000
+            for name, q in (("p50", 50), ("p90", 90), ("p99", 99), ("max", 100))
+        },
+        "status": status,
+    }
+
+
+async def wait_until_ready(base_url: str, timeout: float = 30) -> bool:
+    deadline = time.perf_counter() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.perf_counter() < deadline:
+            try:
+                async with session.get(f"{base_url}/health") as response:
+                    if response.status == 200:
+                        return True
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    return False
+
+
+async def main_async(args) -> int:
+    base_url = args.url.rstrip("/")
+    async with aiohttp.ClientSession() as session:
+        paths = args.path or await discover_paths(session, base_url)
+    if not paths:
+        print("没有可压测的路径，请先完成一次捕获或通过 --path 指定")
+        return 1
+
+    print(f"压测 {base_url}: {len(paths)} 个路径, 并发 {args.concurrency}, 持续 {args.duration} 秒"
+          f"{', gzip' if args.gzip else ''}{', ETag' if args.etag else ''}")
+    result = await run_load(base_url, paths, args.concurrency, args.duration, args.gzip, args.etag)
+    latency = result["latency_ms"]
+    print(f"请求数: {result['requests']}, 错误: {result['errors']}, 状态码: {result['status']}")
+    print(f"吞吐: {result['rps']:.0f} 请求/秒")
+    print(f"延迟: p50 {latency['p50']:.2f} ms / p90 {latency['p90']:.2f} ms / "
+          f"p99 {latency['p99']:.2f} ms / 最大 {latency['max']:.2f} ms")
+    return 0
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="本地数据服务压测")
+    parser.add_argument("--url", default="http://127.0.0.1:8765", help="数据服务地址 (默认: http://127.0.0.1:8765)")
+    parser.add_argument("--path", action="append", default=[], help="压测路径，可重复指定；默认自动发现")
+    parser.add_argument("--concurrency", type=int, default=50, help="并发数 (默认: 50)")
+    parser.add_argument("--duration", type=float, default=10, help="持续时间(秒) (默认: 10)")
+    parser.add_argument("--gzip", action="store_true", help="请求gzip压缩响应")
+    parser.add_argument("--etag", action="store_true", help="携带 If-None-Match，测试304路径")
+    parser.add_argument("--spawn", action="store_true", help="在子进程中启动数据服务")
+    parser.add_argument("--api-dir", help="--spawn 时传给数据服务的捕获数据目录")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    server = None
+    if args.spawn:
+        port = args.url.rstrip("/").rsplit(":", 1)[-1]
+        command = [sys.executable, str(Path(__file__).with_name("data_service.py")),
+                   "--port", port, "--reload-interval", "0"]
+        if args.api_dir:
+            command += ["--api-dir", args.api_dir]
+        server = subprocess.Popen(command)
+        if not asyncio.run(wait_until_ready(args.url.rstrip("/"))):
+            print("数据服务启动超时")
+            server.terminate()
+            return 1
+
+    try:
+        return asyncio.run(main_async(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
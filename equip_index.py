@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+功能: 预计算装备合成图与合成索引
+
+说明:
+- 从版本目录下的 api_equip.json 提取 基础装备 -> 成装 的合成关系
+- 生成 equip_index.json，保存在版本目录中，包含:
+  - recipes: 成装ID -> 组成部件ID列表
+  - used_in: 部件ID -> 可合成的成装ID列表(反向索引)
+  - combinations: "部件A|部件B"(按ID排序) -> 成装ID
+  - table: 基础装备两两组合的矩阵形式
+- 加载后所有查询均为字典查找，无需再扫描装备列表
+
+使用方法:
+python equip_index.py [版本目录 ...]
+"""
+
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from game_tables import TABLE_SCHEMAS, iter_entities, pick, pick_seq
+from utilities import FileManager, API_DIR
+
+# 输出文件名
+INDEX_FILENAME = "equip_index.json"
+
+
+def _pair_key(a: str, b: str) -> str:
+    """组合键与顺序无关"""
+    return "|".join(sorted((str(a), str(b))))
+
+
+def build_index(equips: List[Dict]) -> Dict:
+    """
+    功能: 根据装备实体列表构建合成索引
+
+    输入:
+    - equips: 装备实体列表(需包含ID字段及 from/formula 合成字段)
+
+    返回值:
+    - 可直接序列化为JSON的索引字典
+    """
+    schema = TABLE_SCHEMAS["items"]
+    names: Dict[str, Optional[str]] = {}
+    recipes: Dict[str, List[str]] = {}
+
+    for equip in equips:
+        equip_id = pick(equip, schema["id"])
+        if equip_id is None:
+            continue
+        equip_id = str(equip_id)
+        names[equip_id] = pick(equip, schema["columns"]["name"][1])
+        components = pick_seq(equip, schema["columns"]["components"][1])
+        if components:
+            recipes[equip_id] = components
+
+    used_in: Dict[str, List[str]] = {}
+    combinations: Dict[str, str] = {}
+    for item_id, components in recipes.items():
+        for component in dict.fromkeys(components):
+            used_in.setdefault(component, []).append(item_id)
+        if len(components) == 2:
+            combinations.setdefault(_pair_key(*components), item_id)
+
+    # 基础装备: 出现在配方中且自身没有配方的装备
+    base_items = sorted(
+        {c for components in recipes.values() for c in components if c not in recipes},
+        key=lambda x: (len(x), x),
+    )
+    position = {item_id: i for i, item_id in enumerate(base_items)}
+    matrix: List[List[Optional[str]]] = [[None] * len(base_items) for _ in base_items]
+    for key, item_id in combinations.items():
+        a, b = key.split("|")
+        if a in position and b in position:
+            matrix[position[a]][position[b]] = item_id
+            matrix[position[b]][position[a]] = item_id
+
+    return {
+        "names": names,
+        "recipes": recipes,
+        "used_in": used_in,
+        "combinations": combinations,
+        "table": {"components": base_items, "matrix": matrix},
+    }
+
+
+def build_version_index(version_dir: Union[str, Path], output: Optional[Union[str, Path]] = None) -> Path:
+    """
+    功能: 读取版本目录下的 api_equip.json 并写出 equip_index.json
+
+    返回值:
+    - 实际写入的文件路径(配置了压缩时带 .gz / .zst 后缀)
+    """
+    version_dir = Path(version_dir)
+    output = Path(output) if output else version_dir / INDEX_FILENAME
+
+    equip_file = FileManager.resolve_path(version_dir / "api_equip.json")
+    records = FileManager.load_json(equip_file) if equip_file.exists() else []
+    index = build_index(list(iter_entities(records, "equip", TABLE_SCHEMAS["items"]["id"])))
+    return FileManager.save_json(index, output)
+
+
+class EquipIndex:
+    """
+    装备合成索引
+
+    使用示例:
+        index = EquipIndex.load("data/crawler/api/天选福星/equip_index.json")
+        index.combine("1", "2")     # 两个部件合成的成装ID
+        index.recipe("12")          # 成装的部件
+        index.used_in("1")          # 部件能合成的所有成装
+    """
+
+    def __init__(self, data: Dict):
+        self.names: Dict[str, Optional[str]] = data.get("names", {})
+        self.recipes: Dict[str, List[str]] = data.get("recipes", {})
+        self._used_in: Dict[str, List[str]] = data.get("used_in", {})
+        self.combinations: Dict[str, str] = data.get("combinations", {})
+        self.table: Dict = data.get("table", {"components": [], "matrix": []})
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "EquipIndex":
+        return cls(FileManager.load_json(path))
+
+    def name(self, item_id: str) -> Optional[str]:
+        return self.names.get(str(item_id))
+
+    def recipe(self, item_id: str) -> List[str]:
+        return self.recipes.get(str(item_id), [])
+
+    def used_in(self, component_id: str) -> List[str]:
+        return self._used_in.get(str(component_id), [])
+
+    def combine(self, a: str, b: str) -> Optional[str]:
+        return self.combinations.get(_pair_key(a, b))
+
+    def is_component(self, item_id: str) -> bool:
+        return str(item_id) in self._used_in and str(item_id) not in self.recipes
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """为指定的(或全部)版本目录生成装备合成索引"""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        version_dirs = [Path(p) for p in argv]
+    elif API_DIR.exists():
+        version_dirs = [p for p in API_DIR.iterdir() if p.is_dir()]
+    else:
+        version_dirs = []
+
+    for version_dir in version_dirs:
+        output = build_version_index(version_dir)
+        index = EquipIndex.load(output)
+        print(f"{version_dir.name} -> {output} ({len(index.recipes)} 个配方, "
+              f"{len(index.table['components'])} 个基础装备, {len(index.combinations)} 种两两组合)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,441 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+功能: 将捕获的API请求记录规范化为列式游戏数据表
+
+说明:
+- 输入为 api_chess.json / api_trait.json / api_race.json / api_job.json /
+  api_equip.json / api_lineup.json 等请求记录文件，数据位于 response.body 中
+- 输出为每个版本目录下的 game_tables.npz，包含 heroes / traits / items / lineups 四张表
+- 字符串统一做字典编码: 所有字符串放入共享的 __strings__ 数组，列中只存 int32 编码
+- 多值列(如英雄羁绊、阵容英雄)使用 offsets + values 的CSR布局
+
+使用方法:
+python game_tables.py [版本目录 ...]
+"""
+
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+import numpy as np
+
+from utilities import PathManager, FileManager, API_DIR
+
+# 输出文件名
+TABLES_FILENAME = "game_tables.npz"
+
+# 字符串字典在 npz 中的键名
+STRINGS_KEY = "__strings__"
+
+# 缺失值约定
+MISSING_INT = -1
+MISSING_CODE = -1
+
+# 表结构定义
+# - sources: 数据来源的 api_type 列表
+# - id: 实体ID候选字段
+# - columns: 列名 -> (类型, 候选字段列表)，类型为 int / float / str / list / seq / tagged
+#   list 合并所有候选字段并去重；seq 只取第一个非空字段并保留重复(如 两把暴风大剑 合成)
+#   tagged 的候选字段为 字段 -> 来源，合并后每个值加上来源前缀(如 race:1)，避免不同来源的ID重叠
+TABLE_SCHEMAS = {
+    "heroes": {
+        "sources": ["chess"],
+        "id": ["id", "chessId", "heroId"],
+        "columns": {
+            "name": ("str", ["displayName", "name", "title"]),
+            "title": ("str", ["title", "name"]),
+            "cost": ("int", ["cost", "price"]),
+            "health": ("float", ["health", "life", "hp"]),
+            "damage": ("float", ["damage", "attack", "attackDamage"]),
+            "armor": ("float", ["armor"]),
+            "magicResist": ("float", ["magicResist", "spellBlock"]),
+            "attackSpeed": ("float", ["attackSpeed"]),
+            "range": ("float", ["range", "attackRange"]),
+            "traits": ("tagged", {"traits": "trait", "traitIds": "trait", "raceIds": "race", "jobIds": "job"}),
+        },
+    },
+    "traits": {
+        "sources": ["trait", "race", "job"],
+        "id": ["id", "traitId", "raceId", "jobId"],
+        "columns": {
+            "name": ("str", ["name"]),
+            "kind": ("str", ["__source__"]),
+            "levels": ("list", ["numList", "levels"]),
+        },
+    },
+    "items": {
+        "sources": ["equip"],
+        "id": ["id", "equipId", "itemId"],
+        "columns": {
+            "name": ("str", ["name"]),
+            "components": ("seq", ["from", "formula", "components"]),
+        },
+    },
+    "lineups": {
+        "sources": ["lineup"],
+        "id": ["id", "lineup_id", "lineupId"],
+        "columns": {
+            "name": ("str", ["title", "line_name", "name"]),
+            "quality": ("str", ["quality", "tier"]),
+            "difficulty": ("int", ["difficulty"]),
+            "heroes": ("list", ["heroes", "hero_location", "hero_ids"]),
+        },
+    },
+}
+
+# 阵容列表可能出现的容器字段
+LINEUP_LIST_KEYS = ["lineup_list", "lineup_detail", "lineups", "data"]
+
+
+def _split_multi(value: Any) -> List[str]:
+    """将 '1|2|3'、'1,2'、列表等形式的多值字段拆分为字符串列表"""
+    if value is None or value == "":
+        return []
+    if isinstance(value, (list, tuple)):
+        result = []
+        for item in value:
+            if isinstance(item, dict):
+                item = next(
+                    (item[key] for key in ("hero_id", "heroId", "id", "chessId") if key in item),
+                    None,
+                )
+            if item is not None and item != "":
+                result.append(str(item))
+        return result
+    text = str(value)
+    for sep in ("|", ","):
+        if sep in text:
+            return [part.strip() for part in text.split(sep) if part.strip()]
+    return [text.strip()]
+
+
+def pick(entity: Dict, candidates: List[str]) -> Any:
+    """按候选字段顺序取第一个存在的值"""
+    for key in candidates:
+        if key in entity and entity[key] not in (None, ""):
+            return entity[key]
+    return None
+
+
+def _pick_list(entity: Dict, candidates: List[str]) -> List[str]:
+    """合并所有候选字段中的多值(如 raceIds 与 jobIds)，保持顺序去重"""
+    values = []
+    for key in candidates:
+        for item in _split_multi(entity.get(key)):
+            if item not in values:
+                values.append(item)
+    return values
+
+
+def source_key(source: str, entity_id: Any) -> str:
+    """按来源加前缀的实体键(如 race:1)，不同来源的ID可能重叠"""
+    return f"{source}:{entity_id}"
+
+
+def _pick_tagged(entity: Dict, candidates: Dict[str, str]) -> List[str]:
+    """合并所有候选字段中的多值并加上字段对应的来源前缀，保持顺序去重"""
+    values = []
+    for key, source in candidates.items():
+        for item in _split_multi(entity.get(key)):
+            item = source_key(source, item)
+            if item not in values:
+                values.append(item)
+    return values
+
+
+def pick_seq(entity: Dict, candidates: List[str]) -> List[str]:
+    """取第一个非空候选字段的多值，保留顺序与重复项"""
+    for key in candidates:
+        values = _split_multi(entity.get(key))
+        if values:
+            return values
+    return []
+
+
+# 多值列类型 -> 取值函数
+LIST_KINDS = {"list": _pick_list, "seq": pick_seq, "tagged": _pick_tagged}
+
+
+def _iter_body_entities(body: Any, id_fields: List[str]) -> Iterator[Dict]:
+    """
+    功能: 从响应体中遍历实体
+
+    说明:
+    - body.data 为字典时视为 {实体ID: 实体}
+    - body.data 为列表时直接遍历
+    """
+    if isinstance(body, str):
+        try:
+            body = json.loads(body)
+        except ValueError:
+            return
+    if not isinstance(body, dict):
+        return
+
+    data = body.get("data", body)
+    if isinstance(data, dict):
+        for key, entity in data.items():
+            if isinstance(entity, dict):
+                if pick(entity, id_fields) is None:
+                    entity = dict(entity, id=key)
+                yield entity
+    elif isinstance(data, list):
+        for entity in data:
+            if isinstance(entity, dict):
+                yield entity
+
+
+def _iter_lineup_entities(body: Any) -> Iterator[Dict]:
+    """从 lineup_detail_total.json 响应体中遍历阵容，detail 字段为JSON字符串时展开"""
+    if isinstance(body, str):
+        try:
+            body = json.loads(body)
+        except ValueError:
+            return
+    if not isinstance(body, dict):
+        return
+
+    container = body
+    for key in LINEUP_LIST_KEYS:
+        value = container.get(key) if isinstance(container, dict) else None
+        if isinstance(value, dict):
+            container = value
+            continue
+        if isinstance(value, list):
+            for lineup in value:
+                if not isinstance(lineup, dict):
+                    continue
+                detail = lineup.get("detail")
+                if isinstance(detail, str):
+                    try:
+                        detail = json.loads(detail)
+                    except ValueError:
+                        detail = None
+                if isinstance(detail, dict):
+                    lineup = {**detail, **{k: v for k, v in lineup.items() if k != "detail"}}
+                yield lineup
+            return
+
+
+def iter_entities(records: List[Dict], api_type: str, id_fields: List[str]) -> Iterator[Dict]:
+    """
+    功能: 从请求记录列表中遍历某一 api_type 的所有实体
+
+    输入:
+    - records: api_*.json 中的请求记录列表
+    - api_type: API类型
+    - id_fields: 实体ID候选字段
+
+    返回值:
+    - 实体字典迭代器，附带 __source__ 字段标记来源
+    """
+    for record in records:
+        body = (record.get("response") or {}).get("body")
+        if body is None:
+            continue
+        if api_type == "lineup":
+            entities = _iter_lineup_entities(body)
+        else:
+            entities = _iter_body_entities(body, id_fields)
+        for entity in entities:
+            entity["__source__"] = api_type
+            yield entity
+
+
+class _StringPool:
+    """字符串字典: 字符串 -> int32 编码"""
+
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def encode(self, value: Any) -> int:
+        if value is None:
+            return MISSING_CODE
+        value = str(value)
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.strings)
+            self.codes[value] = code
+            self.strings.append(value)
+        return code
+
+
+def _to_int(value: Any) -> int:
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return MISSING_INT
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def build_table(entities: Iterator[Dict], schema: Dict, pool: _StringPool) -> Dict[str, np.ndarray]:
+    """
+    功能: 将实体列表构建为列式表
+
+    返回值:
+    - 列名 -> NumPy数组；list/seq 列会生成 <列名>.offsets 与 <列名>.values 两个数组
+    """
+    id_fields = schema["id"]
+    columns = schema["columns"]
+
+    ids: List[int] = []
+    seen = set()
+    scalars: Dict[str, List] = {name: [] for name, (kind, _) in columns.items() if kind not in LIST_KINDS}
+    lists: Dict[str, List[List[int]]] = {name: [] for name, (kind, _) in columns.items() if kind in LIST_KINDS}
+
+    for entity in entities:
+        entity_id = pick(entity, id_fields)
+        if entity_id is None or (entity["__source__"], str(entity_id)) in seen:
+            continue
+        seen.add((entity["__source__"], str(entity_id)))
+        ids.append(pool.encode(entity_id))
+
+        for name, (kind, fields) in columns.items():
+            if kind in LIST_KINDS:
+                values = LIST_KINDS[kind](entity, fields)
+                lists[name].append([pool.encode(v) for v in values])
+                continue
+            value = pick(entity, fields)
+            if kind == "int":
+                scalars[name].append(_to_int(value))
+            elif kind == "float":
+                scalars[name].append(_to_float(value))
+            else:
+                scalars[name].append(pool.encode(value))
+
+    table = {"id": np.asarray(ids, dtype=np.int32)}
+    for name, (kind, _) in columns.items():
+        if kind == "float":
+            table[name] = np.asarray(scalars[name], dtype=np.float32)
+        elif kind in ("int", "str"):
+            table[name] = np.asarray(scalars[name], dtype=np.int32)
+        else:
+            rows = lists[name]
+            offsets = np.zeros(len(rows) + 1, dtype=np.int32)
+            offsets[1:] = np.cumsum([len(row) for row in rows], dtype=np.int64)
+            table[f"{name}.offsets"] = offsets
+            table[f"{name}.values"] = np.asarray(
+                [code for row in rows for code in row], dtype=np.int32
+            )
+    return table
+
+
+def build_tables(version_dir: Union[str, Path], output: Optional[Union[str, Path]] = None) -> Path:
+    """
+    功能: 读取版本目录下的 api_*.json 并生成 game_tables.npz
+
+    输入:
+    - version_dir: 版本目录，如 data/crawler/api/天选福星
+    - output: 输出路径，默认为 <version_dir>/game_tables.npz
+
+    返回值:
+    - 输出文件路径
+    """
+    version_dir = Path(version_dir)
+    output = Path(output) if output else version_dir / TABLES_FILENAME
+
+    pool = _StringPool()
+    arrays: Dict[str, np.ndarray] = {}
+
+    for table_name, schema in TABLE_SCHEMAS.items():
+        def entities():
+            for api_type in schema["sources"]:
+                path = FileManager.resolve_path(version_dir / f"api_{api_type}.json")
+                if not path.exists():
+                    continue
+                yield from iter_entities(FileManager.load_json(path), api_type, schema["id"])
+
+        for column, array in build_table(entities(), schema, pool).items():
+            arrays[f"{table_name}.{column}"] = array
+
+    arrays[STRINGS_KEY] = np.asarray(pool.strings, dtype=np.str_)
+    PathManager.ensure_dir(output.parent)
+    with open(output, "wb") as f:
+        np.savez_compressed(f, **arrays)
+    return output
+
+
+class GameTables:
+    """
+    列式游戏数据表
+
+    使用示例:
+        tables = GameTables.load("data/crawler/api/天选福星/game_tables.npz")
+        heroes = tables["heroes"]
+        expensive = tables.decode(heroes["name"][heroes["cost"] >= 4])
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.strings = arrays.get(STRINGS_KEY, np.asarray([], dtype=np.str_))
+        self._codes: Optional[Dict[str, int]] = None
+        self.tables: Dict[str, Dict[str, np.ndarray]] = {}
+        for key, array in arrays.items():
+            if key == STRINGS_KEY:
+                continue
+            table_name, column = key.split(".", 1)
+            self.tables.setdefault(table_name, {})[column] = array
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "GameTables":
+        """加载 game_tables.npz"""
+        with np.load(path, allow_pickle=False) as data:
+            return cls({key: data[key] for key in data.files})
+
+    def __getitem__(self, table_name: str) -> Dict[str, np.ndarray]:
+        return self.tables[table_name]
+
+    def __len__(self) -> int:
+        return len(self.tables)
+
+    def decode(self, codes: Union[int, np.ndarray]) -> Union[Optional[str], List[Optional[str]]]:
+        """将字符串编码还原为字符串，缺失值返回None"""
+        if np.isscalar(codes):
+            return None if codes == MISSING_CODE else str(self.strings[codes])
+        return [None if code == MISSING_CODE else str(self.strings[code]) for code in codes]
+
+    def encode(self, value: str) -> int:
+        """查询字符串对应的编码，用于向量化比较；不存在时返回 MISSING_CODE"""
+        if self._codes is None:
+            self._codes = {str(s): i for i, s in enumerate(self.strings)}
+        return self._codes.get(value, MISSING_CODE)
+
+    def row_count(self, table_name: str) -> int:
+        return len(self.tables[table_name]["id"])
+
+    def list_column(self, table_name: str, column: str, row: int) -> np.ndarray:
+        """取出某一行的多值列(编码数组)"""
+        table = self.tables[table_name]
+        offsets = table[f"{column}.offsets"]
+        return table[f"{column}.values"][offsets[row]:offsets[row + 1]]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """为指定的(或全部)版本目录生成列式数据表"""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        version_dirs = [Path(p) for p in argv]
+    elif API_DIR.exists():
+        version_dirs = [p for p in API_DIR.iterdir() if p.is_dir()]
+    else:
+        version_dirs = []
+
+    for version_dir in version_dirs:
+        output = build_tables(version_dir)
+        tables = GameTables.load(output)
+        summary = ", ".join(f"{name}: {tables.row_count(name)}" for name in tables.tables)
+        print(f"{version_dir.name} -> {output} ({summary})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,322 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+功能: 按 api_type/版本 推断响应体结构并检测结构漂移
+
+说明:
+- 结构(schema)是一棵紧凑的类型树: 每个节点记录出现过的类型，对象记录字段，列表记录元素结构
+- 键全部为数字的对象(如 {"1": {...}, "2": {...}})视为 map，只记录值的结构
+- 缓存保存在 data/crawler/api/schema_cache.json，键为 "<版本>/<api_type>"
+- 校验器由结构编译为闭包树，对象只在键集合不一致时才计算差异，可在捕获时内联运行
+- 漂移报告包含 新增字段(added) / 删除字段(removed) / 类型变化(retyped)
+
+使用方法:
+python schema_monitor.py [--update]
+"""
+
+import argparse
+import sys
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from utilities import FileManager, API_DIR
+
+# 默认缓存路径
+SCHEMA_CACHE_FILE = API_DIR / "schema_cache.json"
+
+# 校验时每个列表/map最多检查的元素数量
+DEFAULT_SAMPLE = 50
+
+# 不做结构监控的 api_type: other 混合了各种无关接口，结构没有意义
+IGNORED_TYPES = frozenset({"other"})
+
+TYPE_NAMES = {
+    type(None): "null",
+    bool: "bool",
+    int: "int",
+    float: "float",
+    str: "str",
+    list: "list",
+    dict: "object",
+}
+
+# 校验函数签名: (值, 问题列表) -> None
+Validator = Callable[[Any, List[Tuple]], None]
+
+
+def _type_name(value: Any) -> str:
+    return TYPE_NAMES.get(type(value), "str")
+
+
+def _is_map(value: Dict) -> bool:
+    return bool(value) and all(isinstance(key, str) and key.isdigit() for key in value)
+
+
+def infer_schema(value: Any) -> Dict:
+    """
+    功能: 推断单个值的结构
+
+    返回值:
+    - 结构节点 {"type": [...], "fields"/"items"/"values": ...}
+    """
+    name = _type_name(value)
+    if name == "object":
+        if _is_map(value):
+            values = None
+            for item in value.values():
+                values = merge_schema(values, infer_schema(item))
+            return {"type": ["map"], "values": values}
+        return {"type": ["object"], "fields": {key: infer_schema(item) for key, item in value.items()}}
+    if name == "list":
+        items = None
+        for item in value:
+            items = merge_schema(items, infer_schema(item))
+        node = {"type": ["list"]}
+        if items is not None:
+            node["items"] = items
+        return node
+    return {"type": [name]}
+
+
+def merge_schema(a: Optional[Dict], b: Optional[Dict]) -> Optional[Dict]:
+    """
+    功能: 合并两个结构节点
+
+    说明:
+    - 类型取并集
+    - 只在一侧出现的字段标记为 optional，不参与"删除字段"检测
+    - 空对象与 map 合并时视为 map
+    """
+    if a is None:
+        return b
+    if b is None:
+        return a
+
+    types = set(a["type"]) | set(b["type"])
+    if "map" in types and "object" in types:
+        if not a.get("fields") and not b.get("fields"):
+            types.discard("object")
+
+    node: Dict[str, Any] = {"type": sorted(types)}
+    if a.get("optional") or b.get("optional"):
+        node["optional"] = True
+
+    if "fields" in a or "fields" in b:
+        fields_a, fields_b = a.get("fields", {}), b.get("fields", {})
+        fields = {}
+        for key in list(fields_a) + [key for key in fields_b if key not in fields_a]:
+            if key in fields_a and key in fields_b:
+                fields[key] = merge_schema(fields_a[key], fields_b[key])
+            else:
+                fields[key] = dict(fields_a.get(key) or fields_b[key], optional=True)
+        if "object" in types:
+            node["fields"] = fields
+
+    for child in ("items", "values"):
+        merged = merge_schema(a.get(child), b.get(child))
+        if merged is not None:
+            node[child] = merged
+    return node
+
+
+def compile_schema(node: Dict, path: str = "$", sample: int = DEFAULT_SAMPLE) -> Validator:
+    """
+    功能: 将结构节点编译为校验闭包
+
+    问题记录格式:
+    - ("added", 路径)
+    - ("removed", 路径)
+    - ("retyped", 路径, 期望类型字符串, 实际类型)
+    """
+    allowed = set(node["type"])
+    if "float" in allowed:
+        allowed.add("int")
+    is_map = "map" in allowed
+    if is_map:
+        allowed.add("object")
+    expected = "|".join(node["type"])
+
+    field_checks: Dict[str, Validator] = {}
+    required = frozenset()
+    if "fields" in node:
+        field_checks = {
+            key: compile_schema(child, f"{path}.{key}", sample)
+            for key, child in node["fields"].items()
+        }
+        required = frozenset(key for key, child in node["fields"].items() if not child.get("optional"))
+    field_keys = frozenset(field_checks)
+    item_check = compile_schema(node["items"], f"{path}[]", sample) if "items" in node else None
+    value_check = compile_schema(node["values"], f"{path}{{}}", sample) if "values" in node else None
+
+    def check(value: Any, issues: List[Tuple]) -> None:
+        name = TYPE_NAMES.get(type(value), "str")
+        if name not in allowed:
+            issues.append(("retyped", path, expected, name))
+            return
+        if name == "object":
+            if is_map and (not field_checks or _is_map(value)):
+                if value_check is not None:
+                    for item in islice(value.values(), sample):
+                        value_check(item, issues)
+                return
+            keys = value.keys()
+            if keys != field_keys:
+                for key in keys - field_keys:
+                    issues.append(("added", f"{path}.{key}"))
+                for key in required - keys:
+                    issues.append(("removed", f"{path}.{key}"))
+            for key, field_check in field_checks.items():
+                if key in value:
+                    field_check(value[key], issues)
+        elif name == "list" and item_check is not None:
+            for item in islice(value, sample):
+                item_check(item, issues)
+
+    return check
+
+
+def build_report(issues: List[Tuple]) -> Dict[str, List]:
+    """将问题列表整理为去重后的漂移报告"""
+    report: Dict[str, List] = {"added": [], "removed": [], "retyped": []}
+    seen = set()
+    for issue in issues:
+        if issue in seen:
+            continue
+        seen.add(issue)
+        if issue[0] == "retyped":
+            report["retyped"].append({"path": issue[1], "expected": issue[2], "actual": issue[3]})
+        else:
+            report[issue[0]].append(issue[1])
+    return report
+
+
+class SchemaMonitor:
+    """
+    结构监控器
+
+    使用流程:
+    1. validate(): 捕获到响应体时内联校验，返回漂移报告(无缓存或无漂移时返回None)
+    2. learn(): 捕获结束后累积本次捕获的结构
+    3. commit(): 捕获结束后用本次结构更新缓存，并返回本次的全部漂移
+    """
+
+    def __init__(self, cache_path: Union[str, Path] = SCHEMA_CACHE_FILE, sample: int = DEFAULT_SAMPLE,
+                 ignored_types=IGNORED_TYPES):
+        self.cache_path = Path(cache_path)
+        self.sample = sample
+        self.ignored_types = frozenset(ignored_types)
+        resolved = FileManager.resolve_path(self.cache_path)
+        self.cache: Dict[str, Dict] = FileManager.load_json(resolved) if resolved.exists() else {}
+        self.pending: Dict[str, Dict] = {}
+        self.drift: Dict[str, Dict[str, List]] = {}
+        self._validators: Dict[str, Validator] = {}
+
+    @staticmethod
+    def key(api_type: str, version: str) -> str:
+        return f"{version}/{api_type}"
+
+    def validator(self, api_type: str, version: str) -> Optional[Validator]:
+        """获取(并缓存)编译后的校验器"""
+        key = self.key(api_type, version)
+        if key not in self._validators:
+            schema = self.cache.get(key)
+            if schema is None:
+                return None
+            self._validators[key] = compile_schema(schema, sample=self.sample)
+        return self._validators[key]
+
+    def validate(self, api_type: str, version: str, body: Any) -> Optional[Dict[str, List]]:
+        """校验响应体，有漂移时返回报告并累积到 self.drift"""
+        if api_type in self.ignored_types:
+            return None
+        check = self.validator(api_type, version)
+        if check is None:
+            return None
+        issues: List[Tuple] = []
+        check(body, issues)
+        if not issues:
+            return None
+
+        report = build_report(issues)
+        self._accumulate(self.key(api_type, version), report)
+        return report
+
+    def _accumulate(self, key: str, report: Dict[str, List]) -> None:
+        total = self.drift.setdefault(key, {"added": [], "removed": [], "retyped": []})
+        for kind, entries in report.items():
+            for entry in entries:
+                if entry not in total[kind]:
+                    total[kind].append(entry)
+
+    def merge_drift(self, drift: Dict[str, Dict[str, List]]) -> None:
+        """合并其他监控器(如分片工作进程)校验得到的漂移报告，commit() 时一并返回"""
+        for key, report in drift.items():
+            self._accumulate(key, report)
+
+    def learn(self, api_type: str, version: str, body: Any) -> None:
+        """累积本次捕获的结构(需要完整遍历响应体，建议在捕获结束后批量调用)"""
+        if api_type in self.ignored_types:
+            return
+        key = self.key(api_type, version)
+        self.pending[key] = merge_schema(self.pending.get(key), infer_schema(body))
+
+    def observe(self, api_type: str, version: str, body: Any) -> Optional[Dict[str, List]]:
+        """校验并学习，捕获流程中的便捷入口"""
+        report = self.validate(api_type, version, body)
+        self.learn(api_type, version, body)
+        return report
+
+    def commit(self, save: bool = True) -> Dict[str, Dict[str, List]]:
+        """
+        功能: 用本次捕获推断的结构更新缓存
+
+        返回值:
+        - 本次捕获累积的漂移报告 {"<版本>/<api_type>": 报告}
+        """
+        self.cache.update(self.pending)
+        self._validators = {key: value for key, value in self._validators.items() if key not in self.pending}
+        self.pending = {}
+        if save:
+            FileManager.save_json(self.cache, self.cache_path)
+        drift, self.drift = self.drift, {}
+        return drift
+
+
+def summarize(drift: Dict[str, Dict[str, List]]) -> List[str]:
+    """生成适合写入日志的漂移摘要"""
+    lines = []
+    for key, report in drift.items():
+        lines.append(
+            f"{key}: 新增 {len(report['added'])} / 删除 {len(report['removed'])} / 类型变化 {len(report['retyped'])}"
+        )
+    return lines
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """对已保存的版本目录数据进行结构校验"""
+    parser = argparse.ArgumentParser(description="按 api_type/版本 检测响应体结构漂移")
+    parser.add_argument("--update", action="store_true", help="校验后用当前数据更新结构缓存")
+    args = parser.parse_args(argv)
+
+    monitor = SchemaMonitor()
+    version_dirs = sorted(p for p in API_DIR.iterdir() if p.is_dir()) if API_DIR.exists() else []
+    for version_dir in version_dirs:
+        # 同一接口可能同时存在未压缩与 .gz / .zst 文件，按API类型去重后只读取 resolve_path 选中的一个
+        api_types = sorted({p.name[len("api_"):].split(".")[0] for p in version_dir.glob("api_*.json*")})
+        for api_type in api_types:
+            api_file = FileManager.resolve_path(version_dir / f"api_{api_type}.json")
+            for record in FileManager.load_json(api_file):
+                body = (record.get("response") or {}).get("body")
+                if body is not None:
+                    monitor.observe(api_type, record.get("version", version_dir.name), body)
+
+    drift = monitor.commit(save=args.update)
+    for line in summarize(drift) or ["未检测到结构漂移"]:
+        print(line)
+    return 1 if drift else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
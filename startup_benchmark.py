@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+功能: 各入口脚本的启动(导入)耗时基准
+
+说明:
+- 每个入口模块在全新的解释器进程中导入，重复多次取中位数，排除缓存与进程复用的影响
+- 同时测量只导入公共标准库(pathlib/logging/json/datetime/typing)的基线，给出扣除基线后的增量
+- 缺少依赖的入口(如Windows专用或未安装PyQt6)会标记原因并继续
+- 检查 utilities 的导入是否无副作用: 在临时目录中导入后不应产生任何新文件或目录
+
+使用方法:
+python startup_benchmark.py [--repeat 5] [--detail] [模块 ...]
+"""
+
+import argparse
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT_DIR = Path(__file__).parent
+
+# 入口模块: (模块名, 所在目录)
+ENTRY_POINTS = [
+    ("utilities", ROOT_DIR),
+    ("api_capture", ROOT_DIR),
+    ("game_tables", ROOT_DIR),
+    ("trait_engine", ROOT_DIR),
+    ("equip_index", ROOT_DIR),
+    ("compression_report", ROOT_DIR),
+    ("schema_monitor", ROOT_DIR),
+    ("version_watcher", ROOT_DIR),
+    ("data_service", ROOT_DIR),
+    ("data_service_loadtest", ROOT_DIR),
+    ("text_index", ROOT_DIR),
+    ("timed_multi_launcher", ROOT_DIR / "auto_launcher"),
+    ("timer_launcher_ui", ROOT_DIR / "auto_launcher"),
+    ("chrome_setup_launcher", ROOT_DIR / "auto_launcher"),
+    ("clock_sync", ROOT_DIR / "auto_launcher"),
+    ("precision_scheduler", ROOT_DIR / "auto_launcher"),
+    ("launch_gate", ROOT_DIR / "auto_launcher"),
+    ("output_mux", ROOT_DIR / "auto_launcher"),
+    ("console_renderer", ROOT_DIR / "auto_launcher"),
+    ("launch_benchmark", ROOT_DIR / "auto_launcher"),
+    ("instance_supervisor", ROOT_DIR / "auto_launcher"),
+    ("cpu_placement", ROOT_DIR / "auto_launcher"),
+    ("launch_plan", ROOT_DIR / "auto_launcher"),
+    ("process_telemetry", ROOT_DIR / "auto_launcher"),
+]
+
+# 基线: 几乎所有入口都会用到的标准库
+BASELINE_IMPORTS = "pathlib, logging, json, datetime, typing"
+
+TIMING_SCRIPT = (
+    "import sys, time\n"
+    "sys.path.insert(0, {directory!r})\n"
+    "start = time.perf_counter()\n"
+    "import {module}\n"
+    "print('__elapsed__', time.perf_counter() - start)\n"
+)
+
+
+def time_import(module: str, directory: Path, repeat: int) -> Dict:
+    """
+    功能: 在新进程中重复导入模块并计时
+
+    返回值:
+    - {"median_ms", "min_ms"} 或 {"error": 错误信息}
+    """
+    samples: List[float] = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-c", TIMING_SCRIPT.format(directory=str(directory), module=module)],
+            cwd=directory, capture_output=True, text=True, encoding="utf-8", errors="replace",
+            stdin=subprocess.DEVNULL, timeout=120,
+        )
+        elapsed = [line.split()[1] for line in result.stdout.splitlines() if line.startswith("__elapsed__")]
+        if result.returncode != 0 or not elapsed:
+            lines = (result.stderr or result.stdout).strip().splitlines()
+            return {"error": lines[-1] if lines else f"退出码 {result.returncode}"}
+        samples.append(float(elapsed[0]) * 1000)
+    return {"median_ms": statistics.median(samples), "min_ms": min(samples)}
+
+
+def import_profile(module: str, directory: Path, top: int = 5) -> List[str]:
+    """使用 -X importtime 找出自身耗时最高的依赖模块"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=directory, capture_output=True, text=True, encoding="utf-8", errors="replace",
+        stdin=subprocess.DEVNULL, timeout=120,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us), name.strip()))
+    rows.sort(reverse=True)
+    return [f"{name} {us / 1000:.1f} ms" for us, name in rows[:top]]
+
+
+def check_utilities_side_effects() -> List[str]:
+    """
+    功能: 在临时目录中导入 utilities，返回导入后新出现的文件/目录
+
+    返回值:
+    - 新增路径列表，为空表示导入无副作用
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_dir = Path(temp_dir)
+        shutil.copy(ROOT_DIR / "utilities.py", temp_dir / "utilities.py")
+        before = {p for p in temp_dir.rglob("*")}
+        subprocess.run(
+            [sys.executable, "-B", "-c", "import utilities"],
+            cwd=temp_dir, check=True, stdin=subprocess.DEVNULL, timeout=60,
+        )
+        return sorted(str(p.relative_to(temp_dir)) for p in temp_dir.rglob("*") if p not in before)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="各入口脚本的启动耗时基准")
+    parser.add_argument("modules", nargs="*", help="只测量指定的入口模块")
+    parser.add_argument("--repeat", type=int, default=5, help="每个模块的重复次数 (默认: 5)")
+    parser.add_argument("--detail", action="store_true", help="显示自身耗时最高的依赖模块")
+    args = parser.parse_args(argv)
+
+    entries = [(m, d) for m, d in ENTRY_POINTS if not args.modules or m in args.modules]
+    baseline = time_import(BASELINE_IMPORTS, ROOT_DIR, args.repeat)
+    baseline_ms = baseline.get("median_ms", 0.0)
+    print(f"基线 (import {BASELINE_IMPORTS}): {baseline_ms:.1f} ms")
+    print(f"{'模块':<24}{'中位数':>10}{'最小值':>10}{'扣除基线':>10}")
+
+    for module, directory in entries:
+        result = time_import(module, directory, args.repeat)
+        if "error" in result:
+            print(f"{module:<24}{'-':>10}{'-':>10}{'-':>10}  无法导入: {result['error']}")
+            continue
+        print(f"{module:<24}{result['median_ms']:>8.1f}ms{result['min_ms']:>8.1f}ms"
+              f"{result['median_ms'] - baseline_ms:>8.1f}ms")
+        if args.detail:
+            for line in import_profile(module, directory):
+                print(f"    {line}")
+
+    created = check_utilities_side_effects()
+    if created:
+        print(f"utilities 导入产生了副作用: {', '.join(created)}")
+        return 1
+    print("utilities 导入无副作用")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
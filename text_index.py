@@ -0,0 +1,420 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+功能: 捕获响应体的全文倒排索引
+
+说明:
+- 对响应体中的字符串值与对象键分词，建立 词 -> (记录, JSON路径) 的倒排表
+- 分词规则:
+  - ASCII: 连续字母数字串转小写，驼峰/下划线命名额外拆出各部分 (attackSpeed -> attackspeed, attack, speed)
+  - 中文: 连续汉字串按单字 + 相邻二字切分，查询时按同样规则切分后取交集
+- 记录来源为 data/crawler/api/<版本>/api_*.json，按文件修改时间增量更新，文件变化时旧记录作废，
+  保存时压实: 丢弃作废记录与不再被引用的路径，并重新编号
+- 索引保存在 data/crawler/api/text_index.json，每个词的倒排项按 (记录号增量, 路径号/路径号增量) 变长整数编码后base64保存，
+  加载时不解码，查询或更新用到某个词时才解码
+
+使用方法:
+python text_index.py update [--rebuild]
+python text_index.py search 安妮 [--limit 20]
+"""
+
+import argparse
+import base64
+import json
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from utilities import FileManager, API_DIR
+
+# 默认索引路径
+INDEX_FILE = API_DIR / "text_index.json"
+
+# 倒排项编码: (记录号 << PATH_BITS) | 路径号
+PATH_BITS = 32
+PATH_MASK = (1 << PATH_BITS) - 1
+
+# 超过该长度的字符串值不分词(通常是HTML或内嵌JSON)
+MAX_VALUE_LENGTH = 2000
+
+# 索引文件格式版本: 1 为倒排项整数列表，2 为变长整数编码
+INDEX_FORMAT = 2
+
+ASCII_PATTERN = re.compile(r"[A-Za-z0-9_]+")
+CJK_PATTERN = re.compile(r"[㐀-鿿豈-﫿]+")
+CAMEL_PATTERN = re.compile(r"[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d+")
+
+
+def tokenize(text: str) -> Set[str]:
+    """
+    功能: 将文本切分为索引词
+
+    返回值:
+    - 词集合(ASCII小写词及其驼峰/下划线部分、汉字单字及二字组)
+    """
+    tokens: Set[str] = set()
+    for word in ASCII_PATTERN.findall(text):
+        tokens.add(word.lower())
+        parts = CAMEL_PATTERN.findall(word)
+        if len(parts) > 1:
+            tokens.update(part.lower() for part in parts)
+    for run in CJK_PATTERN.findall(text):
+        tokens.update(run)
+        tokens.update(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def query_tokens(text: str) -> Set[str]:
+    """
+    功能: 切分查询文本
+
+    说明:
+    - 多字中文只使用二字组，避免单字倒排表过长拖慢查询
+    - ASCII 只使用完整词，不拆驼峰部分
+    """
+    tokens = {word.lower() for word in ASCII_PATTERN.findall(text)}
+    for run in CJK_PATTERN.findall(text):
+        if len(run) == 1:
+            tokens.add(run)
+        else:
+            tokens.update(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def iter_strings(value: Any, path: str = "$") -> Iterator[Tuple[str, str]]:
+    """
+    功能: 遍历JSON值中的字符串值与对象键
+
+    返回值:
+    - (JSON路径, 文本) 迭代器，对象键以其所在字段的路径返回
+    """
+    if isinstance(value, dict):
+        for key, item in value.items():
+            child = f"{path}.{key}"
+            yield child, str(key)
+            yield from iter_strings(item, child)
+    elif isinstance(value, list):
+        for i, item in enumerate(value):
+            yield from iter_strings(item, f"{path}[{i}]")
+    elif isinstance(value, str):
+        if len(value) > MAX_VALUE_LENGTH:
+            return
+        # 部分接口的响应体本身是JSON字符串
+        if value[:1] in "{[" and path == "$":
+            try:
+                yield from iter_strings(json.loads(value), path)
+                return
+            except ValueError:
+                pass
+        yield path, value
+
+
+def encode_postings(items: Iterable[int]) -> str:
+    """
+    功能: 编码一个词的倒排项
+
+    说明:
+    - 倒排项排序后依次写出 (记录号增量, 路径号)，同一记录内的路径号写与上一项的增量
+    - 每个整数按7位一组的变长整数写出，再整体base64，通常每项只需2~3字节
+    """
+    out = bytearray()
+    previous_doc = previous_path = 0
+    for item in sorted(items):
+        doc, path = item >> PATH_BITS, item & PATH_MASK
+        if doc != previous_doc:
+            values = (doc - previous_doc, path)
+        else:
+            values = (0, path - previous_path)
+        previous_doc, previous_path = doc, path
+        for value in values:
+            while value >= 0x80:
+                out.append((value & 0x7F) | 0x80)
+                value >>= 7
+            out.append(value)
+    return base64.b64encode(bytes(out)).decode("ascii")
+
+
+def decode_postings(text: str) -> Set[int]:
+    """解码 encode_postings 的结果"""
+    values = []
+    value = shift = 0
+    for byte in base64.b64decode(text):
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        values.append(value)
+        value = shift = 0
+
+    items = set()
+    doc = path = 0
+    for doc_delta, path_value in zip(values[::2], values[1::2]):
+        if doc_delta:
+            doc += doc_delta
+            path = path_value
+        else:
+            path += path_value
+        items.add((doc << PATH_BITS) | path)
+    return items
+
+
+class TextIndex:
+    """
+    全文倒排索引
+
+    属性:
+    - docs: 记录号 -> {"file", "index", "url", "api_type", "version"}，作废的记录为None
+    - paths: 路径号 -> JSON路径
+    - postings: 词 -> 编码后的倒排项集合；从文件加载的词在首次用到前保持 encode_postings 的字符串形式
+    - sources: 已索引文件 -> 修改时间
+    """
+
+    def __init__(self, path: Union[str, Path] = INDEX_FILE):
+        self.path = Path(path)
+        self.docs: List[Optional[Dict]] = []
+        self.paths: List[str] = []
+        self.postings: Dict[str, Union[Set[int], str]] = {}
+        self.sources: Dict[str, float] = {}
+        self._path_ids: Dict[str, int] = {}
+        self._removed: Set[int] = set()
+
+    @classmethod
+    def load(cls, path: Union[str, Path] = INDEX_FILE) -> "TextIndex":
+        """加载索引，文件不存在时返回空索引"""
+        index = cls(path)
+        resolved = FileManager.resolve_path(index.path)
+        if not resolved.exists():
+            return index
+        data = FileManager.load_json(resolved)
+        index.docs = data.get("docs", [])
+        index.paths = data.get("paths", [])
+        index.sources = data.get("sources", {})
+        if data.get("format", 1) >= 2:
+            index.postings = dict(data.get("postings", {}))
+        else:
+            index.postings = {token: set(items) for token, items in data.get("postings", {}).items()}
+        index._path_ids = {path: i for i, path in enumerate(index.paths)}
+        # 兼容压实前保存的索引，下次保存时一并压实
+        index._removed = {doc_id for doc_id, doc in enumerate(index.docs) if doc is None}
+        return index
+
+    def _items(self, token: str) -> Set[int]:
+        """取出(必要时解码)一个词的倒排项集合，不存在时新建"""
+        items = self.postings.get(token)
+        if items is None:
+            items = self.postings[token] = set()
+        elif isinstance(items, str):
+            items = self.postings[token] = decode_postings(items)
+        return items
+
+    def compact(self) -> None:
+        """
+        功能: 丢弃作废记录
+
+        步骤:
+        1. 仍有效的记录按原顺序重新编号
+        2. 只保留仍被引用的JSON路径，按原顺序重新编号
+        3. 按新编号重写倒排项，删除没有倒排项的词
+        """
+        doc_ids: Dict[int, int] = {}
+        docs: List[Optional[Dict]] = []
+        for doc_id, doc in enumerate(self.docs):
+            if doc is not None:
+                doc_ids[doc_id] = len(docs)
+                docs.append(doc)
+
+        kept: Dict[str, List[int]] = {}
+        used_paths: Set[int] = set()
+        for token in list(self.postings):
+            items = [item for item in self._items(token) if item >> PATH_BITS in doc_ids]
+            if items:
+                kept[token] = items
+                used_paths.update(item & PATH_MASK for item in items)
+        path_ids = {path_id: i for i, path_id in enumerate(sorted(used_paths))}
+
+        self.docs = docs
+        self.paths = [self.paths[path_id] for path_id in sorted(used_paths)]
+        self._path_ids = {path: i for i, path in enumerate(self.paths)}
+        self.postings = {
+            token: {(doc_ids[item >> PATH_BITS] << PATH_BITS) | path_ids[item & PATH_MASK] for item in items}
+            for token, items in kept.items()
+        }
+        self._removed = set()
+
+    def save(self) -> Path:
+        """压实作废记录后保存索引"""
+        if self._removed:
+            self.compact()
+        return FileManager.save_json({
+            "docs": self.docs,
+            "paths": self.paths,
+            "sources": self.sources,
+            "format": INDEX_FORMAT,
+            "postings": {
+                token: items if isinstance(items, str) else encode_postings(items)
+                for token, items in self.postings.items()
+            },
+        }, self.path)
+
+    def _path_id(self, path: str) -> int:
+        path_id = self._path_ids.get(path)
+        if path_id is None:
+            path_id = len(self.paths)
+            self.paths.append(path)
+            self._path_ids[path] = path_id
+        return path_id
+
+    def add_record(self, record: Dict, meta: Dict) -> int:
+        """
+        功能: 索引一条请求记录
+
+        输入:
+        - record: 请求记录(索引其 response.body)
+        - meta: 记录元信息，随查询结果返回
+
+        返回值:
+        - 记录号
+        """
+        doc_id = len(self.docs)
+        self.docs.append(meta)
+        body = (record.get("response") or {}).get("body")
+        for path, text in iter_strings(body):
+            posting = (doc_id << PATH_BITS) | self._path_id(path)
+            for token in tokenize(text):
+                self._items(token).add(posting)
+        return doc_id
+
+    def remove_source(self, source: str) -> int:
+        """作废某个文件的全部记录，返回作废的记录数"""
+        removed = 0
+        for doc_id, doc in enumerate(self.docs):
+            if doc is not None and doc["file"] == source:
+                self.docs[doc_id] = None
+                self._removed.add(doc_id)
+                removed += 1
+        self.sources.pop(source, None)
+        return removed
+
+    def add_file(self, filepath: Union[str, Path], version: Optional[str] = None) -> int:
+        """
+        功能: 索引一个 api_*.json 文件，文件已索引过时先作废旧记录
+
+        返回值:
+        - 新索引的记录数
+        """
+        filepath = Path(filepath)
+        source = filepath.as_posix()
+        if source in self.sources:
+            self.remove_source(source)
+
+        api_type = filepath.name[len("api_"):].split(".")[0] if filepath.name.startswith("api_") else None
+        records = FileManager.load_json(filepath)
+        for i, record in enumerate(records):
+            self.add_record(record, {
+                "file": source,
+                "index": i,
+                "url": record.get("url"),
+                "api_type": record.get("api_type", api_type),
+                "version": version or record.get("version"),
+            })
+        self.sources[source] = filepath.stat().st_mtime
+        return len(records)
+
+    def update(self, api_dir: Union[str, Path] = API_DIR) -> int:
+        """
+        功能: 增量更新 - 只索引新增或修改过的 api_*.json，并作废已删除文件的记录
+
+        返回值:
+        - 新索引的记录数
+        """
+        api_dir = Path(api_dir)
+        current: Dict[str, Path] = {}
+        if api_dir.exists():
+            for version_dir in sorted(p for p in api_dir.iterdir() if p.is_dir()):
+                for api_type in {p.name[len("api_"):].split(".")[0] for p in version_dir.glob("api_*.json*")}:
+                    filepath = FileManager.resolve_path(version_dir / f"api_{api_type}.json")
+                    current[filepath.as_posix()] = filepath
+
+        for source in [source for source in self.sources if source not in current]:
+            self.remove_source(source)
+
+        added = 0
+        for source, filepath in current.items():
+            if self.sources.get(source) != filepath.stat().st_mtime:
+                added += self.add_file(filepath, filepath.parent.name)
+        return added
+
+    def search(self, query: str, limit: int = 50) -> List[Dict]:
+        """
+        功能: 查询同一JSON路径下同时包含所有查询词的位置
+
+        返回值:
+        - [{"file", "index", "url", "api_type", "version", "path"}, ...]
+        """
+        tokens = query_tokens(query)
+        if not tokens:
+            return []
+        if any(token not in self.postings for token in tokens):
+            return []
+        postings = sorted((self._items(token) for token in tokens), key=len)
+        matches = postings[0].intersection(*postings[1:]) if len(postings) > 1 else postings[0]
+
+        results = []
+        for item in sorted(matches):
+            doc = self.docs[item >> PATH_BITS]
+            if doc is None:
+                continue
+            results.append(dict(doc, path=self.paths[item & PATH_MASK]))
+            if len(results) >= limit:
+                break
+        return results
+
+
+def update_index(api_dir: Union[str, Path] = API_DIR, path: Union[str, Path] = INDEX_FILE) -> int:
+    """加载、增量更新并保存索引，返回新索引的记录数"""
+    index = TextIndex.load(path)
+    added = index.update(api_dir)
+    if added or index._removed:
+        index.save()
+    return added
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="捕获响应体的全文倒排索引")
+    parser.add_argument("--index", default=str(INDEX_FILE), help="索引文件路径")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    update_parser = subparsers.add_parser("update", help="增量更新索引")
+    update_parser.add_argument("api_dir", nargs="?", default=str(API_DIR), help="捕获数据目录")
+    update_parser.add_argument("--rebuild", action="store_true", help="丢弃旧索引并完整重建")
+
+    search_parser = subparsers.add_parser("search", help="查询索引")
+    search_parser.add_argument("query", help="查询文本(英雄名、羁绊描述、字段名等)")
+    search_parser.add_argument("--limit", type=int, default=20, help="最多显示的结果数 (默认: 20)")
+    args = parser.parse_args(argv)
+
+    if args.command == "update":
+        start = time.perf_counter()
+        index = TextIndex(args.index) if args.rebuild else TextIndex.load(args.index)
+        added = index.update(args.api_dir)
+        index.save()
+        print(f"新索引 {added} 条记录，共 {len(index.postings)} 个词，耗时 {time.perf_counter() - start:.2f} 秒")
+        return 0
+
+    start = time.perf_counter()
+    index = TextIndex.load(args.index)
+    load_elapsed = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    results = index.search(args.query, args.limit)
+    elapsed = (time.perf_counter() - start) * 1000
+    for result in results:
+        print(f"[{result['version']}/{result['api_type']}] #{result['index']} {result['path']}  {result['url']}")
+    print(f"共 {len(results)} 条结果，加载索引 {load_elapsed:.2f} ms，查询耗时 {elapsed:.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,288 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+功能: 基于列式数据表的向量化羁绊激活计算
+
+说明:
+- 英雄 × 羁绊 的成员矩阵由 game_tables.npz 中的 heroes.traits 与 traits 表构建
+- 羁绊、种族、职业的ID可能重叠，羁绊键统一带来源前缀(如 race:1 / job:1)
+- 阵容(棋盘)编码为 棋盘 × 英雄 的0/1矩阵，羁绊人数 = 棋盘矩阵 @ 成员矩阵
+- 激活档位 = 羁绊人数 >= 各档阈值 的个数，一次矩阵运算完成成千上万个棋盘
+
+使用方法:
+python trait_engine.py [game_tables.npz] [--boards 5000] [--benchmark]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from game_tables import GameTables, TABLES_FILENAME, source_key
+from utilities import API_DIR
+
+# 档位阈值矩阵中的填充值，保证填充位永远不会被激活
+LEVEL_PADDING = np.iinfo(np.int16).max
+
+
+class TraitEngine:
+    """
+    羁绊激活引擎
+
+    属性:
+    - hero_ids / trait_ids: 行列对应的实体ID，trait_ids 为带来源前缀的羁绊键
+    - membership: float32 0/1矩阵 (英雄数 × 羁绊数)
+    - levels: int16 矩阵 (羁绊数 × 最大档位数)，不足部分以 LEVEL_PADDING 填充
+    """
+
+    def __init__(self, hero_ids: Sequence[str], trait_ids: Sequence[str],
+                 hero_traits: Sequence[Iterable[str]], trait_levels: Sequence[Iterable[int]]):
+        self.hero_ids = list(hero_ids)
+        self.trait_ids = list(trait_ids)
+        self.hero_index: Dict[str, int] = {hero_id: i for i, hero_id in enumerate(self.hero_ids)}
+        self.trait_index: Dict[str, int] = {trait_id: i for i, trait_id in enumerate(self.trait_ids)}
+        if len(self.trait_index) != len(self.trait_ids):
+            raise ValueError("羁绊键重复，不同来源的羁绊需使用 source_key 区分")
+
+        # 使用 float32 存储，使矩阵乘法走 BLAS 路径；人数均为小整数，不存在精度问题
+        self.membership = np.zeros((len(self.hero_ids), len(self.trait_ids)), dtype=np.float32)
+        for row, traits in enumerate(hero_traits):
+            for trait_id in traits:
+                column = self.trait_index.get(trait_id)
+                if column is not None:
+                    self.membership[row, column] = 1
+
+        level_lists = [sorted(int(level) for level in levels) for levels in trait_levels]
+        width = max((len(levels) for levels in level_lists), default=0)
+        self.levels = np.full((len(self.trait_ids), max(width, 1)), LEVEL_PADDING, dtype=np.int16)
+        for row, levels in enumerate(level_lists):
+            self.levels[row, :len(levels)] = levels
+
+    @classmethod
+    def from_tables(cls, tables: GameTables) -> "TraitEngine":
+        """从 GameTables 构建引擎"""
+        heroes = tables["heroes"]
+        traits = tables["traits"]
+
+        hero_ids = tables.decode(heroes["id"])
+        trait_ids = [
+            source_key(kind, trait_id)
+            for kind, trait_id in zip(tables.decode(traits["kind"]), tables.decode(traits["id"]))
+        ]
+        hero_traits = [
+            tables.decode(tables.list_column("heroes", "traits", row))
+            for row in range(len(hero_ids))
+        ]
+        trait_levels = []
+        for row in range(len(trait_ids)):
+            levels = []
+            for value in tables.decode(tables.list_column("traits", "levels", row)):
+                try:
+                    levels.append(int(value))
+                except (TypeError, ValueError):
+                    continue
+            trait_levels.append(levels)
+        return cls(hero_ids, trait_ids, hero_traits, trait_levels)
+
+    @classmethod
+    def load(cls, path) -> "TraitEngine":
+        """从 game_tables.npz 构建引擎"""
+        return cls.from_tables(GameTables.load(path))
+
+    def encode_boards(self, boards: Sequence[Iterable[str]]) -> np.ndarray:
+        """
+        功能: 将棋盘(英雄ID列表)编码为 棋盘 × 英雄 的0/1矩阵
+
+        说明:
+        - 同一英雄在一个棋盘上重复出现只计一次，与游戏内羁绊计数规则一致
+        - 未知英雄ID会被忽略
+        """
+        rows, columns = [], []
+        for row, board in enumerate(boards):
+            for hero_id in board:
+                column = self.hero_index.get(hero_id)
+                if column is not None:
+                    rows.append(row)
+                    columns.append(column)
+        encoded = np.zeros((len(boards), len(self.hero_ids)), dtype=np.float32)
+        encoded[rows, columns] = 1
+        return encoded
+
+    def trait_counts(self, encoded: np.ndarray) -> np.ndarray:
+        """羁绊人数矩阵 (棋盘数 × 羁绊数)"""
+        return (encoded @ self.membership).astype(np.int16)
+
+    def activation_tiers(self, counts: np.ndarray) -> np.ndarray:
+        """
+        功能: 计算激活档位
+
+        返回值:
+        - int8 矩阵 (棋盘数 × 羁绊数)，0 表示未激活，k 表示达到第k档
+        """
+        # 档位数很少(通常不超过4)，按档位逐列比较比构造三维布尔数组更省内存
+        tiers = np.zeros(counts.shape, dtype=np.int8)
+        for column in range(self.levels.shape[1]):
+            tiers += counts >= self.levels[:, column]
+        return tiers
+
+    def evaluate(self, boards: Sequence[Iterable[str]]) -> Dict[str, np.ndarray]:
+        """对一批棋盘计算羁绊人数与激活档位"""
+        counts = self.trait_counts(self.encode_boards(boards))
+        return {"counts": counts, "tiers": self.activation_tiers(counts)}
+
+    def active_traits(self, tiers: np.ndarray, board: int) -> Dict[str, int]:
+        """取出某个棋盘激活的羁绊 {羁绊ID: 档位}"""
+        columns = np.nonzero(tiers[board])[0]
+        return {self.trait_ids[column]: int(tiers[board, column]) for column in columns}
+
+
+def lineup_boards(tables: GameTables) -> List[List[str]]:
+    """从 lineups 表取出每个阵容的英雄ID列表"""
+    return [
+        [hero for hero in tables.decode(tables.list_column("lineups", "heroes", row)) if hero is not None]
+        for row in range(tables.row_count("lineups"))
+    ]
+
+
+def naive_activation(engine: TraitEngine, boards: Sequence[Iterable[str]]) -> np.ndarray:
+    """
+    功能: 逐个棋盘循环计算激活档位(基准对照实现)
+
+    说明:
+    - 按羁绊列计数，不经过 trait_index，可以发现羁绊键冲突导致的错误计数
+
+    返回值:
+    - 与 TraitEngine.activation_tiers 相同形状的档位矩阵
+    """
+    hero_traits = [
+        np.nonzero(engine.membership[row])[0].tolist()
+        for row in range(len(engine.hero_ids))
+    ]
+    trait_levels = [
+        [int(level) for level in engine.levels[row] if level != LEVEL_PADDING]
+        for row in range(len(engine.trait_ids))
+    ]
+
+    tiers = np.zeros((len(boards), len(engine.trait_ids)), dtype=np.int8)
+    for row, board in enumerate(boards):
+        counts: Dict[int, int] = {}
+        for hero_id in set(board):
+            index = engine.hero_index.get(hero_id)
+            if index is None:
+                continue
+            for column in hero_traits[index]:
+                counts[column] = counts.get(column, 0) + 1
+        for column, count in counts.items():
+            tier = 0
+            for level in trait_levels[column]:
+                if count >= level:
+                    tier += 1
+            tiers[row, column] = tier
+    return tiers
+
+
+def random_boards(engine: TraitEngine, count: int, size: int = 8, seed: int = 0) -> List[List[str]]:
+    """随机生成候选棋盘"""
+    rng = np.random.default_rng(seed)
+    size = min(size, len(engine.hero_ids))
+    return [
+        [engine.hero_ids[i] for i in rng.choice(len(engine.hero_ids), size=size, replace=False)]
+        for _ in range(count)
+    ]
+
+
+def synthetic_engine(heroes: int = 60, traits: int = 28, seed: int = 0) -> TraitEngine:
+    """生成与真实赛季规模相近的随机引擎，用于没有捕获数据时的基准测试"""
+    rng = np.random.default_rng(seed)
+    hero_ids = [f"h{i}" for i in range(heroes)]
+    trait_ids = [f"t{i}" for i in range(traits)]
+    hero_traits = [
+        [trait_ids[t] for t in rng.choice(traits, size=rng.integers(1, 4), replace=False)]
+        for _ in range(heroes)
+    ]
+    trait_levels = [
+        sorted(rng.choice(np.arange(1, 10), size=rng.integers(1, 5), replace=False).tolist())
+        for _ in range(traits)
+    ]
+    return TraitEngine(hero_ids, trait_ids, hero_traits, trait_levels)
+
+
+def benchmark(engine: TraitEngine, boards: Sequence[Iterable[str]], repeat: int = 3) -> Dict[str, float]:
+    """
+    功能: 对比向量化实现与逐棋盘循环实现
+
+    返回值:
+    - 两种实现的最佳耗时(秒)与加速比，matrix_seconds 为预编码后仅矩阵运算的耗时
+    - 结果不一致时抛出 AssertionError
+    """
+    def best_of(func):
+        best, result = float("inf"), None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            best = min(best, time.perf_counter() - start)
+        return best, result
+
+    vectorized_time, vectorized = best_of(lambda: engine.evaluate(boards)["tiers"])
+    encoded = engine.encode_boards(boards)
+    matrix_time, _ = best_of(lambda: engine.activation_tiers(engine.trait_counts(encoded)))
+    naive_time, naive = best_of(lambda: naive_activation(engine, boards))
+    assert np.array_equal(vectorized, naive), "向量化结果与逐棋盘结果不一致"
+
+    return {
+        "boards": len(boards),
+        "vectorized_seconds": vectorized_time,
+        "matrix_seconds": matrix_time,
+        "naive_seconds": naive_time,
+        "speedup": naive_time / vectorized_time if vectorized_time else float("inf"),
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="向量化羁绊激活计算")
+    parser.add_argument("tables", nargs="?", help=f"{TABLES_FILENAME} 路径，默认使用第一个版本目录")
+    parser.add_argument("--boards", type=int, default=5000, help="随机候选棋盘数量 (默认: 5000)")
+    parser.add_argument("--size", type=int, default=8, help="每个随机棋盘的英雄数量 (默认: 8)")
+    parser.add_argument("--benchmark", action="store_true", help="与逐棋盘循环实现进行基准对比")
+    parser.add_argument("--synthetic", action="store_true", help="使用随机生成的英雄/羁绊数据")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+
+    boards: List[List[str]] = []
+    if args.synthetic:
+        engine = synthetic_engine()
+    else:
+        path = Path(args.tables) if args.tables else next(iter(sorted(API_DIR.glob(f"*/{TABLES_FILENAME}"))), None)
+        if path is None or not path.exists():
+            print(f"未找到 {TABLES_FILENAME}，请先运行 game_tables.py 或使用 --synthetic")
+            return 1
+        tables = GameTables.load(path)
+        engine = TraitEngine.from_tables(tables)
+        boards = lineup_boards(tables)
+        print(f"已加载 {path}: {len(engine.hero_ids)} 个英雄, {len(engine.trait_ids)} 个羁绊, {len(boards)} 个阵容")
+
+    boards += random_boards(engine, args.boards, args.size)
+
+    if args.benchmark:
+        result = benchmark(engine, boards)
+        print(f"棋盘数: {result['boards']}")
+        print(f"向量化(含编码): {result['vectorized_seconds'] * 1000:.2f} ms")
+        print(f"向量化(仅矩阵运算): {result['matrix_seconds'] * 1000:.2f} ms")
+        print(f"逐棋盘循环: {result['naive_seconds'] * 1000:.2f} ms")
+        print(f"加速比: {result['speedup']:.1f}x")
+    else:
+        tiers = engine.evaluate(boards)["tiers"]
+        active = (tiers > 0).sum(axis=1)
+        print(f"棋盘数: {len(boards)}, 平均激活羁绊数: {active.mean():.2f}, 最多: {active.max() if len(active) else 0}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
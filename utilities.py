@@ -5,13 +5,21 @@
 from pathlib import Path
 from datetime import datetime
 import logging
+import atexit
+import time
 import json
-from typing import Union, Dict, Any, Optional, List, Callable
+import re
+import fnmatch
+from typing import Union, Dict, Any, Optional, List, Callable, Iterable, AsyncIterator
 import csv
 import os
 import base64
+import mmap
 from urllib.parse import urlparse, parse_qs
 
+# 注意: 导入本模块不应有副作用(不创建目录、不加载重量级依赖)
+# asyncio / logging.handlers / gzip / zstandard 均在首次使用时才导入
+
 # 项目根目录 - 修改为当前脚本所在目录
 ROOT_DIR = Path(__file__).parent
 
@@ -24,17 +32,59 @@ DEBUG_DIR = CRAWLER_DIR / "debug"  # 调试数据目录
 # 日志目录
 LOG_DIR = ROOT_DIR / "logs"
 
+# zstd压缩为可选依赖: None 表示尚未尝试导入，False 表示未安装
+_zstandard = None
+
+
+def _zstd():
+    """延迟导入zstandard，未安装时返回None"""
+    global _zstandard
+    if _zstandard is None:
+        try:
+            import zstandard
+            _zstandard = zstandard
+        except ImportError:
+            _zstandard = False
+    return _zstandard or None
+
+
+def __getattr__(name: str):
+    # 兼容 from utilities import HAS_ZSTD
+    if name == "HAS_ZSTD":
+        return _zstd() is not None
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 class PathManager:
     """路径管理器"""
 
+    # 已确认存在的目录，目录在首次写入时才创建，之后不再重复 mkdir
+    _existing: set = set()
+
     @staticmethod
     def ensure_dir(path: Union[str, Path]) -> Path:
-        """确保目录存在"""
+        """确保目录存在(每个目录只在首次调用时创建)"""
         path = Path(path)
-        path.mkdir(parents=True, exist_ok=True)
+        if path not in PathManager._existing:
+            path.mkdir(parents=True, exist_ok=True)
+            PathManager._existing.add(path)
+            PathManager._existing.update(path.parents)
         return path
 
+    @staticmethod
+    def forget(path: Optional[Union[str, Path]] = None) -> None:
+        """
+        功能: 清除目录存在性缓存
+
+        输入:
+        - path: 目录被外部删除时传入该目录，None 表示清空全部缓存
+        """
+        if path is None:
+            PathManager._existing.clear()
+            return
+        path = Path(path)
+        PathManager._existing = {p for p in PathManager._existing if p != path and path not in p.parents}
+
     @staticmethod
     def get_debug_dirs(timestamp: Optional[str] = None) -> Dict[str, Path]:
         """获取调试目录"""
@@ -57,27 +107,495 @@ class PathManager:
 class FileManager:
     """文件管理器"""
 
+    # 压缩格式 -> 文件后缀
+    COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+    # 压缩格式 -> 文件头魔数，用于读取时自动识别
+    COMPRESSION_MAGIC = {"gzip": b"\x1f\x8b", "zstd": b"\x28\xb5\x2f\xfd"}
+
+    # 默认压缩配置: format 为 None / "gzip" / "zstd"，level 为 None 时使用各格式默认级别
+    compression: Dict[str, Any] = {"format": None, "level": None}
+
+    @staticmethod
+    def configure_compression(fmt: Optional[str] = None, level: Optional[int] = None) -> None:
+        """
+        功能: 设置 save_json 的默认压缩方式
+
+        输入:
+        - fmt: None(不压缩) / "gzip" / "zstd"；zstd不可用时回退为gzip
+        - level: 压缩级别
+        """
+        if fmt not in (None, "gzip", "zstd"):
+            raise ValueError(f"不支持的压缩格式: {fmt}")
+        if fmt == "zstd" and _zstd() is None:
+            logging.getLogger(__name__).warning("未安装zstandard库，压缩格式回退为gzip")
+            fmt = "gzip"
+        FileManager.compression = {"format": fmt, "level": level}
+
+    @staticmethod
+    def detect_compression(filepath: Union[str, Path]) -> Optional[str]:
+        """
+        功能: 判断文件的压缩格式
+
+        步骤:
+        1. 按后缀判断: .gz / .zst
+        2. 文件存在时读取魔数判断，兼容后缀不规范的文件
+        """
+        filepath = Path(filepath)
+        for fmt, suffix in FileManager.COMPRESSION_SUFFIXES.items():
+            if filepath.suffix == suffix:
+                return fmt
+        if filepath.exists():
+            with open(filepath, "rb") as f:
+                head = f.read(4)
+            for fmt, magic in FileManager.COMPRESSION_MAGIC.items():
+                if head.startswith(magic):
+                    return fmt
+        return None
+
+    @staticmethod
+    def resolve_path(filepath: Union[str, Path]) -> Path:
+        """
+        功能: 在原路径及其压缩版本(.gz / .zst)中选出实际要读取的文件
+
+        说明:
+        - 多个版本同时存在时(如切换压缩配置前后)，取最近写入的一个
+        - 均不存在时返回原路径
+        """
+        filepath = Path(filepath)
+        candidates = [filepath] + [
+            filepath.with_name(filepath.name + suffix)
+            for suffix in FileManager.COMPRESSION_SUFFIXES.values()
+        ]
+        existing = [candidate for candidate in candidates if candidate.exists()]
+        if not existing:
+            return filepath
+        return max(existing, key=lambda candidate: candidate.stat().st_mtime)
+
+    @staticmethod
+    def open_text(
+        filepath: Union[str, Path],
+        mode: str = "r",
+        compression: Optional[str] = None,
+        level: Optional[int] = None,
+    ):
+        """
+        功能: 以流式方式打开(可能压缩的)文本文件
+
+        输入:
+        - filepath: 文件路径
+        - mode: "r" 或 "w"
+        - compression: 压缩格式，None 时按后缀/魔数自动识别
+        - level: 写入时的压缩级别
+
+        返回值:
+        - 文本文件对象
+        """
+        if compression is None:
+            compression = FileManager.detect_compression(filepath)
+
+        if compression == "gzip":
+            import gzip
+            kwargs = {} if level is None or mode == "r" else {"compresslevel": level}
+            return gzip.open(filepath, mode + "t", encoding="utf-8", **kwargs)
+        if compression == "zstd":
+            zstandard = _zstd()
+            if zstandard is None:
+                raise RuntimeError(f"读取 {filepath} 需要安装zstandard库")
+            if mode == "r":
+                return zstandard.open(filepath, "rt", encoding="utf-8")
+            cctx = zstandard.ZstdCompressor(level=3 if level is None else level)
+            return zstandard.open(filepath, "wt", cctx=cctx, encoding="utf-8")
+        return open(filepath, mode, encoding="utf-8")
+
     @staticmethod
     def save_json(
-        data: Any, filepath: Union[str, Path], ensure_ascii: bool = False
-    ) -> None:
-        """保存JSON数据"""
+        data: Any,
+        filepath: Union[str, Path],
+        ensure_ascii: bool = False,
+        compression: Optional[str] = None,
+        level: Optional[int] = None,
+    ) -> Path:
+        """
+        功能: 保存JSON数据
+
+        说明:
+        - 后缀为 .gz / .zst 时按对应格式压缩
+        - 否则使用 compression 参数或 configure_compression 的默认配置，并自动追加压缩后缀
+        - 压缩写入时不缩进，流式写出
+        - 先写入同目录下的临时文件再原子替换，读取方不会读到写了一半的文件
+
+        返回值:
+        - 实际写入的文件路径
+        """
         filepath = Path(filepath)
         PathManager.ensure_dir(filepath.parent)
 
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=ensure_ascii, indent=2)
+        fmt = FileManager.detect_compression(filepath) if filepath.suffix in (".gz", ".zst") else None
+        if fmt is None:
+            fmt = compression or FileManager.compression["format"]
+            if fmt:
+                filepath = filepath.with_name(filepath.name + FileManager.COMPRESSION_SUFFIXES[fmt])
+        if level is None:
+            level = FileManager.compression["level"]
+
+        temp_path = filepath.with_name(f".{filepath.name}.{os.getpid()}.tmp")
+        try:
+            with (FileManager.open_text(temp_path, "w", fmt, level) if fmt
+                  else open(temp_path, "w", encoding="utf-8")) as f:
+                if fmt:
+                    json.dump(data, f, ensure_ascii=ensure_ascii)
+                else:
+                    json.dump(data, f, ensure_ascii=ensure_ascii, indent=2)
+            os.replace(temp_path, filepath)
+        except BaseException:
+            if temp_path.exists():
+                temp_path.unlink()
+            raise
+        return filepath
 
     @staticmethod
     def load_json(filepath: Union[str, Path]) -> Any:
-        """加载JSON数据"""
-        with open(filepath, "r", encoding="utf-8") as f:
+        """加载JSON数据，透明支持 gzip / zstd 压缩文件"""
+        with FileManager.open_text(FileManager.resolve_path(filepath), "r") as f:
             return json.load(f)
 
 
+class ArchiveManager:
+    """
+    归档管理器
+
+    归档格式:
+    - <name>.jsonl: 每行一条JSON记录(UTF-8，无缩进)
+    - <name>.jsonl.idx: 侧车索引(JSON)，记录ID -> [字节偏移, 字节长度]
+    """
+
+    INDEX_SUFFIX = ".idx"
+
+    @staticmethod
+    def index_path(filepath: Union[str, Path]) -> Path:
+        """获取归档对应的索引文件路径"""
+        filepath = Path(filepath)
+        return filepath.with_name(filepath.name + ArchiveManager.INDEX_SUFFIX)
+
+    @staticmethod
+    def write_archive(
+        records: List[Any],
+        filepath: Union[str, Path],
+        key: Optional[Callable[[Any], Any]] = None,
+    ) -> Path:
+        """
+        功能: 写出带偏移索引的归档
+
+        输入:
+        - records: 记录列表(或任意可迭代对象)
+        - filepath: 归档路径，建议使用 .jsonl 后缀
+        - key: 生成记录ID的函数，默认使用记录序号；ID重复时追加 #序号
+
+        返回值:
+        - 归档文件路径
+        """
+        filepath = Path(filepath)
+        PathManager.ensure_dir(filepath.parent)
+
+        offsets: Dict[str, List[int]] = {}
+        order: List[str] = []
+        position = 0
+        with open(filepath, "wb") as f:
+            for i, record in enumerate(records):
+                line = json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+                record_id = str(key(record)) if key else str(i)
+                if record_id in offsets:
+                    record_id = f"{record_id}#{i}"
+                offsets[record_id] = [position, len(line) - 1]
+                order.append(record_id)
+                f.write(line)
+                position += len(line)
+
+        with open(ArchiveManager.index_path(filepath), "w", encoding="utf-8") as f:
+            json.dump({"count": len(order), "order": order, "offsets": offsets}, f, ensure_ascii=False)
+
+        return filepath
+
+    @staticmethod
+    def convert_json(
+        json_path: Union[str, Path],
+        archive_path: Optional[Union[str, Path]] = None,
+        key: Optional[Callable[[Any], Any]] = None,
+    ) -> Path:
+        """将已有的 JSON 数组文件(如 all_api_requests_*.json)转换为归档"""
+        json_path = Path(json_path)
+        if archive_path is None:
+            name = json_path.name
+            for suffix in list(FileManager.COMPRESSION_SUFFIXES.values()) + [".json"]:
+                if name.endswith(suffix):
+                    name = name[: -len(suffix)]
+            archive_path = json_path.with_name(name + ".jsonl")
+        return ArchiveManager.write_archive(FileManager.load_json(json_path), archive_path, key)
+
+    @staticmethod
+    def open_archive(filepath: Union[str, Path]) -> "ArchiveReader":
+        """打开归档用于随机读取"""
+        return ArchiveReader(filepath)
+
+
+class ArchiveReader:
+    """
+    基于mmap的归档读取器
+
+    - get / [] 只解码被请求的记录
+    - 迭代时逐条解码，不会一次性构建完整列表
+
+    使用示例:
+        with ArchiveManager.open_archive(path) as archive:
+            record = archive["42"]
+            for record in archive:
+                ...
+    """
+
+    def __init__(self, filepath: Union[str, Path]):
+        self.filepath = Path(filepath)
+        with open(ArchiveManager.index_path(self.filepath), "r", encoding="utf-8") as f:
+            index = json.load(f)
+        self.order: List[str] = index["order"]
+        self.offsets: Dict[str, List[int]] = index["offsets"]
+
+        self._file = open(self.filepath, "rb")
+        # 空文件无法mmap
+        if os.fstat(self._file.fileno()).st_size:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._mmap = None
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def __contains__(self, record_id: str) -> bool:
+        return record_id in self.offsets
+
+    def __getitem__(self, record_id: str) -> Any:
+        offset, length = self.offsets[record_id]
+        return json.loads(self._mmap[offset:offset + length])
+
+    def get(self, record_id: str, default: Any = None) -> Any:
+        """按ID读取单条记录"""
+        if record_id not in self.offsets:
+            return default
+        return self[record_id]
+
+    def get_many(self, record_ids: List[str]) -> List[Any]:
+        """按ID批量读取，按偏移排序访问以减少缺页"""
+        positions = sorted(range(len(record_ids)), key=lambda i: self.offsets[record_ids[i]][0])
+        result: List[Any] = [None] * len(record_ids)
+        for i in positions:
+            result[i] = self[record_ids[i]]
+        return result
+
+    def keys(self) -> List[str]:
+        return list(self.order)
+
+    def __iter__(self):
+        for record_id in self.order:
+            yield self[record_id]
+
+    def items(self):
+        """逐条迭代 (记录ID, 记录)"""
+        for record_id in self.order:
+            yield record_id, self[record_id]
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def __enter__(self) -> "ArchiveReader":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+class _BatchFlushMixin:
+    """
+    批量刷新: emit 后不立即 flush，累计 batch_size 条或由后台线程空闲时统一刷新
+    """
+
+    batch_size = 64
+    _pending = 0
+
+    def flush(self):
+        self._pending += 1
+        if self._pending >= self.batch_size:
+            self.force_flush()
+
+    def force_flush(self):
+        self._pending = 0
+        super().flush()
+
+
+class BatchedStreamHandler(_BatchFlushMixin, logging.StreamHandler):
+    """批量刷新的控制台日志处理器"""
+
+
+class BatchedFileHandler(_BatchFlushMixin, logging.FileHandler):
+    """批量刷新的文件日志处理器"""
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    逐请求日志限流
+
+    说明:
+    - 只作用于带 rate_key 属性的日志 (logger.info(..., extra={"rate_key": "capture"}))
+    - 每个 rate_key 独立的令牌桶，每秒最多 rate 条，超出的日志被丢弃
+    - 丢弃后第一条放行的日志会附带被省略的条数
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1)
+        self._buckets: Dict[str, List[float]] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, "rate_key", None)
+        if key is None or record.levelno >= logging.WARNING:
+            return True
+
+        now = time.monotonic()
+        bucket = self._buckets.setdefault(key, [self.burst, now, 0])
+        bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if bucket[0] < 1:
+            bucket[2] += 1
+            return False
+
+        bucket[0] -= 1
+        if bucket[2]:
+            record.msg = f"{record.getMessage()} (期间省略 {bucket[2]} 条同类日志)"
+            record.args = None
+            bucket[2] = 0
+        return True
+
+
+def _create_queue_listener(log_queue, handlers: List[logging.Handler], flush_interval: float):
+    """
+    功能: 创建队列空闲 flush_interval 秒时刷新所有处理器的 QueueListener
+
+    说明:
+    - logging.handlers 会连带导入 socket/pickle 等模块，只在首次配置队列日志时导入
+    """
+    from logging.handlers import QueueListener
+    import queue
+
+    class FlushingQueueListener(QueueListener):
+        def dequeue(self, block):
+            while True:
+                try:
+                    return self.queue.get(block, timeout=flush_interval)
+                except queue.Empty:
+                    self.flush()
+
+        def flush(self):
+            for handler in self.handlers:
+                if isinstance(handler, _BatchFlushMixin):
+                    handler.force_flush()
+
+        def stop(self):
+            super().stop()
+            self.flush()
+
+    return FlushingQueueListener(log_queue, *handlers, respect_handler_level=True)
+
+
 class LogManager:
     """日志管理器"""
 
+    # 当前生效的队列日志监听器
+    _listener = None
+
+    @staticmethod
+    def setup_queue_logging(
+        log_files: Union[str, Path, List[Union[str, Path]], None] = None,
+        level: int = logging.INFO,
+        fmt: str = "%(asctime)s - %(levelname)s - %(message)s",
+        console: bool = True,
+        console_stream=None,
+        batch_size: int = 64,
+        flush_interval: float = 0.5,
+        rate_limit: Optional[float] = None,
+        logger_name: Optional[str] = None,
+    ) -> logging.Logger:
+        """
+        功能: 配置非阻塞的队列日志
+
+        说明:
+        - 根日志器只挂一个 QueueHandler，调用方只做入队，不做任何IO
+        - 后台 QueueListener 线程负责写文件/控制台，批量 flush，队列空闲时自动刷新
+        - 与 logging.basicConfig 一样，根日志器已配置时不会重复配置
+        - 程序退出时自动停止监听器并刷新剩余日志
+        - 带 extra={"console": False} 的日志只写文件，不输出到控制台
+
+        输入:
+        - log_files: 日志文件路径(或路径列表)
+        - level: 日志级别
+        - fmt: 日志格式
+        - console: 是否输出到控制台
+        - console_stream: 控制台输出流，默认 sys.stderr
+        - batch_size: 每个处理器累计多少条后强制 flush
+        - flush_interval: 队列空闲多少秒后 flush
+        - rate_limit: 带 rate_key 的逐请求日志每秒最多条数，None 表示不限流
+        - logger_name: 返回的日志器名称
+
+        返回值:
+        - 日志器
+        """
+        root = logging.getLogger()
+        if root.handlers:
+            return logging.getLogger(logger_name)
+
+        if log_files is None:
+            log_files = []
+        elif isinstance(log_files, (str, Path)):
+            log_files = [log_files]
+
+        formatter = logging.Formatter(fmt)
+        handlers: List[logging.Handler] = []
+        for log_file in log_files:
+            PathManager.ensure_dir(Path(log_file).parent)
+            handlers.append(BatchedFileHandler(log_file, encoding="utf-8"))
+        if console:
+            console_handler = BatchedStreamHandler(console_stream)
+            console_handler.addFilter(lambda record: getattr(record, "console", True))
+            handlers.append(console_handler)
+        for handler in handlers:
+            handler.batch_size = batch_size
+            handler.setFormatter(formatter)
+
+        from logging.handlers import QueueHandler
+        import queue
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = QueueHandler(log_queue)
+        if rate_limit:
+            queue_handler.addFilter(RateLimitFilter(rate_limit))
+        root.addHandler(queue_handler)
+        root.setLevel(level)
+
+        listener = _create_queue_listener(log_queue, handlers, flush_interval)
+        listener.start()
+        LogManager._listener = listener
+        atexit.register(LogManager.stop_queue_logging)
+        return logging.getLogger(logger_name)
+
+    @staticmethod
+    def stop_queue_logging() -> None:
+        """停止队列日志监听器并刷新剩余日志"""
+        listener, LogManager._listener = LogManager._listener, None
+        if listener is not None:
+            listener.stop()
+
     @staticmethod
     def setup_logging(debug_dirs: Dict[str, Path]) -> logging.Logger:
         """设置日志"""
@@ -85,29 +603,351 @@ class LogManager:
         for dir_path in debug_dirs.values():
             PathManager.ensure_dir(dir_path)
 
-        # 配置日志
-        logging.basicConfig(
-            level=logging.INFO,
-            format="%(asctime)s - %(levelname)s - %(message)s",
-            handlers=[
-                # 主日志文件
-                logging.FileHandler(
-                    debug_dirs["logs"] / "crawler.log", encoding="utf-8"
-                ),
-                # 调试日志文件
-                logging.FileHandler(
-                    debug_dirs["logs"]
-                    / f"debug_{datetime.now().strftime('%H%M%S')}.log",
-                    encoding="utf-8",
-                ),
-                # 控制台输出
-                logging.StreamHandler(),
-            ],
-        )
+        # 主日志文件 + 调试日志文件 + 控制台输出
+        LogManager.setup_queue_logging([
+            debug_dirs["logs"] / "crawler.log",
+            debug_dirs["logs"] / f"debug_{datetime.now().strftime('%H%M%S')}.log",
+        ])
 
         return logging.getLogger(__name__)
 
 
+class RequestFilter:
+    """
+    编译后的请求过滤器
+
+    表达式语法:
+    - 条件: 字段:值，多个值用逗号分隔表示"任一"，含空格的值用双引号包裹
+      - host:jcc.qq.com / host:*.qq.com      主机名(精确或后缀)
+      - path:/m14/*/chess.js                  路径glob
+      - url:api,.json                         URL包含子串(不区分大小写)
+      - re:"chess\\.js$"                      URL正则
+      - type:xhr,fetch                        资源类型
+      - method:GET,POST                       请求方法
+      - status:200 / status:2xx / status:200-299
+      - ctype:json                            Content-Type包含子串
+      - size:>1024 / size:<65536 / size:100-2000   响应大小(字节)
+    - 组合: 空格或 and 表示与，or 表示或，not 或 - 前缀表示非，括号分组
+      例: (url:api,.json or re:"version.*\\.js") and not type:image,font
+
+    说明:
+    - 表达式只编译一次: 同一 or 组内的 url/re/path 条件合并为一个分组正则，host 条件合并为哈希集合
+    - 可匹配 Playwright 的 Request/Response 对象、捕获记录字典或URL字符串
+    """
+
+    FIELDS = ("host", "path", "url", "re", "type", "method", "status", "ctype", "size")
+    _TOKEN_PATTERN = re.compile(r'\s*(?:(\()|(\))|(-)|([A-Za-z]+):("(?:[^"\\]|\\.)*"|[^\s()]+)|([^\s()]+))')
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        self._tokens = self._tokenize(expression)
+        self._position = 0
+        node = self._parse_or() if self._tokens else ("all",)
+        if self._position != len(self._tokens):
+            raise ValueError(f"过滤表达式无法解析: {expression!r}")
+        self._match = self._compile(node)
+        del self._tokens
+
+    @classmethod
+    def compile(cls, expression: Optional[str]) -> "RequestFilter":
+        return cls(expression or "")
+
+    def __call__(self, subject) -> bool:
+        return self._match(_RequestView(subject))
+
+    def __repr__(self) -> str:
+        return f"RequestFilter({self.expression!r})"
+
+    # ---------- 解析 ----------
+
+    def _tokenize(self, expression: str) -> List[tuple]:
+        tokens = []
+        position = 0
+        expression = expression.strip()
+        while position < len(expression):
+            match = self._TOKEN_PATTERN.match(expression, position)
+            if not match or match.end() == position:
+                raise ValueError(f"过滤表达式无法解析: {expression!r} (位置 {position})")
+            position = match.end()
+            lparen, rparen, minus, field, value, word = match.groups()
+            if lparen:
+                tokens.append(("(",))
+            elif rparen:
+                tokens.append((")",))
+            elif minus:
+                tokens.append(("not",))
+            elif field:
+                field = field.lower()
+                if field not in self.FIELDS:
+                    raise ValueError(f"未知的过滤字段: {field} (可用: {', '.join(self.FIELDS)})")
+                if value.startswith('"'):
+                    values = [value[1:-1].replace('\\"', '"')]
+                else:
+                    values = [v for v in value.split(",") if v]
+                tokens.append(("term", field, values))
+            elif word.lower() in ("and", "or", "not"):
+                tokens.append((word.lower(),))
+            else:
+                raise ValueError(f"过滤条件缺少字段名: {word!r}")
+        return tokens
+
+    def _peek(self) -> Optional[str]:
+        return self._tokens[self._position][0] if self._position < len(self._tokens) else None
+
+    def _parse_or(self):
+        children = [self._parse_and()]
+        while self._peek() == "or":
+            self._position += 1
+            children.append(self._parse_and())
+        return children[0] if len(children) == 1 else ("or", children)
+
+    def _parse_and(self):
+        children = [self._parse_not()]
+        while self._peek() not in (None, "or", ")"):
+            if self._peek() == "and":
+                self._position += 1
+            children.append(self._parse_not())
+        return children[0] if len(children) == 1 else ("and", children)
+
+    def _parse_not(self):
+        kind = self._peek()
+        if kind == "not":
+            self._position += 1
+            return ("not", self._parse_not())
+        if kind == "(":
+            self._position += 1
+            node = self._parse_or()
+            if self._peek() != ")":
+                raise ValueError(f"过滤表达式括号不匹配: {self.expression!r}")
+            self._position += 1
+            return node
+        if kind == "term":
+            token = self._tokens[self._position]
+            self._position += 1
+            return ("term", token[1], token[2])
+        raise ValueError(f"过滤表达式无法解析: {self.expression!r}")
+
+    # ---------- 编译 ----------
+
+    def _compile(self, node) -> Callable:
+        kind = node[0]
+        if kind == "all":
+            return lambda view: True
+        if kind == "not":
+            inner = self._compile(node[1])
+            return lambda view: not inner(view)
+        if kind == "and":
+            checks = [self._compile(child) for child in node[1]]
+            return lambda view: all(check(view) for check in checks)
+        if kind == "or":
+            return self._compile_or(node[1])
+        return self._compile_term(node[1], node[2])
+
+    def _compile_or(self, children) -> Callable:
+        """合并 or 组内的同类条件: url/re/path 合并为分组正则，host 合并为集合"""
+        merged: Dict[str, List[str]] = {}
+        others = []
+        for child in children:
+            if child[0] == "term" and child[1] in ("url", "re", "path", "host"):
+                merged.setdefault(child[1], []).extend(child[2])
+            else:
+                others.append(child)
+        checks = [self._compile_term(field, values) for field, values in merged.items()]
+        checks += [self._compile(child) for child in others]
+        if len(checks) == 1:
+            return checks[0]
+        return lambda view: any(check(view) for check in checks)
+
+    @staticmethod
+    def _compile_term(field: str, values: List[str]) -> Callable:
+        if field == "url":
+            pattern = re.compile("|".join(re.escape(v) for v in values), re.IGNORECASE)
+            return lambda view: pattern.search(view.url) is not None
+        if field == "re":
+            pattern = re.compile("|".join(f"(?:{v})" for v in values))
+            return lambda view: pattern.search(view.url) is not None
+        if field == "path":
+            pattern = re.compile("|".join(fnmatch.translate(v) for v in values))
+            return lambda view: pattern.match(view.path) is not None
+        if field == "host":
+            exact = frozenset(v.lower() for v in values if not v.startswith("*."))
+            suffixes = tuple(v[1:].lower() for v in values if v.startswith("*."))
+            return lambda view: view.host in exact or (bool(suffixes) and view.host.endswith(suffixes))
+        if field in ("type", "method"):
+            allowed = frozenset(v.lower() for v in values)
+            attribute = "resource_type" if field == "type" else "method"
+            return lambda view: (getattr(view, attribute) or "").lower() in allowed
+        if field == "ctype":
+            pattern = re.compile("|".join(re.escape(v) for v in values), re.IGNORECASE)
+            return lambda view: pattern.search(view.content_type or "") is not None
+        if field == "status":
+            ranges = [RequestFilter._parse_range(v, status=True) for v in values]
+            return lambda view: view.status is not None and any(lo <= view.status <= hi for lo, hi in ranges)
+        ranges = [RequestFilter._parse_range(v) for v in values]
+        return lambda view: view.size is not None and any(lo <= view.size <= hi for lo, hi in ranges)
+
+    @staticmethod
+    def _parse_range(value: str, status: bool = False) -> tuple:
+        """解析数值条件: 200 / 2xx / 200-299 / >1024 / <=65536"""
+        try:
+            if status and len(value) == 3 and value[1:].lower() == "xx":
+                base = int(value[0]) * 100
+                return base, base + 99
+            for prefix, build in ((">=", lambda n: (n, float("inf"))), ("<=", lambda n: (float("-inf"), n)),
+                                  (">", lambda n: (n + 1, float("inf"))), ("<", lambda n: (float("-inf"), n - 1))):
+                if value.startswith(prefix):
+                    return build(int(value[len(prefix):]))
+            if "-" in value:
+                low, high = value.split("-", 1)
+                return int(low), int(high)
+            return int(value), int(value)
+        except ValueError:
+            raise ValueError(f"无效的数值条件: {value!r}") from None
+
+
+# 捕获记录中响应信封的字段，response 含 body 且键都在其中时才视为信封而不是响应体
+RESPONSE_ENVELOPE_KEYS = frozenset(("status", "headers", "body"))
+
+
+class _RequestView:
+    """过滤器的统一访问视图，按需从 Request/Response/字典/字符串中取字段"""
+
+    __slots__ = ("_subject", "_parsed", "_headers")
+
+    def __init__(self, subject):
+        self._subject = subject
+        self._parsed = None
+        self._headers = None
+
+    def _get(self, name: str):
+        subject = self._subject
+        if isinstance(subject, dict):
+            return subject.get(name)
+        return getattr(subject, name, None)
+
+    @property
+    def url(self) -> str:
+        if isinstance(self._subject, str):
+            return self._subject
+        return self._get("url") or ""
+
+    @property
+    def host(self) -> str:
+        if self._parsed is None:
+            self._parsed = urlparse(self.url)
+        return (self._parsed.hostname or "").lower()
+
+    @property
+    def path(self) -> str:
+        if self._parsed is None:
+            self._parsed = urlparse(self.url)
+        return self._parsed.path
+
+    def _request(self):
+        # Playwright Response 对象通过 .request 取请求信息
+        request = None if isinstance(self._subject, (str, dict)) else getattr(self._subject, "request", None)
+        return request if request is not None and not callable(request) else self._subject
+
+    @property
+    def resource_type(self) -> Optional[str]:
+        subject = self._request()
+        if isinstance(subject, dict):
+            return subject.get("resource_type")
+        return getattr(subject, "resource_type", None)
+
+    @property
+    def method(self) -> Optional[str]:
+        subject = self._request()
+        if isinstance(subject, dict):
+            return subject.get("method")
+        return getattr(subject, "method", None)
+
+    def _response(self):
+        """
+        Response 对象，或字典记录中的响应信封
+
+        说明:
+        - APICapture 的记录: response 为 {"status", "headers", "body"} 信封
+        - extract_request_data 的记录: response 为解码后的响应体，状态码在顶层 status；此时返回None
+        """
+        if not isinstance(self._subject, dict):
+            return self._subject
+        response = self._subject.get("response")
+        if isinstance(response, dict) and "body" in response and response.keys() <= RESPONSE_ENVELOPE_KEYS:
+            return response
+        return None
+
+    @property
+    def status(self) -> Optional[int]:
+        response = self._response()
+        if response is None:
+            status = self._subject.get("status")
+        elif isinstance(response, dict):
+            status = response.get("status")
+        else:
+            status = getattr(response, "status", None)
+        return status if isinstance(status, int) else None
+
+    @property
+    def headers(self) -> Dict:
+        """响应头；没有响应信封的字典记录不提供响应头(顶层 headers 是请求头)"""
+        if self._headers is None:
+            response = self._response()
+            if response is None:
+                headers = None
+            elif isinstance(response, dict):
+                headers = response.get("headers")
+            else:
+                headers = getattr(response, "headers", None)
+            self._headers = {str(k).lower(): v for k, v in headers.items()} if isinstance(headers, dict) else {}
+        return self._headers
+
+    @property
+    def content_type(self) -> Optional[str]:
+        return self.headers.get("content-type")
+
+    @property
+    def size(self) -> Optional[int]:
+        length = self.headers.get("content-length")
+        if length is None and isinstance(self._subject, dict):
+            length = self._subject.get("size")
+        try:
+            return int(length) if length is not None else None
+        except (TypeError, ValueError):
+            return None
+
+
+def _quote_filter_value(value: str) -> str:
+    return '"' + value.replace('"', '\\"') + '"'
+
+
+def build_filter_expression(
+    url_patterns: Optional[List[str]] = None,
+    resource_types: Optional[List[str]] = None,
+    expression: Optional[str] = None,
+    method: Optional[str] = None,
+) -> str:
+    """
+    功能: 将旧式的过滤参数转换为过滤表达式
+
+    说明:
+    - url_patterns 与旧版一样按区分大小写的子串匹配，转换为转义后的 re: 条件(url: 条件不区分大小写)
+
+    返回值:
+    - 各部分以"与"连接的表达式字符串
+    """
+    parts = []
+    if url_patterns:
+        parts.append("(" + " or ".join(f"re:{_quote_filter_value(re.escape(p))}" for p in url_patterns) + ")")
+    if resource_types:
+        parts.append("type:" + ",".join(resource_types))
+    if method:
+        parts.append(f"method:{method}")
+    if expression:
+        parts.append(f"({expression})")
+    return " ".join(parts)
+
+
 class PlaywrightRequestManager:
     """Playwright 请求管理器"""
 
@@ -138,17 +978,16 @@ class PlaywrightRequestManager:
             parsed_url = urlparse(request.url)
             query_params = parse_qs(parsed_url.query)
 
-            # 获取响应数据
+            # 获取响应数据: 只取一次原始字节，再决定按JSON还是文本解码
             response = await request.response()
             response_data = None
             if response:
                 try:
-                    response_data = await response.json()
+                    response_data = PlaywrightRequestManager.decode_body(
+                        await response.body(), response.headers.get("content-type")
+                    )
                 except:
-                    try:
-                        response_data = await response.text()
-                    except:
-                        response_data = "无法解析的响应数据"
+                    response_data = "无法解析的响应数据"
 
             # 构建cURL命令
             curl_command = f"curl -X {request.method} '{request.url}'"
@@ -190,34 +1029,113 @@ class PlaywrightRequestManager:
                 "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             }
 
+    @staticmethod
+    def decode_body(raw: bytes, content_type: Optional[str] = None) -> Any:
+        """
+        功能: 将响应体原始字节解码为JSON对象或文本
+
+        说明:
+        - 优先按JSON解析(json.loads 可直接处理 UTF-8/16/32 字节)
+        - 不是JSON时按 Content-Type 中的 charset 解码为文本，默认 UTF-8
+
+        输入:
+        - raw: 响应体原始字节
+        - content_type: Content-Type 响应头
+
+        返回值:
+        - JSON对象或文本
+        """
+        if raw.lstrip()[:1] != b"<":
+            try:
+                return json.loads(raw)
+            except ValueError:
+                pass
+
+        charset = "utf-8"
+        if content_type and "charset=" in content_type:
+            charset = content_type.split("charset=", 1)[1].split(";", 1)[0].strip().strip('"') or charset
+        try:
+            return raw.decode(charset, errors="replace")
+        except LookupError:
+            return raw.decode("utf-8", errors="replace")
+
+    @staticmethod
+    async def extract_request_data_batch(
+        requests: Iterable,
+        concurrency: int = 8,
+        ordered: bool = False,
+    ) -> AsyncIterator[Dict]:
+        """
+        功能: 并发提取一批请求的数据
+
+        说明:
+        - 最多 concurrency 个请求同时等待响应，避免逐个往返
+        - 以异步迭代器返回结果，调用方可以边提取边处理
+        - ordered=False 时按完成顺序返回，ordered=True 时按输入顺序返回
+        - 调用方提前退出迭代时，未完成的提取任务会被取消
+
+        输入:
+        - requests: Playwright 请求对象序列
+        - concurrency: 最大并发数
+        - ordered: 是否按输入顺序返回
+
+        返回值:
+        - extract_request_data 结果的异步迭代器
+
+        使用示例:
+            async for data in PlaywrightRequestManager.extract_request_data_batch(requests, 16):
+                ...
+        """
+        import asyncio
+
+        pending = iter(enumerate(requests))
+        results: asyncio.Queue = asyncio.Queue()
+
+        async def worker():
+            for index, request in pending:
+                results.put_nowait((index, await PlaywrightRequestManager.extract_request_data(request)))
+            results.put_nowait(None)
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(max(1, concurrency))]
+        running = len(workers)
+        buffered: Dict[int, Dict] = {}
+        next_index = 0
+        try:
+            while running:
+                item = await results.get()
+                if item is None:
+                    running -= 1
+                    continue
+                index, data = item
+                if not ordered:
+                    yield data
+                    continue
+                buffered[index] = data
+                while next_index in buffered:
+                    yield buffered.pop(next_index)
+                    next_index += 1
+        finally:
+            for task in workers:
+                task.cancel()
+
     @staticmethod
     def create_request_filter(
         url_patterns: Optional[List[str]] = None,
         resource_types: Optional[List[str]] = None,
+        expression: Optional[str] = None,
     ) -> Callable:
         """
         功能: 创建请求过滤器
 
         输入:
-        - url_patterns: URL匹配模式列表
+        - url_patterns: URL匹配模式列表(区分大小写的子串)
         - resource_types: 资源类型列表
+        - expression: 过滤表达式，语法见 RequestFilter
 
         返回值:
-        - 过滤函数
+        - 编译后的过滤器(可调用对象)，多个条件之间为"与"关系
         """
-
-        def filter_request(request) -> bool:
-            # 检查资源类型
-            if resource_types and request.resource_type not in resource_types:
-                return False
-
-            # 检查URL模式
-            if url_patterns:
-                return any(pattern in request.url for pattern in url_patterns)
-
-            return True
-
-        return filter_request
+        return RequestFilter(build_filter_expression(url_patterns, resource_types, expression))
 
     @staticmethod
     async def save_har_data(
@@ -240,6 +1158,9 @@ class PlaywrightRequestManager:
 class APIDataManager:
     """API数据管理器"""
 
+    # 已加载的全文索引: 索引路径 -> ((实际文件, 修改时间), TextIndex)，文件未变化时直接复用
+    _text_indexes: Dict[str, tuple] = {}
+
     @staticmethod
     def save_api_data(
         page_url: str,
@@ -273,9 +1194,7 @@ class APIDataManager:
 
         # 只保存JSON格式
         output_file = output_dir / f"{page_name}_api_{timestamp}.json"
-        FileManager.save_json(api_data, output_file)
-
-        return output_file
+        return FileManager.save_json(api_data, output_file)
 
     @staticmethod
     def format_request_data(request_data: Dict) -> Dict:
@@ -302,38 +1221,74 @@ class APIDataManager:
 
     @staticmethod
     def filter_api_data(
-        api_data: List[Dict],
+        api_data: Union[List[Dict], str, Path],
         url_pattern: Optional[str] = None,
         method: Optional[str] = None,
+        expression: Optional[str] = None,
     ) -> List[Dict]:
         """
         功能: 过滤API数据
 
         输入:
-        - api_data: API数据列表
-        - url_pattern: URL匹配模式
+        - api_data: API数据列表，或API数据文件路径(支持压缩文件)
+        - url_pattern: URL匹配模式(区分大小写的子串)
         - method: 请求方法
+        - expression: 过滤表达式，语法见 RequestFilter
 
         返回值:
         - 过滤后的API数据列表
         """
-        filtered_data = api_data
+        if isinstance(api_data, (str, Path)):
+            api_data = FileManager.load_json(api_data)
+
+        if not (url_pattern or method or expression):
+            return api_data
+
+        request_filter = RequestFilter(build_filter_expression(
+            [url_pattern] if url_pattern else None, expression=expression, method=method
+        ))
+        return [data for data in api_data if request_filter(data)]
+
+    @staticmethod
+    def search_api_data(
+        query: str,
+        limit: int = 50,
+        index_path: Optional[Union[str, Path]] = None,
+        update: bool = False,
+    ) -> List[Dict]:
+        """
+        功能: 通过全文倒排索引查找包含指定文本的接口记录
+
+        输入:
+        - query: 查询文本(英雄名、羁绊描述、字段名等)
+        - limit: 最多返回的结果数
+        - index_path: 索引文件路径，默认为 data/crawler/api/text_index.json
+        - update: 查询前是否先增量更新索引
 
-        if url_pattern:
-            filtered_data = [
-                data for data in filtered_data if url_pattern in data.get("url", "")
-            ]
+        说明:
+        - 加载后的索引按 (实际文件, 修改时间) 缓存，索引文件未变化时后续查询不再重新加载
+
+        返回值:
+        - [{"file", "index", "url", "api_type", "version", "path"}, ...]
+        """
+        from text_index import TextIndex, INDEX_FILE
 
-        if method:
-            filtered_data = [
-                data
-                for data in filtered_data
-                if data.get("method", "").upper() == method.upper()
-            ]
+        def signature(path: Path) -> tuple:
+            resolved = FileManager.resolve_path(path)
+            return resolved, resolved.stat().st_mtime if resolved.exists() else None
 
-        return filtered_data
+        path = Path(index_path or INDEX_FILE)
+        key = path.as_posix()
+        current = signature(path)
+        cached = APIDataManager._text_indexes.get(key)
+        if cached is not None and cached[0] == current:
+            index = cached[1]
+        else:
+            index = TextIndex.load(path)
+            APIDataManager._text_indexes[key] = (current, index)
 
+        if update and (index.update(API_DIR) or index._removed):
+            index.save()
+            APIDataManager._text_indexes[key] = (signature(path), index)
+        return index.search(query, limit)
 
-# 创建基础目录
-for path in [DATA_DIR, CRAWLER_DIR, API_DIR, DEBUG_DIR, LOG_DIR]:
-    PathManager.ensure_dir(path)
@@ -0,0 +1,338 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+功能: 只轮询版本接口的轻量级更新监视器
+
+说明:
+- 只请求 version 类型接口(version*.js)，使用 ETag / Last-Modified 条件请求，未变化时服务器返回304
+- 版本指纹 = 响应体的SHA-256；指纹变化时才触发捕获，捕获成功后才保存新的指纹与缓存头，失败时下一轮重新触发
+  - full: 运行完整的 APICapture 浏览器捕获
+  - incremental: 不启动浏览器，直接重新请求上次捕获到的数据接口并更新 api_*.json，
+    之后与完整捕获一样重建数据表、装备索引、全文索引与结构缓存
+- 每次检测到变化都会记录检测延迟: 服务器 Last-Modified 到检测时刻的间隔，以及与上次轮询的间隔(延迟上限)
+
+使用方法:
+python version_watcher.py [--interval 300] [--mode incremental|full] [--url URL ...] [--once]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import sys
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+
+from schema_monitor import SchemaMonitor
+from utilities import FileManager, LogManager, API_DIR, ROOT_DIR
+
+# 版本接口匹配规则，与 APICapture.api_config["version"] 保持一致
+VERSION_PATTERN = r"version.*\.js"
+
+# 轮询状态文件: URL -> {etag, last_modified, fingerprint, checked_at}
+STATE_FILE = API_DIR / "version_state.json"
+
+# 增量刷新时跳过的接口类型
+INCREMENTAL_SKIP_TYPES = {"other", "version"}
+
+
+def discover_version_urls() -> List[str]:
+    """从已保存的 api_version.json 中找出版本接口URL"""
+    urls: List[str] = []
+    if not API_DIR.exists():
+        return urls
+    for version_dir in API_DIR.iterdir():
+        if not version_dir.is_dir():
+            continue
+        path = FileManager.resolve_path(version_dir / "api_version.json")
+        if not path.exists():
+            continue
+        for record in FileManager.load_json(path):
+            url = record.get("url")
+            if url and re.search(VERSION_PATTERN, url) and url not in urls:
+                urls.append(url)
+    return urls
+
+
+def fingerprint(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+
+class VersionWatcher:
+    """版本接口轮询器"""
+
+    def __init__(
+        self,
+        urls: List[str],
+        interval: float = 300,
+        mode: str = "incremental",
+        timeout: float = 10,
+        state_file: Path = STATE_FILE,
+        logger: Optional[logging.Logger] = None,
+    ):
+        self.urls = urls
+        self.interval = interval
+        self.mode = mode
+        self.timeout = timeout
+        self.state_file = Path(state_file)
+        self.logger = logger or logging.getLogger("VersionWatcher")
+        resolved = FileManager.resolve_path(self.state_file)
+        self.state: Dict[str, Dict] = FileManager.load_json(resolved) if resolved.exists() else {}
+
+    async def poll_url(self, session: aiohttp.ClientSession, url: str) -> Optional[Dict]:
+        """
+        功能: 对单个版本接口发起条件请求
+
+        说明:
+        - 指纹变化时不修改状态，由调用方在捕获成功后调用 accept()
+
+        返回值:
+        - 指纹变化时返回 {"url", "fingerprint", "previous", "etag", "last_modified", "since_last_poll"}
+        - 未变化(304或指纹相同)或请求失败时返回None
+        """
+        state = self.state.setdefault(url, {})
+        headers = {}
+        if state.get("etag"):
+            headers["If-None-Match"] = state["etag"]
+        if state.get("last_modified"):
+            headers["If-Modified-Since"] = state["last_modified"]
+
+        checked_at = time.time()
+        since_last_poll = checked_at - state["checked_at"] if state.get("checked_at") else None
+        try:
+            async with session.get(url, headers=headers) as response:
+                state["checked_at"] = checked_at
+                if response.status == 304:
+                    return None
+                if response.status != 200:
+                    self.logger.warning(f"版本接口返回异常状态: {url} - {response.status}")
+                    return None
+                body = await response.read()
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.logger.warning(f"轮询版本接口失败: {url} - {str(e)}")
+            return None
+
+        previous = state.get("fingerprint")
+        current = fingerprint(body)
+        if previous == current:
+            state["etag"] = etag
+            state["last_modified"] = last_modified
+            return None
+        return {
+            "url": url,
+            "fingerprint": current,
+            "previous": previous,
+            "etag": etag,
+            "last_modified": last_modified,
+            "since_last_poll": since_last_poll,
+        }
+
+    def accept(self, changes: List[Dict]) -> None:
+        """记录已处理的版本变化(新指纹与缓存头)并保存状态"""
+        for change in changes:
+            state = self.state.setdefault(change["url"], {})
+            state["fingerprint"] = change["fingerprint"]
+            state["etag"] = change["etag"]
+            state["last_modified"] = change["last_modified"]
+        FileManager.save_json(self.state, self.state_file)
+
+    async def poll_once(self, session: aiohttp.ClientSession) -> List[Dict]:
+        """并发轮询所有版本接口，返回发生变化的接口"""
+        results = await asyncio.gather(*(self.poll_url(session, url) for url in self.urls))
+        FileManager.save_json(self.state, self.state_file)
+        return [result for result in results if result]
+
+    def log_latency(self, change: Dict) -> None:
+        """记录检测延迟"""
+        detected_at = datetime.now(timezone.utc)
+        message = f"检测到版本变化: {change['url']}"
+        if change["last_modified"]:
+            try:
+                modified_at = parsedate_to_datetime(change["last_modified"])
+                latency = (detected_at - modified_at).total_seconds()
+                message += f" - 检测延迟 {latency:.1f} 秒 (Last-Modified: {change['last_modified']})"
+            except (TypeError, ValueError):
+                pass
+        if change["since_last_poll"] is not None:
+            message += f" - 距上次轮询 {change['since_last_poll']:.1f} 秒"
+        self.logger.info(message)
+
+    async def trigger_capture(self, session: aiohttp.ClientSession) -> bool:
+        """
+        功能: 根据模式触发完整或增量捕获
+
+        返回值:
+        - 捕获是否成功；增量捕获中任一接口刷新失败都视为失败
+        """
+        start = time.perf_counter()
+        label = "完整" if self.mode == "full" else "增量"
+        try:
+            if self.mode == "full":
+                # 延迟导入，仅在需要完整捕获时才加载Playwright
+                from api_capture import APICapture
+                await APICapture().run()
+                failed = 0
+            else:
+                _, failed = await refresh_known_endpoints(session, self.logger)
+        except Exception as e:
+            self.logger.error(f"{label}捕获失败: {str(e)}")
+            return False
+        if failed:
+            self.logger.error(f"{label}捕获有 {failed} 个接口刷新失败，下一轮重新触发")
+            return False
+        self.logger.info(f"{label}捕获完成，耗时 {time.perf_counter() - start:.1f} 秒")
+        return True
+
+    async def run(self, once: bool = False) -> None:
+        """
+        功能: 轮询主循环
+
+        步骤:
+        1. 条件请求所有版本接口
+        2. 任一指纹变化时记录检测延迟并触发捕获，捕获成功后才记录新指纹
+        3. 首次运行(没有历史指纹)只记录指纹，不触发捕获
+        4. 按配置的间隔等待下一轮
+        """
+        if not self.urls:
+            self.logger.error("没有可轮询的版本接口，请先完成一次捕获或通过 --url 指定")
+            return
+
+        self.logger.info(f"开始监视 {len(self.urls)} 个版本接口，轮询间隔 {self.interval} 秒，模式: {self.mode}")
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            while True:
+                changes = await self.poll_once(session)
+                initial = [change for change in changes if change["previous"] is None]
+                real_changes = [change for change in changes if change["previous"] is not None]
+                if initial:
+                    self.accept(initial)
+                    self.logger.info("已记录版本接口的初始指纹")
+                for change in real_changes:
+                    self.log_latency(change)
+                if real_changes and await self.trigger_capture(session):
+                    self.accept(real_changes)
+                if once:
+                    return
+                await asyncio.sleep(self.interval)
+
+
+def known_api_files(version_dir: Path) -> Dict[str, Path]:
+    """
+    功能: 版本目录下的 api_*.json，按API类型去重
+
+    说明:
+    - 同一接口可能同时存在未压缩与 .gz / .zst 文件(切换压缩配置前后)，只取 FileManager.resolve_path 选中的一个
+
+    返回值:
+    - API类型 -> 实际读取的文件路径
+    """
+    files: Dict[str, Path] = {}
+    for api_file in sorted(version_dir.glob("api_*.json*")):
+        api_type = api_file.name[len("api_"):].split(".")[0]
+        if api_type not in files:
+            files[api_type] = FileManager.resolve_path(version_dir / f"api_{api_type}.json")
+    return files
+
+
+async def refresh_known_endpoints(session: aiohttp.ClientSession, logger: logging.Logger) -> Tuple[int, int]:
+    """
+    功能: 增量捕获 - 重新请求上次捕获到的数据接口并更新版本目录下的 api_*.json
+
+    说明:
+    - 刷新后的响应体先按结构缓存校验，保存后与完整捕获一样经过 capture_pipeline 重建派生数据
+
+    返回值:
+    - (成功刷新的记录数, 刷新失败的记录数)
+    """
+    from capture_pipeline import process_version_dir, finalize_capture
+
+    refreshed = failed = 0
+    if not API_DIR.exists():
+        return refreshed, failed
+
+    schema_monitor = SchemaMonitor()
+    refreshed_records: List[Dict] = []
+    for version_dir in sorted(p for p in API_DIR.iterdir() if p.is_dir()):
+        refreshed_types = []
+        for api_type, api_file in known_api_files(version_dir).items():
+            if api_type in INCREMENTAL_SKIP_TYPES:
+                continue
+            records = FileManager.load_json(api_file)
+            before = refreshed
+            for record in records:
+                try:
+                    async with session.get(record["url"]) as response:
+                        if response.status != 200:
+                            logger.warning(f"刷新接口失败: {record['url']} - 状态 {response.status}")
+                            failed += 1
+                            continue
+                        text = await response.text()
+                    body = json.loads(text)
+                except (aiohttp.ClientError, asyncio.TimeoutError, KeyError, ValueError) as e:
+                    logger.warning(f"刷新接口失败: {record.get('url')} - {str(e)}")
+                    failed += 1
+                    continue
+                record.setdefault("response", {})["body"] = body
+                record["response"]["status"] = response.status
+                record["timestamp"] = datetime.now().isoformat()
+                schema_monitor.validate(api_type, record.get("version", "common"), body)
+                refreshed_records.append(record)
+                refreshed += 1
+            if refreshed > before:
+                FileManager.save_json(records, api_file)
+                refreshed_types.append(api_type)
+
+        if refreshed_types:
+            process_version_dir(version_dir, refreshed_types, logger)
+
+    finalize_capture(refreshed_records, datetime.now().strftime("%Y%m%d_%H%M%S"), logger, schema_monitor)
+    logger.info(f"增量捕获刷新了 {refreshed} 条接口记录，失败 {failed} 条")
+    return refreshed, failed
+
+
+def setup_logger() -> logging.Logger:
+    """队列日志: 监视器与其在进程内触发的捕获共用同一个后台写入线程"""
+    log_file = ROOT_DIR / "logs" / f"version_watcher_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+    return LogManager.setup_queue_logging([log_file], logger_name="VersionWatcher")
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="只轮询版本接口，检测到游戏数据更新时触发捕获")
+    parser.add_argument("--url", action="append", default=[], help="版本接口URL，可重复指定；默认从上次捕获中发现")
+    parser.add_argument("--interval", type=float, default=300, help="轮询间隔(秒) (默认: 300)")
+    parser.add_argument("--mode", choices=["incremental", "full"], default="incremental",
+                        help="检测到变化后的捕获方式 (默认: incremental)")
+    parser.add_argument("--timeout", type=float, default=10, help="单次请求超时(秒) (默认: 10)")
+    parser.add_argument("--once", action="store_true", help="只轮询一次")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    logger = setup_logger()
+    watcher = VersionWatcher(
+        urls=args.url or discover_version_urls(),
+        interval=args.interval,
+        mode=args.mode,
+        timeout=args.timeout,
+        logger=logger,
+    )
+    try:
+        asyncio.run(watcher.run(once=args.once))
+    except KeyboardInterrupt:
+        logger.info("版本监视已停止")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())